@@ -1,29 +1,78 @@
 import os
+import json
+import time
 import logging
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
-import tempfile
 from utils.ollama_client import OllamaClient
-from utils.ocr import process_image
-from utils.translator import translate_text
+from utils.async_ollama_client import AsyncOllamaClient, BackgroundLoop
+from utils.ocr import process_image, process_image_async, ocr_cache
+from utils.jobs import OCRJobManager, FINISHED_STATES
+from utils.model_warmup import ModelWarmer
+from utils.retry import Deadline, DeadlineExceeded, retry_budget
+from utils import metrics
+from utils.uploads import UploadRequest, UploadRejected, MAX_CONTENT_LENGTH, received_upload
+from utils.translator import translate_text, translate_text_async, translate_text_stream, translate_batch, translation_cache, translation_memory
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET")
 
+# Uploads are streamed into a per-request workspace as they arrive, and
+# bodies over MAX_UPLOAD_BYTES are refused before they are read
+app.request_class = UploadRequest
+app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 # Configure upload settings
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf'}
-TEMP_FOLDER = tempfile.gettempdir()
+
+# Largest number of (text, language) pairs accepted by one batch request
+BATCH_MAX_ITEMS = int(os.environ.get("TRANSLATION_BATCH_MAX_ITEMS", "1000"))
+
+# Seconds a /api/translate request may take, fallbacks included
+TRANSLATION_DEADLINE = float(os.environ.get("TRANSLATION_DEADLINE", "60"))
+
+# Optional token protecting the admin endpoints
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
 
 # Initialize Ollama client
 ollama_client = OllamaClient()
 
+# Async client for the /api/async/* routes. Its coroutines run on one
+# long-lived event loop so connections are pooled across requests.
+async_ollama_client = AsyncOllamaClient(ollama_client)
+io_loop = BackgroundLoop()
+
+# Background OCR jobs; resumes jobs queued before a restart
+ocr_jobs = OCRJobManager(ollama_client)
+ocr_jobs.start()
+
+# Load the Ollama models now rather than on the first request, and again
+# whenever the configuration changes them
+model_warmer = ModelWarmer(ollama_client)
+model_warmer.start()
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def parse_flag(value):
+    """Parse a boolean request parameter like the boolean environment variables; None stays None."""
+    if value is None or isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ('true', '1', 'yes', 'y', 't'):
+        return True
+    if text in ('false', '0', 'no', 'n', 'f'):
+        return False
+    raise ValueError(f'{value!r} is not a boolean')
+
+def is_admin_request():
+    return not ADMIN_TOKEN or request.headers.get('X-Admin-Token') == ADMIN_TOKEN
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -40,21 +89,129 @@ def ocr():
     
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        filepath = os.path.join(TEMP_FOLDER, filename)
-        file.save(filepath)
+        upload = received_upload(file)
         
+        # Async mode: queue the upload and return a job ID right away
+        if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+            return submit_ocr_job(upload, filename)
+        
+        # Images are processed straight from memory; PDFs were received into
+        # a file in the request's workspace, which is removed afterwards
         try:
-            extracted_text = process_image(filepath, ollama_client)
-            os.remove(filepath)  # Clean up temp file
+            if upload.path is None:
+                extracted_text = process_image(filename, ollama_client, image_data=upload.read_all(),
+                                               content_hash=upload.sha256)
+            else:
+                extracted_text = process_image(upload.path, ollama_client, content_hash=upload.sha256)
             return jsonify({'text': extracted_text})
         except Exception as e:
             logger.error(f"OCR processing error: {e}")
-            if os.path.exists(filepath):
-                os.remove(filepath)  # Ensure temp file is cleaned up
             return jsonify({'error': f'OCR processing failed: {str(e)}'}), 500
     
     return jsonify({'error': 'File type not allowed'}), 400
 
+@app.route('/api/async/ocr', methods=['POST'])
+async def ocr_async():
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file part'}), 400
+    
+    file = request.files['file']
+    
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+    
+    if not allowed_file(file.filename):
+        return jsonify({'error': 'File type not allowed'}), 400
+    
+    filename = secure_filename(file.filename)
+    upload = received_upload(file)
+    try:
+        if upload.path is not None:
+            job = process_image_async(upload.path, async_ollama_client, content_hash=upload.sha256)
+        else:
+            job = process_image_async(filename, async_ollama_client, image_data=upload.read_all(),
+                                      content_hash=upload.sha256)
+        extracted_text = await io_loop.run(job)
+        return jsonify({'text': extracted_text})
+    except Exception as e:
+        logger.error(f"OCR processing error: {e}")
+        return jsonify({'error': f'OCR processing failed: {str(e)}'}), 500
+
+def submit_ocr_job(upload, filename):
+    job_id = ocr_jobs.new_job_id()
+    filepath = ocr_jobs.upload_path(job_id, filename)
+    try:
+        # Move the received file out of the request's workspace
+        with metrics.time_stage('upload_save'):
+            upload.persist(filepath)
+        ocr_jobs.submit(job_id, filename, filepath, upload.sha256)
+    except Exception as e:
+        logger.error(f"Failed to queue OCR job: {e}")
+        if os.path.exists(filepath):
+            os.remove(filepath)
+        return jsonify({'error': f'Failed to queue OCR job: {str(e)}'}), 500
+    
+    return jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': f'/api/ocr/jobs/{job_id}'
+    }), 202
+
+@app.route('/api/ocr/jobs', methods=['POST'])
+def create_ocr_job():
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file part'}), 400
+    
+    file = request.files['file']
+    
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+    
+    if not allowed_file(file.filename):
+        return jsonify({'error': 'File type not allowed'}), 400
+    
+    return submit_ocr_job(received_upload(file), secure_filename(file.filename))
+
+@app.route('/api/ocr/jobs/<job_id>', methods=['GET', 'DELETE'])
+def ocr_job(job_id):
+    if request.method == 'DELETE':
+        status = ocr_jobs.cancel(job_id)
+        if status is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify({'job_id': job_id, 'status': status})
+    
+    job = ocr_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@app.route('/api/ocr/jobs/<job_id>/events', methods=['GET'])
+def ocr_job_events(job_id):
+    if ocr_jobs.get(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    def generate():
+        last = None
+        while True:
+            job = ocr_jobs.get(job_id)
+            if job is None:
+                yield sse_event({'error': 'Job not found'}, event='error')
+                return
+            snapshot = (job['status'], job['progress']['pages_done'], job['progress']['pages_total'])
+            if snapshot != last:
+                last = snapshot
+                if job['status'] in FINISHED_STATES:
+                    yield sse_event(job, event=job['status'])
+                    return
+                yield sse_event(job, event='progress')
+            time.sleep(0.5)
+    
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/translate', methods=['POST'])
 def translate():
     data = request.json
@@ -69,12 +226,133 @@ def translate():
         return jsonify({'error': 'Text and target language cannot be empty'}), 400
     
     try:
-        translated_text = translate_text(text, target_language, ollama_client, provider)
+        hedge = parse_flag(data.get('hedge'))  # None uses the TRANSLATION_HEDGING default
+    except ValueError as e:
+        return jsonify({'error': f'Invalid hedge parameter: {str(e)}'}), 400
+    
+    try:
+        translated_text = translate_text(text, target_language, ollama_client, provider, hedge=hedge,
+                                         deadline=Deadline(TRANSLATION_DEADLINE))
         return jsonify({'translated_text': translated_text})
+    except DeadlineExceeded as e:
+        logger.error(f"Translation with provider {provider} timed out: {e}")
+        return jsonify({'error': f'Translation timed out: {str(e)}'}), 504
     except Exception as e:
         logger.error(f"Translation error with provider {provider}: {e}")
         return jsonify({'error': f'Translation failed: {str(e)}'}), 500
 
+@app.route('/api/async/translate', methods=['POST'])
+async def translate_async():
+    data = request.json
+    if not data or 'text' not in data or 'target_language' not in data:
+        return jsonify({'error': 'Missing required parameters'}), 400
+    
+    text = data['text']
+    target_language = data['target_language']
+    provider = data.get('provider', 'ollama')
+    
+    if not text or not target_language:
+        return jsonify({'error': 'Text and target language cannot be empty'}), 400
+    
+    try:
+        hedge = parse_flag(data.get('hedge'))  # None uses the TRANSLATION_HEDGING default
+    except ValueError as e:
+        return jsonify({'error': f'Invalid hedge parameter: {str(e)}'}), 400
+    
+    try:
+        translated_text = await io_loop.run(translate_text_async(text, target_language, async_ollama_client, provider,
+                                                                 hedge=hedge, deadline=Deadline(TRANSLATION_DEADLINE)))
+        return jsonify({'translated_text': translated_text})
+    except DeadlineExceeded as e:
+        logger.error(f"Translation with provider {provider} timed out: {e}")
+        return jsonify({'error': f'Translation timed out: {str(e)}'}), 504
+    except Exception as e:
+        logger.error(f"Translation error with provider {provider}: {e}")
+        return jsonify({'error': f'Translation failed: {str(e)}'}), 500
+
+@app.route('/api/translate/batch', methods=['POST'])
+def translate_batch_route():
+    data = request.json
+    if not data or 'texts' not in data or not ('target_languages' in data or 'target_language' in data):
+        return jsonify({'error': 'Missing required parameters'}), 400
+    
+    texts = data['texts']
+    target_languages = data.get('target_languages', data.get('target_language'))
+    if isinstance(target_languages, str):
+        target_languages = [target_languages]
+    provider = data.get('provider', 'ollama')
+    
+    if not isinstance(texts, list) or not texts:
+        return jsonify({'error': 'texts must be a non-empty list'}), 400
+    if (not isinstance(target_languages, list) or not target_languages
+            or not all(isinstance(lang, str) and lang for lang in target_languages)):
+        return jsonify({'error': 'target_languages must be a non-empty list of language codes'}), 400
+    if len(texts) * len(target_languages) > BATCH_MAX_ITEMS:
+        return jsonify({'error': f'Batch too large, at most {BATCH_MAX_ITEMS} text/language pairs allowed'}), 400
+    
+    # Invalid items get their own error instead of failing the batch
+    valid_texts = [text for text in texts if isinstance(text, str) and text.strip()]
+    try:
+        translated = iter(translate_batch(valid_texts, target_languages, ollama_client, provider))
+    except Exception as e:
+        logger.error(f"Batch translation error with provider {provider}: {e}")
+        return jsonify({'error': f'Translation failed: {str(e)}'}), 500
+    
+    results = []
+    for text in texts:
+        if isinstance(text, str) and text.strip():
+            results.append(next(translated))
+        else:
+            results.append({
+                'translations': {},
+                'errors': {lang: 'Text must be a non-empty string' for lang in target_languages}
+            })
+    
+    return jsonify({'results': results})
+
+def sse_event(data, event=None):
+    """Format a server-sent event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.route('/api/translate/stream', methods=['POST'])
+def translate_stream():
+    data = request.json
+    if not data or 'text' not in data or 'target_language' not in data:
+        return jsonify({'error': 'Missing required parameters'}), 400
+    
+    text = data['text']
+    target_language = data['target_language']
+    provider = data.get('provider', 'ollama')
+    
+    if not text or not target_language:
+        return jsonify({'error': 'Text and target language cannot be empty'}), 400
+    
+    deadline = Deadline(TRANSLATION_DEADLINE)
+    
+    def generate():
+        # If the client disconnects, the WSGI server closes this generator,
+        # which closes the upstream model connection and stops generation
+        parts = []
+        try:
+            for delta in translate_text_stream(text, target_language, ollama_client, provider, deadline):
+                if delta:
+                    parts.append(delta)
+                    yield sse_event({'delta': delta})
+            yield sse_event({'translated_text': ''.join(parts)}, event='done')
+        except DeadlineExceeded as e:
+            logger.error(f"Streaming translation with provider {provider} timed out: {e}")
+            yield sse_event({'error': f'Translation timed out: {str(e)}', 'status': 504}, event='error')
+        except Exception as e:
+            logger.error(f"Streaming translation error with provider {provider}: {e}")
+            yield sse_event({'error': f'Translation failed: {str(e)}'}, event='error')
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/languages', methods=['GET'])
 def get_languages():
     from utils.translator import get_supported_languages
@@ -90,6 +368,12 @@ def get_providers():
     providers = get_providers()
     return jsonify(providers)
 
+@app.route('/api/providers/stats', methods=['GET'])
+def get_provider_stats():
+    from utils.translator import provider_router
+    
+    return jsonify(provider_router.snapshot())
+
 @app.route('/api/config/ollama', methods=['GET', 'POST'])
 def configure_ollama():
     if request.method == 'GET':
@@ -97,11 +381,22 @@ def configure_ollama():
         config = {
             'ollama_base_url': ollama_client.ollama_base_url,
             'ocr_model': ollama_client.ocr_model,
+            'ocr_image_profile': ollama_client.ocr_profile().settings(),
             'translation_model': ollama_client.translation_model,
+            'embedding_model': ollama_client.embedding_model,
             'enable_local_ollama': ollama_client.enable_local_ollama,
             'temperature': ollama_client.temperature,
             'top_p': ollama_client.top_p,
-            'max_tokens': ollama_client.max_tokens
+            'max_tokens': ollama_client.max_tokens,
+            'ocr_max_tokens': ollama_client.ocr_max_tokens,
+            'num_ctx': ollama_client.num_ctx,
+            'adaptive_length': ollama_client.adaptive_length,
+            'translation_length_ratio': ollama_client.translation_length_ratio,
+            'keep_alive': ollama_client.keep_alive,
+            'models': ollama_client.model_status(),
+            'warmup': model_warmer.snapshot(),
+            'health': ollama_client.health_status(),
+            'retry_budget': retry_budget.snapshot()
         }
         return jsonify(config)
     else:
@@ -111,9 +406,17 @@ def configure_ollama():
             return jsonify({'error': 'No configuration data provided'}), 400
         
         try:
+            # Roles whose model has to be loaded again
+            changed_roles = set()
+            models_before = ollama_client.models()
+            
             # Update configuration
             if 'ollama_base_url' in data:
+                url_changed = data['ollama_base_url'] != ollama_client.ollama_base_url
                 ollama_client.ollama_base_url = data['ollama_base_url']
+                if url_changed:
+                    ollama_client.reset_health()
+                    changed_roles.update(models_before)
             
             if 'ocr_model' in data:
                 ollama_client.ocr_model = data['ocr_model']
@@ -121,6 +424,17 @@ def configure_ollama():
             if 'translation_model' in data:
                 ollama_client.translation_model = data['translation_model']
                 
+            if 'embedding_model' in data:
+                ollama_client.embedding_model = data['embedding_model']
+            
+            changed_roles.update(role for role, model in ollama_client.models().items() if model != models_before[role])
+            
+            for role in ollama_client.keep_alive:
+                key = f'{role}_keep_alive'
+                if key in data and str(data[key]) != str(ollama_client.keep_alive[role]):
+                    ollama_client.keep_alive[role] = str(data[key])
+                    changed_roles.add(role)
+                
             if 'enable_local_ollama' in data:
                 ollama_client.enable_local_ollama = bool(data['enable_local_ollama'])
                 
@@ -131,20 +445,80 @@ def configure_ollama():
                 ollama_client.top_p = float(data['top_p'])
                 
             if 'max_tokens' in data:
-                ollama_client.max_tokens = int(data['max_tokens'])
+                # null or 0 removes the limit
+                ollama_client.max_tokens = int(data['max_tokens']) if data['max_tokens'] else None
+                
+            if 'ocr_max_tokens' in data:
+                ollama_client.ocr_max_tokens = int(data['ocr_max_tokens'])
+                
+            if 'num_ctx' in data:
+                ollama_client.num_ctx = int(data['num_ctx'])
+                
+            if 'adaptive_length' in data:
+                ollama_client.adaptive_length = bool(data['adaptive_length'])
+                
+            if 'translation_length_ratio' in data:
+                ollama_client.translation_length_ratio = float(data['translation_length_ratio'])
             
             # Log changes
             logger.info(f"Updated Ollama configuration: OCR model: {ollama_client.ocr_model}, " 
                       f"Translation model: {ollama_client.translation_model}, "
                       f"Local Ollama: {'enabled' if ollama_client.enable_local_ollama else 'disabled'}")
             
+            # Load new models before users ask for them; keep_alive only
+            # takes effect with the model's next request
+            model_warmer.request(changed_roles)
+            
             return jsonify({'message': 'Configuration updated successfully'})
             
         except Exception as e:
             logger.error(f"Error updating Ollama configuration: {e}")
             return jsonify({'error': f'Configuration update failed: {str(e)}'}), 500
 
+CACHES = {
+    'translations': translation_cache,
+    'translation_memory': translation_memory,
+    'ocr': ocr_cache
+}
+
+# Caches purged along with another; the translation memory holds the same
+# translations as the translation cache
+DEPENDENT_CACHES = {
+    'translations': ['translation_memory']
+}
+
+@app.route('/api/admin/cache/<name>', methods=['GET', 'DELETE'])
+def cache_admin(name):
+    if not is_admin_request():
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    cache = CACHES.get(name)
+    if cache is None:
+        return jsonify({'error': f'Unknown cache: {name}'}), 404
+    
+    if request.method == 'GET':
+        return jsonify(cache.stats())
+    
+    purged = [name, *DEPENDENT_CACHES.get(name, [])]
+    for purged_name in purged:
+        CACHES[purged_name].purge()
+    logger.info(f"Caches purged: {', '.join(purged)}")
+    return jsonify({'message': f"Cache {name} purged", 'purged': purged})
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
 # Error handlers
+@app.errorhandler(UploadRejected)
+def upload_rejected(error):
+    return jsonify({'error': str(error)}), error.status
+
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(error):
+    return jsonify({'error': f'Request too large, the limit is {MAX_CONTENT_LENGTH // (1024 * 1024)} MB'}), 413
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Not found'}), 404
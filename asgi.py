@@ -0,0 +1,126 @@
+"""
+ASGI entry point, served with gunicorn's asgi worker (see gunicorn.conf.py).
+
+Async views such as /api/async/translate and /api/async/ocr run on the
+worker's event loop, so a request waiting on a model holds no thread and one
+process can keep hundreds of them in flight. All other views are sync and
+run in a thread pool, like under the gthread worker.
+"""
+import os
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgiInstance
+from werkzeug.exceptions import HTTPException
+
+from app import app
+
+# Threads for the sync views, per worker process
+SYNC_THREADS = int(os.environ.get("GUNICORN_THREADS", "64"))
+sync_executor = ThreadPoolExecutor(max_workers=SYNC_THREADS, thread_name_prefix="wsgi")
+
+
+def _async_view(scope):
+    """Return the Flask view a request is routed to if it is a coroutine function, else None."""
+    try:
+        endpoint, _ = app.url_map.bind("localhost").match(scope["path"], method=scope["method"])
+    except HTTPException:
+        return None
+    view = app.view_functions.get(endpoint)
+    return view if inspect.iscoroutinefunction(view) else None
+
+
+async def _dispatch_async(environ, view):
+    """
+    Run an async Flask view on the current event loop.
+
+    Mirrors Flask's full_dispatch_request, which would run the view through
+    asgiref on a thread of its own.
+    """
+    ctx = app.request_context(environ)
+    ctx.push()
+    try:
+        try:
+            # Parsing an upload reads and writes files, keep it off the loop
+            await asyncio.to_thread(lambda: ctx.request.files)
+            rv = app.preprocess_request()
+            if rv is None:
+                rv = await view(**ctx.request.view_args)
+        except Exception as e:
+            rv = app.handle_user_exception(e)
+        return app.finalize_request(rv)
+    except Exception as e:
+        return app.handle_exception(e)
+    finally:
+        ctx.pop()
+
+
+class _Request(WsgiToAsgiInstance):
+    """One HTTP request, dispatched natively or through the WSGI app."""
+
+    async def __call__(self, scope, receive, send):
+        view = _async_view(scope)
+        if view is None:
+            # gunicorn's asgi worker drops a keep-alive request that arrives
+            # before the app returns, so the part of the response that lets
+            # the client send its next request (the last chunk, or all of a
+            # response with a Content-Length) is sent from here, right before
+            # returning, rather than from the WSGI thread
+            held = []
+            sized = False
+
+            async def send_late(message):
+                nonlocal sized
+                if message["type"] == "http.response.start":
+                    sized = any(name == b"content-length" for name, _ in message["headers"])
+                elif message["type"] == "http.response.body" and (sized or not message.get("more_body")):
+                    held.append(message.get("body", b""))
+                    return
+                await send(message)
+
+            await super().__call__(scope, receive, send_late)
+            await send({"type": "http.response.body", "body": b"".join(held)})
+            return
+
+        self.scope = scope
+        with SpooledTemporaryFile(max_size=65536) as body:
+            while True:
+                message = await receive()
+                if message["type"] != "http.request":
+                    return
+                body.write(message.get("body", b""))
+                if not message.get("more_body"):
+                    break
+            body.seek(0)
+            response = await _dispatch_async(self.build_environ(scope, body), view)
+
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [(name.lower().encode("latin1"), value.encode("latin1"))
+                            for name, value in response.headers.to_wsgi_list()]
+            })
+            await send({"type": "http.response.body", "body": response.get_data()})
+        finally:
+            response.close()
+
+    async def run_wsgi_app(self, body):
+        # asgiref runs every WSGI request on one shared thread by default
+        run = WsgiToAsgiInstance.run_wsgi_app.__wrapped__
+        await sync_to_async(run, thread_sensitive=False, executor=sync_executor)(self, body)
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    await _Request(app)(scope, receive, send)
@@ -0,0 +1,254 @@
+"""
+Local stand-ins for the model backends and translation services.
+
+One HTTP server answers the Ollama API (`/api/tags`, `/api/ps`,
+`/api/generate`, `/api/embed`), the OpenAI chat completions API (`/v1/chat/completions`)
+and the endpoints deep_translator's Google and MyMemory providers call
+(`/google/m`, `/mymemory/get`). Latency, streaming speed and failures are
+configurable so the app can be benchmarked without any real backend.
+"""
+import json
+import time
+import zlib
+import random
+import logging
+import threading
+from html import escape
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger(__name__)
+
+OCR_TEXT = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit. "
+    "Sed do eiusmod tempor incididunt ut labore et dolore magna aliqua."
+)
+
+
+@dataclass
+class MockSettings:
+    """Behavior of the mock backends."""
+    latency: float = 0.2            # Seconds before a non-streamed answer
+    jitter: float = 0.05            # Uniform random extra latency, in seconds
+    token_delay: float = 0.01       # Seconds between streamed tokens
+    failure_rate: float = 0.0       # Fraction of model requests answered with 503
+    translator_latency: float = 0.05  # Seconds before a Google/MyMemory answer
+
+
+def _translate(text: str, target: str) -> str:
+    return f"[{target}] {text}"
+
+
+def _embedding(text: str, dimensions: int = 64) -> list:
+    # Hashed bag of words, so texts sharing words get similar vectors
+    vector = [0.0] * dimensions
+    for word in text.lower().split():
+        vector[zlib.crc32(word.encode("utf-8")) % dimensions] += 1.0
+    return vector
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    settings: MockSettings = MockSettings()
+    counters: Dict[str, int] = {}
+    counters_lock = threading.Lock()
+    # Models "in memory", by name, with the time Ollama would unload them
+    loaded_models: Dict[str, float] = {}
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _count(self, name: str) -> None:
+        with self.counters_lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def _sleep(self, seconds: float) -> None:
+        time.sleep(max(0.0, seconds + random.uniform(0, self.settings.jitter)))
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, data, status: int = 200) -> None:
+        self._send(status, json.dumps(data).encode("utf-8"))
+
+    def _start_stream(self, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _load(self, payload: dict) -> None:
+        keep_alive = payload.get("keep_alive", 300)
+        seconds = keep_alive if isinstance(keep_alive, (int, float)) else 300
+        with self.counters_lock:
+            self.loaded_models[payload.get("model", "")] = time.time() + (seconds if seconds >= 0 else 86400)
+
+    def _failed(self) -> bool:
+        if random.random() < self.settings.failure_rate:
+            self._count("injected_failures")
+            self._send_json({"error": "injected failure"}, status=503)
+            return True
+        return False
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/api/tags":
+            self._count("tags")
+            self._send_json({"models": [{"name": "llava:latest"}, {"name": "mistral:latest"}]})
+        elif url.path == "/api/ps":
+            now = time.time()
+            with self.counters_lock:
+                loaded = [(name, expires) for name, expires in self.loaded_models.items() if expires > now]
+            self._send_json({"models": [
+                {"name": name, "model": name, "size_vram": 0,
+                 "expires_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(expires))}
+                for name, expires in loaded
+            ]})
+        elif url.path == "/google/m":
+            self._count("google")
+            time.sleep(self.settings.translator_latency)
+            text = escape(_translate(params.get("q", ""), params.get("tl", "en")))
+            self._send(200, f'<html><body><div class="result-container">{text}</div></body></html>'.encode("utf-8"),
+                       "text/html; charset=utf-8")
+        elif url.path == "/mymemory/get":
+            self._count("mymemory")
+            time.sleep(self.settings.translator_latency)
+            target = params.get("langpair", "auto|en").split("|")[-1]
+            self._send_json({"responseData": {"translatedText": _translate(params.get("q", ""), target)}, "matches": []})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        payload = self._read_json()
+
+        if path == "/api/generate":
+            self._count("generate")
+            if not self._failed():
+                self._ollama_generate(payload)
+        elif path == "/api/embed":
+            self._count("embed")
+            if not self._failed():
+                self._sleep(self.settings.latency / 10)
+                self._load(payload)
+                inputs = payload.get("input", [])
+                inputs = [inputs] if isinstance(inputs, str) else inputs
+                self._send_json({"model": payload.get("model"), "embeddings": [_embedding(text) for text in inputs]})
+        elif path in ("/v1/chat/completions", "/chat/completions"):
+            self._count("chat_completions")
+            if not self._failed():
+                self._openai_chat(payload)
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def _answer(self, payload: dict, prompt: str) -> str:
+        if payload.get("images"):
+            return OCR_TEXT
+        # Skip any translation memory examples before the text itself
+        text = prompt.rsplit("Translate the following text to ", 1)[-1].split(":\n\n", 1)[-1]
+        text = text.rsplit("\n\nTranslation:", 1)[0]
+        return _translate(text, "xx")
+
+    def _ollama_generate(self, payload: dict) -> None:
+        self._load(payload)
+        if not payload.get("prompt") and not payload.get("images"):
+            # Load request
+            self._send_json({"model": payload.get("model"), "response": "", "done": True, "done_reason": "load"})
+            return
+        answer = self._answer(payload, payload.get("prompt", ""))
+        if not payload.get("stream", True):
+            self._sleep(self.settings.latency)
+            self._send_json({"model": payload.get("model"), "response": answer, "done": True})
+            return
+
+        self._sleep(self.settings.latency / 2)
+        self._start_stream("application/x-ndjson")
+        for token in answer.split(" "):
+            time.sleep(self.settings.token_delay)
+            self._write_chunk(json.dumps({"response": token + " ", "done": False}).encode("utf-8") + b"\n")
+        self._write_chunk(json.dumps({"response": "", "done": True}).encode("utf-8") + b"\n")
+        self._end_stream()
+
+    def _openai_chat(self, payload: dict) -> None:
+        content = payload.get("messages", [{}])[-1].get("content", "")
+        if isinstance(content, list):
+            answer = OCR_TEXT
+        else:
+            answer = _translate(content, "xx")
+
+        if not payload.get("stream"):
+            self._sleep(self.settings.latency)
+            self._send_json({"choices": [{"message": {"role": "assistant", "content": answer}}]})
+            return
+
+        self._sleep(self.settings.latency / 2)
+        self._start_stream("text/event-stream")
+        for token in answer.split(" "):
+            time.sleep(self.settings.token_delay)
+            event = {"choices": [{"delta": {"content": token + " "}}]}
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._end_stream()
+
+
+class MockServer:
+    """Runs MockHandler on a local port in a background thread."""
+
+    def __init__(self, settings: Optional[MockSettings] = None, host: str = "127.0.0.1", port: int = 0):
+        handler = type("BoundMockHandler", (MockHandler,), {
+            "settings": settings or MockSettings(),
+            "counters": {},
+            "counters_lock": threading.Lock(),
+            "loaded_models": {}
+        })
+        self.handler = handler
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, name="mock-server", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockServer":
+        self._thread.start()
+        logger.info(f"Mock model server listening on {self.url}")
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def counters(self) -> Dict[str, int]:
+        with self.handler.counters_lock:
+            return dict(self.handler.counters)
+
+    def app_environment(self) -> Dict[str, str]:
+        """Environment variables pointing the app at this server."""
+        return {
+            "OLLAMA_BASE_URL": self.url,
+            "OPENAI_BASE_URL": f"{self.url}/v1",
+            "OPENAI_API_KEY": "benchmark",
+            "BENCHMARK_TRANSLATOR_URL": self.url
+        }
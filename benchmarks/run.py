@@ -0,0 +1,363 @@
+"""
+Offline benchmark of the OCR and translation endpoints.
+
+Starts a mock model server (see mock_servers.py), then for every scenario
+a fresh app process pointed at it, drives the scenario's endpoint at the
+requested concurrency and writes throughput, latency percentiles and the
+app's peak RSS to a JSON report. Run from the repository root:
+
+    python -m benchmarks.run --concurrency 16 --requests 200 --output report.json
+
+Reports of different commits are comparable as long as the mock settings
+and load parameters are the same.
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import signal
+import socket
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, Any
+
+import requests
+from PIL import Image, ImageDraw
+
+from benchmarks.mock_servers import MockServer, MockSettings, OCR_TEXT
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SHORT_TEXT = "The quick brown fox jumps over the lazy dog."
+LONG_TEXT = " ".join([OCR_TEXT] * 60)
+
+
+@dataclass
+class Scenario:
+    """One endpoint exercised with one kind of payload."""
+    name: str
+    method: str
+    path: str
+    build: Callable[["Fixtures"], Dict[str, Any]]  # Returns keyword arguments for requests
+    stream: bool = False
+    requires: Optional[str] = None  # Executable without which the scenario is skipped
+
+
+class Fixtures:
+    """Generated documents shared by all scenarios."""
+
+    def __init__(self, pdf_pages: int = 3):
+        self.image = self._render_page(0)
+        self.pdf = self._render_pdf(pdf_pages)
+
+    @staticmethod
+    def _page(index: int, size=(1240, 1754)) -> Image.Image:
+        page = Image.new("RGB", size, "white")
+        draw = ImageDraw.Draw(page)
+        for line in range(40):
+            draw.text((80, 80 + line * 40), f"Page {index + 1}, line {line + 1}: {OCR_TEXT[:70]}", fill="black")
+        return page
+
+    def _render_page(self, index: int) -> bytes:
+        buffer = io.BytesIO()
+        self._page(index).save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def _render_pdf(self, pages: int) -> bytes:
+        images = [self._page(index) for index in range(pages)]
+        buffer = io.BytesIO()
+        images[0].save(buffer, format="PDF", save_all=True, append_images=images[1:], resolution=150)
+        return buffer.getvalue()
+
+
+def _json(body: Dict[str, Any]) -> Callable[[Fixtures], Dict[str, Any]]:
+    return lambda fixtures: {"json": body}
+
+
+SCENARIOS = [
+    Scenario("translate_short", "POST", "/api/translate",
+             _json({"text": SHORT_TEXT, "target_language": "fr", "provider": "ollama"})),
+    Scenario("translate_long", "POST", "/api/translate",
+             _json({"text": LONG_TEXT, "target_language": "fr", "provider": "ollama"})),
+    Scenario("translate_openai", "POST", "/api/translate",
+             _json({"text": SHORT_TEXT, "target_language": "fr", "provider": "openai"})),
+    Scenario("translate_google", "POST", "/api/translate",
+             _json({"text": SHORT_TEXT, "target_language": "fr", "provider": "google"})),
+    Scenario("translate_stream", "POST", "/api/translate/stream",
+             _json({"text": SHORT_TEXT, "target_language": "fr", "provider": "ollama"}), stream=True),
+    Scenario("async_translate", "POST", "/api/async/translate",
+             _json({"text": SHORT_TEXT, "target_language": "fr", "provider": "ollama"})),
+    Scenario("ocr_image", "POST", "/api/ocr",
+             lambda fixtures: {"files": {"file": ("page.png", fixtures.image, "image/png")}}),
+    Scenario("async_ocr", "POST", "/api/async/ocr",
+             lambda fixtures: {"files": {"file": ("page.png", fixtures.image, "image/png")}}),
+    Scenario("ocr_pdf", "POST", "/api/ocr",
+             lambda fixtures: {"files": {"file": ("document.pdf", fixtures.pdf, "application/pdf")}},
+             requires="pdftoppm"),
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _rss_peak_kb(pid: int) -> int:
+    """Peak resident set size of a process and its children, in KB (Linux only)."""
+    total = 0
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    for process in pids:
+        try:
+            with open(f"/proc/{process}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        total += int(line.split()[1])
+        except OSError:
+            continue
+    return total
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class AppProcess:
+    """The app under test, served by werkzeug or gunicorn in a subprocess."""
+
+    def __init__(self, env: Dict[str, str], log_path: str, server: str = "werkzeug",
+                 workers: int = 2, threads: int = 8):
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        if server == "gunicorn":
+            command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+                       "--bind", f"127.0.0.1:{self.port}", "--workers", str(workers),
+                       "--threads", str(threads), "--worker-class", "gthread",
+                       "benchmarks.serve_app:app"]
+        elif server == "gunicorn-asgi":
+            # Threads only serve the sync views here
+            env = {**env, "GUNICORN_WORKER_CLASS": "asgi", "GUNICORN_THREADS": str(threads)}
+            command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+                       "--bind", f"127.0.0.1:{self.port}", "--workers", str(workers),
+                       "benchmarks.serve_app:application"]
+        else:
+            command = [sys.executable, "-m", "benchmarks.serve_app", "--port", str(self.port)]
+        # Logs go to a file: a pipe nobody reads would block the app once full
+        self.log_path = log_path
+        with open(log_path, "wb") as log:
+            self.process = subprocess.Popen(command, cwd=REPO_ROOT, env=env,
+                                            stdout=log, stderr=subprocess.STDOUT)
+
+    def wait_ready(self, timeout: float = 30.0) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                with open(self.log_path, errors="replace") as log:
+                    raise Exception(f"App exited during startup: {log.read()[-2000:]}")
+            try:
+                requests.get(f"{self.url}/api/providers", timeout=1)
+                return
+            except requests.RequestException:
+                time.sleep(0.2)
+        raise Exception(f"App did not start within {timeout}s")
+
+    def peak_rss_mb(self) -> float:
+        return round(_rss_peak_kb(self.process.pid) / 1024, 1)
+
+    def stop(self) -> None:
+        self.process.send_signal(signal.SIGTERM)
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+def _send(session: requests.Session, url: str, scenario: Scenario, kwargs: Dict[str, Any]) -> Tuple[float, bool]:
+    start = time.perf_counter()
+    try:
+        response = session.request(scenario.method, url, stream=scenario.stream, timeout=300, **kwargs)
+        if scenario.stream:
+            # SSE errors arrive with status 200, as an error event
+            body = b"".join(response.iter_content(chunk_size=None))
+            ok = response.status_code == 200 and b"event: error" not in body
+        else:
+            response.content
+            ok = response.status_code == 200
+    except requests.RequestException:
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def run_scenario(scenario: Scenario, app: AppProcess, fixtures: Fixtures,
+                 concurrency: int, total: int, warmup: int) -> Dict[str, Any]:
+    """Send `total` requests with `concurrency` in flight and summarize them."""
+    url = f"{app.url}{scenario.path}"
+    sessions = {}
+
+    def call(_):
+        # One keep-alive session per load thread
+        session = sessions.setdefault(threading.get_ident(), requests.Session())
+        return _send(session, url, scenario, scenario.build(fixtures))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, range(warmup)))
+        start = time.perf_counter()
+        results = list(executor.map(call, range(total)))
+        elapsed = time.perf_counter() - start
+
+    for session in sessions.values():
+        session.close()
+
+    latencies = [latency for latency, ok in results if ok]
+    errors = sum(1 for _, ok in results if not ok)
+    return {
+        "requests": total,
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            name: None if value is None else round(value * 1000, 1)
+            for name, value in (
+                ("p50", _percentile(latencies, 0.50)),
+                ("p95", _percentile(latencies, 0.95)),
+                ("p99", _percentile(latencies, 0.99)),
+                ("mean", sum(latencies) / len(latencies) if latencies else None),
+                ("max", max(latencies) if latencies else None),
+            )
+        },
+        "peak_rss_mb": app.peak_rss_mb()
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _app_environment(mock: MockServer, workdir: str, cache: bool) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update(mock.app_environment())
+    env.update({
+        "PYTHONPATH": REPO_ROOT,
+        "CACHE_DB_PATH": os.path.join(workdir, "cache.sqlite3"),
+        "OCR_JOBS_DIR": os.path.join(workdir, "jobs"),
+        "PROMETHEUS_MULTIPROC_DIR": os.path.join(workdir, "metrics"),
+        "TRANSLATION_CACHE_ENABLED": "true" if cache else "false",
+        "TRANSLATION_MEMORY_ENABLED": "true" if cache else "false",
+        "TRANSLATION_MEMORY_DIR": os.path.join(workdir, "translation_memory"),
+        "OCR_CACHE_ENABLED": "true" if cache else "false"
+    })
+    os.makedirs(env["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+    return env
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the app against local mock model servers")
+    parser.add_argument("--scenarios", default=",".join(s.name for s in SCENARIOS),
+                        help="Comma-separated scenario names")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+    parser.add_argument("--requests", type=int, default=100, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests sent first")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Random extra mock latency in seconds")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="Seconds between streamed tokens")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of model calls failing with 503")
+    parser.add_argument("--translator-latency", type=float, default=0.05, help="Google/MyMemory stub latency")
+    parser.add_argument("--pdf-pages", type=int, default=3, help="Pages of the generated PDF")
+    parser.add_argument("--server", choices=("werkzeug", "gunicorn", "gunicorn-asgi"), default="werkzeug")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--threads", type=int, default=8, help="Threads per gunicorn worker")
+    parser.add_argument("--cache", action="store_true", help="Keep the translation and OCR caches enabled")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    by_name = {scenario.name: scenario for scenario in SCENARIOS}
+    unknown = [name for name in args.scenarios.split(",") if name not in by_name]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}")
+
+    settings = MockSettings(
+        latency=args.latency,
+        jitter=args.jitter,
+        token_delay=args.token_delay,
+        failure_rate=args.failure_rate,
+        translator_latency=args.translator_latency
+    )
+    mock = MockServer(settings).start()
+    fixtures = Fixtures(pdf_pages=args.pdf_pages)
+
+    report = {
+        "commit": _git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "mock": asdict(settings),
+        "scenarios": {}
+    }
+
+    try:
+        for name in args.scenarios.split(","):
+            scenario = by_name[name]
+            if scenario.requires and shutil.which(scenario.requires) is None:
+                logger.info(f"{name}: skipped, '{scenario.requires}' not found")
+                report["scenarios"][name] = {"skipped": f"{scenario.requires} not found"}
+                continue
+
+            # A fresh process per scenario, so RSS peaks and warm state don't carry over
+            with tempfile.TemporaryDirectory(prefix="rag_bench_") as workdir:
+                app = AppProcess(_app_environment(mock, workdir, args.cache), os.path.join(workdir, "app.log"),
+                                 args.server, args.workers, args.threads)
+                try:
+                    app.wait_ready()
+                    before = mock.counters()
+                    result = run_scenario(scenario, app, fixtures, args.concurrency, args.requests, args.warmup)
+                    after = mock.counters()
+                    result["backend_calls"] = {key: after[key] - before.get(key, 0)
+                                               for key in after if after[key] != before.get(key, 0)}
+                finally:
+                    app.stop()
+
+            report["scenarios"][name] = result
+            logger.info(f"{name}: {result['throughput_rps']} req/s, p50 {result['latency_ms']['p50']} ms, "
+                        f"p99 {result['latency_ms']['p99']} ms, {result['errors']} errors, "
+                        f"peak RSS {result['peak_rss_mb']} MB")
+    finally:
+        mock.stop()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        logger.info(f"Report written to {args.output}")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
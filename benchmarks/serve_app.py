@@ -0,0 +1,35 @@
+"""
+Entry point serving the app against the benchmark mock servers.
+
+deep_translator reads its endpoints from a module-level dict when a
+translator is created, so they are redirected to the mock server given in
+BENCHMARK_TRANSLATOR_URL before the app is imported.
+
+    python -m benchmarks.serve_app --port 5100
+    gunicorn -c gunicorn.conf.py benchmarks.serve_app:app
+    GUNICORN_WORKER_CLASS=asgi gunicorn -c gunicorn.conf.py benchmarks.serve_app:application
+"""
+import os
+import logging
+import argparse
+
+from deep_translator.constants import BASE_URLS
+
+translator_url = os.environ.get("BENCHMARK_TRANSLATOR_URL")
+if translator_url:
+    BASE_URLS["GOOGLE_TRANSLATE"] = f"{translator_url}/google/m"
+    BASE_URLS["MYMEMORY"] = f"{translator_url}/mymemory/get"
+
+from app import app  # noqa: E402
+from asgi import application  # noqa: E402
+
+# The app logs every request at DEBUG, which would dominate the measurements
+logging.getLogger().setLevel(os.environ.get("BENCHMARK_LOG_LEVEL", "WARNING"))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve the app for benchmarking")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5100)
+    args = parser.parse_args()
+
+    app.run(host=args.host, port=args.port, threaded=True, debug=False, use_reloader=False)
@@ -0,0 +1,28 @@
+import os
+import shutil
+import tempfile
+
+workers = int(os.environ.get("GUNICORN_WORKERS", "4"))
+# "asgi" serves asgi:application, whose async views wait on the model
+# without holding a thread; its sync views get GUNICORN_THREADS threads.
+# "gthread" serves main:app with GUNICORN_THREADS threads for all views.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+if worker_class == "gthread":
+    threads = int(os.environ.get("GUNICORN_THREADS", "64"))
+
+# Metrics of all workers are aggregated through files in this directory.
+# It is set here, in the master, so every forked worker inherits it.
+metrics_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "rag_translator_metrics")
+)
+
+
+def on_starting(server):
+    # Samples left over from a previous run would be added to the new ones
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
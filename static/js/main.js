@@ -83,7 +83,8 @@ document.addEventListener('DOMContentLoaded', function() {
         extractedTextArea.value = '';
         hideAlert(ocrAlert);
         
-        fetch('/api/ocr', {
+        // OCR runs as a background job; poll it for progress and the result
+        fetch('/api/ocr/jobs', {
             method: 'POST',
             body: formData
         })
@@ -95,8 +96,9 @@ document.addEventListener('DOMContentLoaded', function() {
             }
             return response.json();
         })
-        .then(data => {
-            extractedTextArea.value = data.text;
+        .then(job => pollOcrJob(job.job_id))
+        .then(job => {
+            extractedTextArea.value = job.text;
             showAlert(ocrAlert, 'Text extracted successfully!', 'success');
         })
         .catch(error => {
@@ -108,7 +110,32 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Poll an OCR job until it finishes, showing page progress meanwhile
+    function pollOcrJob(jobId) {
+        return fetch(`/api/ocr/jobs/${jobId}`)
+        .then(response => response.json())
+        .then(job => {
+            if (job.status === 'completed') {
+                return job;
+            }
+            if (job.status === 'failed' || job.status === 'cancelled' || job.error) {
+                throw new Error(job.error || `OCR job ${job.status}`);
+            }
+            
+            const progress = job.progress || {};
+            if (progress.pages_total > 1) {
+                showAlert(ocrAlert, `Processing page ${progress.pages_done} of ${progress.pages_total}...`, 'info');
+            }
+            return new Promise(resolve => setTimeout(resolve, 1000)).then(() => pollOcrJob(jobId));
+        });
+    }
+    
     // Handle text translation
+    // The result is streamed from /api/translate/stream as server-sent
+    // events and rendered as it arrives. Starting a new translation aborts
+    // the previous one, which also stops the generation on the server.
+    let translationController = null;
+    
     function handleTranslation(e) {
         e.preventDefault();
         
@@ -121,12 +148,18 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
         
+        if (translationController) {
+            translationController.abort();
+        }
+        const controller = new AbortController();
+        translationController = controller;
+        
         // Show loading spinner
         translateSpinner.classList.remove('d-none');
         translatedTextArea.value = '';
         hideAlert(translateAlert);
         
-        fetch('/api/translate', {
+        fetch('/api/translate/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -135,7 +168,8 @@ document.addEventListener('DOMContentLoaded', function() {
                 text: text,
                 target_language: targetLanguage,
                 provider: provider
-            })
+            }),
+            signal: controller.signal
         })
         .then(response => {
             if (!response.ok) {
@@ -143,21 +177,78 @@ document.addEventListener('DOMContentLoaded', function() {
                     throw new Error(data.error || 'Translation failed');
                 });
             }
-            return response.json();
+            return readEventStream(response, (event, data) => {
+                if (event === 'error') {
+                    throw new Error(data.error || 'Translation failed');
+                }
+                if (event === 'done') {
+                    translatedTextArea.value = data.translated_text;
+                } else if (data.delta) {
+                    translatedTextArea.value += data.delta;
+                }
+            });
         })
-        .then(data => {
-            translatedTextArea.value = data.translated_text;
+        .then(() => {
             showAlert(translateAlert, 'Text translated successfully!', 'success');
         })
         .catch(error => {
+            if (error.name === 'AbortError') {
+                return;
+            }
             console.error('Error:', error);
             showAlert(translateAlert, error.message, 'danger');
         })
         .finally(() => {
-            translateSpinner.classList.add('d-none');
+            if (translationController === controller) {
+                translationController = null;
+                translateSpinner.classList.add('d-none');
+            }
         });
     }
     
+    // Read a server-sent event stream from a fetch response, calling
+    // onEvent(eventName, parsedData) for every event
+    function readEventStream(response, onEvent) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        function dispatch(block) {
+            let event = 'message';
+            const dataLines = [];
+            block.split('\n').forEach(line => {
+                if (line.startsWith('event:')) {
+                    event = line.slice(6).trim();
+                } else if (line.startsWith('data:')) {
+                    dataLines.push(line.slice(5).trim());
+                }
+            });
+            if (dataLines.length) {
+                onEvent(event, JSON.parse(dataLines.join('\n')));
+            }
+        }
+        
+        function read() {
+            return reader.read().then(({ done, value }) => {
+                buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    dispatch(buffer.slice(0, boundary));
+                    buffer = buffer.slice(boundary + 2);
+                }
+                if (done) {
+                    if (buffer.trim()) {
+                        dispatch(buffer);
+                    }
+                    return;
+                }
+                return read();
+            });
+        }
+        
+        return read();
+    }
+    
     // Fetch supported languages
     function fetchLanguages(provider = '') {
         let url = '/api/languages';
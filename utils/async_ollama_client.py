@@ -0,0 +1,380 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, List, Tuple, Coroutine
+import httpx
+from utils.health import CircuitBreaker
+from utils.image_profiles import image_profile
+from utils.ollama_client import OllamaClient, ImageInput, OPENAI_VISION_MODEL, encode_image, truncated
+from utils.metrics import MODEL_REQUEST_SECONDS, MODEL_REQUEST_BYTES, record_fallback
+from utils.retry import DeadlineExceeded, current_deadline
+
+logger = logging.getLogger(__name__)
+
+# Connection limits of the shared async HTTP client. Unlike the sync
+# sessions these bound in-flight requests for the whole process, not per thread.
+ASYNC_MAX_CONNECTIONS = int(os.environ.get("ASYNC_HTTP_MAX_CONNECTIONS", "200"))
+ASYNC_MAX_KEEPALIVE = int(os.environ.get("ASYNC_HTTP_MAX_KEEPALIVE", "50"))
+
+
+def _httpx_timeout(timeout: Tuple[float, float]) -> httpx.Timeout:
+    """Convert a requests-style (connect, read) timeout to an httpx timeout."""
+    connect, read = timeout
+    return httpx.Timeout(read, connect=connect)
+
+
+class BackgroundLoop:
+    """
+    An asyncio event loop running in a daemon thread.
+
+    Flask runs each async view in its own short-lived event loop, so
+    connections opened there can't be reused by the next request. Model
+    calls are submitted to this long-lived loop instead, where one pooled
+    client multiplexes every in-flight request of the process. The loop is
+    started lazily and again after a fork, since threads don't survive it.
+    """
+
+    def __init__(self, name: str = "async-io"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pid: Optional[int] = None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name=self.name, daemon=True)
+                thread.start()
+                self._loop = loop
+                self._pid = os.getpid()
+                logger.info(f"Started background event loop '{self.name}'")
+            return self._loop
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule a coroutine on the loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    async def run(self, coro: Coroutine) -> Any:
+        """Run a coroutine on the loop and await its result from another loop."""
+        return await asyncio.wrap_future(self.submit(coro))
+
+
+class AsyncOllamaClient:
+    """
+    Asyncio counterpart of OllamaClient for OCR and translation.
+
+    Configuration, health tracking and circuit breakers are shared with the
+    wrapped sync client, so changes made through /api/config/ollama and
+    failures seen on either path apply to both. All coroutines must run on
+    the same event loop, normally a BackgroundLoop.
+
+    Requests only get the time left before the current deadline (see
+    `utils.retry.deadline_scope`), and fallbacks are skipped once it has
+    passed.
+    """
+
+    def __init__(self, client: OllamaClient):
+        """
+        Initialize the async client.
+
+        Args:
+            client: Sync client whose configuration and health state are used
+        """
+        self.client = client
+        self.limits = httpx.Limits(
+            max_connections=ASYNC_MAX_CONNECTIONS,
+            max_keepalive_connections=ASYNC_MAX_KEEPALIVE
+        )
+        self._http: Optional[httpx.AsyncClient] = None
+        self._http_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._probe_lock: Optional[asyncio.Lock] = None
+
+    def _http_client(self) -> httpx.AsyncClient:
+        # httpx clients are bound to the loop they were first used on
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http_loop is not loop:
+            self._http = httpx.AsyncClient(limits=self.limits)
+            self._http_loop = loop
+            self._probe_lock = asyncio.Lock()
+        return self._http
+
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def _probe_ollama(self) -> bool:
+        """
+        Actively probe the Ollama API, within the current request deadline.
+
+        Raises:
+            DeadlineExceeded: If the deadline passed before or during the
+                probe, which then says nothing about Ollama's health
+        """
+        deadline = current_deadline()
+        timeout = self.client.probe_timeout
+        if deadline is not None:
+            timeout = deadline.cap(timeout, "Ollama health probe")
+        try:
+            response = await self._http_client().get(
+                f"{self.client.ollama_base_url}/api/tags",
+                timeout=_httpx_timeout(timeout)
+            )
+            return response.status_code == 200
+        except httpx.HTTPError as e:
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded(f"Deadline of {deadline.seconds:g}s exceeded during Ollama health probe") from e
+            logger.warning(f"Ollama API is not available: {e}")
+            return False
+
+    async def _check_ollama_availability(self) -> bool:
+        """Check if Ollama API is available, using the shared cached health state."""
+        health = self.client.ollama_health
+        if not health.breaker.allow_request():
+            return False
+
+        half_open = health.breaker.state == CircuitBreaker.HALF_OPEN
+        if not half_open:
+            cached = health.cached_result()
+            if cached is not None:
+                return cached
+
+        self._http_client()
+        async with self._probe_lock:
+            # Another coroutine may have probed while this one waited
+            if not half_open:
+                cached = health.cached_result()
+                if cached is not None:
+                    return cached
+            return health.record_probe(await self._probe_ollama())
+
+    async def _post(self, url: str, breaker: CircuitBreaker, timeout: Tuple[float, float],
+                    operation: str, **kwargs) -> httpx.Response:
+        """
+        POST to a backend, giving it only the time left before the current deadline.
+
+        Latency and request size are recorded; connection errors and
+        timeouts feed the breaker unless the deadline cut the call short.
+
+        Raises:
+            DeadlineExceeded: If the deadline has already passed
+        """
+        deadline = current_deadline()
+        if deadline is not None:
+            timeout = deadline.cap(timeout, url)
+        start = time.perf_counter()
+        try:
+            response = await self._http_client().post(url, timeout=_httpx_timeout(timeout), **kwargs)
+        except httpx.HTTPError:
+            MODEL_REQUEST_SECONDS.labels(breaker.name, operation, "error").observe(time.perf_counter() - start)
+            if deadline is None or not deadline.expired():
+                breaker.record_failure()
+            raise
+
+        outcome = "ok" if response.status_code == 200 else str(response.status_code)
+        MODEL_REQUEST_SECONDS.labels(breaker.name, operation, outcome).observe(time.perf_counter() - start)
+        MODEL_REQUEST_BYTES.labels(breaker.name, operation).observe(len(response.request.content))
+        return response
+
+    async def _post_ollama(self, payload: Dict[str, Any], operation: str) -> httpx.Response:
+        """POST to /api/generate, feeding the Ollama circuit breaker."""
+        breaker = self.client.ollama_health.breaker
+        response = await self._post(
+            f"{self.client.ollama_base_url}/api/generate",
+            breaker,
+            self.client.ollama_timeout,
+            operation,
+            json=payload
+        )
+
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    async def _post_openai(self, payload: Dict[str, Any], operation: str) -> httpx.Response:
+        """POST to /chat/completions, feeding the OpenAI circuit breaker."""
+        breaker = self.client.openai_breaker
+        response = await self._post(
+            f"{self.client.openai_base_url}/chat/completions",
+            breaker,
+            self.client.openai_timeout,
+            operation,
+            headers=self.client._openai_headers(),
+            json=payload
+        )
+
+        if response.status_code >= 500 or response.status_code == 429:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    async def process_image(self, image: ImageInput) -> str:
+        """
+        Process image with Ollama vision model for OCR.
+
+        Args:
+            image: Path to the image file, encoded image bytes or a PIL image
+
+        Returns:
+            Extracted text from the image
+        """
+        use_openai_fallback = self.client.use_openai_fallback
+
+        if not await self._check_ollama_availability():
+            if use_openai_fallback:
+                record_fallback("ocr", "ollama", "openai")
+                return await self._process_image_with_openai(image)
+            raise Exception("Ollama API is not available and no fallback configured")
+
+        # Encoding is CPU-bound, keep it off the event loop
+        encoded = await asyncio.to_thread(encode_image, image, self.client.ocr_profile())
+
+        try:
+            response = await self._post_ollama(self.client._ocr_payload(encoded[0]), "ocr")
+
+            if response.status_code != 200:
+                logger.error(f"Ollama API error: {response.status_code}, {response.text}")
+                if use_openai_fallback:
+                    record_fallback("ocr", "ollama", "openai")
+                    return await self._process_image_with_openai(image, encoded)
+                raise Exception(f"Failed to process image with Ollama: {response.text}")
+
+            result = response.json()
+            if truncated(result):
+                logger.warning(f"Ollama OCR stopped at its limit of {self.client.ocr_max_tokens} tokens and may be incomplete")
+            return result.get("response", "").strip()
+
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Error processing image with Ollama: {e}")
+            if use_openai_fallback:
+                record_fallback("ocr", "ollama", "openai")
+                return await self._process_image_with_openai(image, encoded)
+            raise
+
+    async def _process_image_with_openai(self, image: ImageInput, encoded: Optional[Tuple[str, str]] = None) -> str:
+        """
+        Process image using OpenAI's Vision API as fallback.
+
+        Args:
+            image: Path to the image file, encoded image bytes or a PIL image
+            encoded: Already base64-encoded image and its MIME type, if available
+
+        Returns:
+            Extracted text from the image
+        """
+        if not self.client.openai_api_key:
+            raise Exception("OpenAI API key not provided for fallback")
+
+        if not self.client.openai_breaker.allow_request():
+            raise Exception("OpenAI API circuit is open, skipping request")
+
+        try:
+            base64_image, mime_type = encoded or await asyncio.to_thread(encode_image, image, image_profile(OPENAI_VISION_MODEL))
+            response = await self._post_openai(self.client._openai_ocr_payload(base64_image, mime_type), "ocr")
+
+            if response.status_code != 200:
+                logger.error(f"OpenAI API error: {response.status_code}, {response.text}")
+                raise Exception(f"Failed to process image with OpenAI: {response.text}")
+
+            result = response.json()
+            if truncated(result):
+                logger.warning(f"OpenAI OCR stopped at its limit of {self.client.ocr_max_tokens} tokens and may be incomplete")
+            return result["choices"][0]["message"]["content"].strip()
+
+        except Exception as e:
+            logger.error(f"Error processing image with OpenAI: {e}")
+            raise
+
+    async def translate(self, text: str, target_language: str,
+                        examples: Optional[List[Tuple[str, str]]] = None, fallback: bool = True) -> str:
+        """
+        Translate text using Ollama model.
+
+        Args:
+            text: Text to translate
+            target_language: Target language code or name
+            examples: Earlier (source, translation) pairs shown to the model
+            fallback: Fall back to OpenAI if Ollama fails, as in
+                `OllamaClient.translate`
+
+        Returns:
+            Translated text
+        """
+        use_openai_fallback = self.client.use_openai_fallback and fallback
+
+        if not await self._check_ollama_availability():
+            if use_openai_fallback:
+                record_fallback("translation", "ollama", "openai")
+                return await self._translate_with_openai(text, target_language, examples)
+            raise Exception("Ollama API is not available" if not fallback else "Ollama API is not available and no fallback configured")
+
+        try:
+            payload = self.client._translation_payload(text, target_language, stream=False, examples=examples)
+            while payload is not None:
+                response = await self._post_ollama(payload, "translate")
+
+                if response.status_code != 200:
+                    logger.error(f"Ollama API error: {response.status_code}, {response.text}")
+                    if use_openai_fallback:
+                        record_fallback("translation", "ollama", "openai")
+                        return await self._translate_with_openai(text, target_language, examples)
+                    raise Exception(f"Failed to translate with Ollama: {response.text}")
+
+                result = response.json()
+                payload = self.client._retry_truncated(payload, result, "Ollama")
+            return result.get("response", "").strip()
+
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Error translating with Ollama: {e}")
+            if use_openai_fallback:
+                record_fallback("translation", "ollama", "openai")
+                return await self._translate_with_openai(text, target_language, examples)
+            raise
+
+    async def _translate_with_openai(self, text: str, target_language: str,
+                                     examples: Optional[List[Tuple[str, str]]] = None) -> str:
+        """
+        Translate text using OpenAI API as fallback.
+
+        Args:
+            text: Text to translate
+            target_language: Target language code or name
+            examples: Earlier (source, translation) pairs shown to the model
+
+        Returns:
+            Translated text
+        """
+        if not self.client.openai_api_key:
+            raise Exception("OpenAI API key not provided for fallback")
+
+        if not self.client.openai_breaker.allow_request():
+            raise Exception("OpenAI API circuit is open, skipping request")
+
+        try:
+            payload = self.client._openai_translation_payload(text, target_language, stream=False, examples=examples)
+            while payload is not None:
+                response = await self._post_openai(payload, "translate")
+
+                if response.status_code != 200:
+                    logger.error(f"OpenAI API error: {response.status_code}, {response.text}")
+                    raise Exception(f"Failed to translate with OpenAI: {response.text}")
+
+                result = response.json()
+                payload = self.client._retry_truncated(payload, result, "OpenAI")
+            return result["choices"][0]["message"]["content"].strip()
+
+        except Exception as e:
+            logger.error(f"Error translating with OpenAI: {e}")
+            raise
@@ -0,0 +1,333 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+from utils.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+# Shared cache database; every gunicorn worker opens the same file
+CACHE_DB_PATH = os.environ.get("CACHE_DB_PATH", os.path.join(tempfile.gettempdir(), "rag_translator_cache.sqlite3"))
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with an optional TTL."""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self.ttl is not None and time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteStore:
+    """
+    Key/value table in a SQLite database shared between processes.
+
+    Entries expire after `ttl` seconds. When `max_entries` or `max_bytes` is
+    exceeded, the least recently used entries are evicted. A generation
+    counter is bumped on purge so other processes can drop their in-memory
+    copies.
+    """
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, table: str, db_path: str = CACHE_DB_PATH, ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.table = table
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        self._create_tables()
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread (and per process, since gunicorn forks)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _create_tables(self) -> None:
+        conn = self._connect()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table} (accessed_at)")
+        conn.execute("CREATE TABLE IF NOT EXISTS cache_generations (name TEXT PRIMARY KEY, generation INTEGER NOT NULL)")
+
+    def get(self, key: str) -> Optional[bytes]:
+        conn = self._connect()
+        row = conn.execute(f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        now = time.time()
+        if self.ttl is not None and now - created_at > self.ttl:
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            return None
+        conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (key, value, len(value), now, now)
+        )
+        with self._writes_lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def prune(self) -> None:
+        """Drop expired entries and evict least recently used ones over the limits."""
+        conn = self._connect()
+        if self.ttl is not None:
+            conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (time.time() - self.ttl,))
+        if self.max_entries is not None:
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} "
+                "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+        if self.max_bytes is not None:
+            total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+            if total > self.max_bytes:
+                rows = conn.execute(f"SELECT key, size FROM {self.table} ORDER BY accessed_at").fetchall()
+                evict = []
+                for key, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    evict.append((key,))
+                    total -= size
+                conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", evict)
+                logger.info(f"Evicted {len(evict)} entries from {self.table}")
+
+    def clear(self) -> None:
+        conn = self._connect()
+        conn.execute(f"DELETE FROM {self.table}")
+        conn.execute(
+            "INSERT INTO cache_generations (name, generation) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET generation = generation + 1",
+            (self.table,)
+        )
+
+    def generation(self) -> int:
+        row = self._connect().execute("SELECT generation FROM cache_generations WHERE name = ?", (self.table,)).fetchone()
+        return row[0] if row else 0
+
+    def stats(self) -> Dict[str, Any]:
+        count, size = self._connect().execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+        return {"entries": count, "bytes": size}
+
+
+class TieredCache:
+    """
+    Two-tier cache: an in-process LRU in front of a shared SQLite store.
+
+    Values are JSON-serializable. Hits from the disk tier are promoted to
+    memory. A purge in any process clears the memory tier of the others
+    within `GENERATION_CHECK_INTERVAL` seconds.
+    """
+
+    GENERATION_CHECK_INTERVAL = 1.0
+
+    def __init__(self, name: str, memory_entries: int, ttl: Optional[float],
+                 disk_entries: Optional[int] = None, disk_bytes: Optional[int] = None,
+                 db_path: str = CACHE_DB_PATH):
+        self.name = name
+        self.memory = LRUCache(memory_entries, ttl)
+        self.disk = None
+        try:
+            self.disk = SQLiteStore(name, db_path, ttl, disk_entries, disk_bytes)
+        except sqlite3.Error as e:
+            logger.warning(f"Disk tier for cache '{name}' unavailable, using memory only: {e}")
+
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+        self._generation = self._disk_call(lambda disk: disk.generation(), 0)
+        self._generation_checked = time.monotonic()
+
+    def _disk_call(self, fn, default=None):
+        if self.disk is None:
+            return default
+        try:
+            return fn(self.disk)
+        except sqlite3.Error as e:
+            logger.warning(f"Cache '{self.name}' disk tier error: {e}")
+            return default
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+        if counter != "writes":
+            CACHE_LOOKUPS.labels(self.name, counter).inc()
+
+    def _sync_generation(self) -> None:
+        now = time.monotonic()
+        if now - self._generation_checked < self.GENERATION_CHECK_INTERVAL:
+            return
+        self._generation_checked = now
+        generation = self._disk_call(lambda disk: disk.generation(), self._generation)
+        if generation != self._generation:
+            self._generation = generation
+            self.memory.clear()
+
+    def get(self, key: str) -> Optional[Any]:
+        self._sync_generation()
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return value
+
+        raw = self._disk_call(lambda disk: disk.get(key))
+        if raw is not None:
+            value = json.loads(raw)
+            self.memory.set(key, value)
+            self._count("disk_hits")
+            return value
+
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        raw = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        self._disk_call(lambda disk: disk.set(key, raw))
+        self._count("writes")
+
+    def purge(self) -> None:
+        self.memory.clear()
+        self._disk_call(lambda disk: disk.clear())
+        self._generation = self._disk_call(lambda disk: disk.generation(), self._generation)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["memory_hits"] + counters["disk_hits"] + counters["misses"]
+        counters["hit_rate"] = round((counters["memory_hits"] + counters["disk_hits"]) / lookups, 3) if lookups else None
+        counters["memory_entries"] = len(self.memory)
+        counters["disk"] = self._disk_call(lambda disk: disk.stats())
+        return counters
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache keys without changing its layout."""
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n")
+    return "\n".join(line.rstrip() for line in text.split("\n")).strip()
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Hash arbitrary JSON-serializable key parts into a stable hex digest."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TranslationCache(TieredCache):
+    """Cache of translations keyed on text, target language, provider and model parameters."""
+
+    def __init__(self):
+        super().__init__(
+            "translation_cache",
+            memory_entries=int(os.environ.get("TRANSLATION_CACHE_SIZE", "1024")),
+            ttl=float(os.environ.get("TRANSLATION_CACHE_TTL", str(7 * 24 * 3600))),
+            disk_entries=int(os.environ.get("TRANSLATION_CACHE_DISK_ENTRIES", "100000"))
+        )
+        self.enabled = os.environ.get("TRANSLATION_CACHE_ENABLED", "true").lower() in ("true", "1", "yes", "y", "t")
+
+    @staticmethod
+    def key(text: str, target_language: str, provider: str, model: Optional[str] = None,
+            options: Optional[Dict[str, Any]] = None) -> str:
+        # Bumped when entries may have been stored under the wrong key, e.g.
+        # OpenAI fallback output cached as Ollama's before version 2
+        return make_cache_key("translation", 2, normalize_text(text), target_language, provider, model, options or {})
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        return super().get(key)
+
+    def set(self, key: str, value: str) -> None:
+        if self.enabled and value:
+            super().set(key, value)
+
+
+class OCRCache(TieredCache):
+    """
+    Content-addressed cache of OCR results.
+
+    Whole documents are keyed on the hash of the uploaded bytes and single
+    PDF pages on the hash of their rendered image, both combined with the
+    OCR model and preprocessing settings. The disk tier is bounded in bytes.
+    """
+
+    def __init__(self):
+        super().__init__(
+            "ocr_cache",
+            memory_entries=int(os.environ.get("OCR_CACHE_SIZE", "256")),
+            ttl=float(os.environ.get("OCR_CACHE_TTL", str(30 * 24 * 3600))),
+            disk_bytes=int(os.environ.get("OCR_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+        )
+        self.enabled = os.environ.get("OCR_CACHE_ENABLED", "true").lower() in ("true", "1", "yes", "y", "t")
+
+    @staticmethod
+    def key(kind: str, content_hash: str, model: str, settings: Dict[str, Any]) -> str:
+        return make_cache_key("ocr", kind, content_hash, model, settings)
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        return super().get(key)
+
+    def set(self, key: str, value: str) -> None:
+        if self.enabled and value:
+            super().set(key, value)
@@ -0,0 +1,182 @@
+import time
+import logging
+import threading
+from typing import Callable, Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Per-backend circuit breaker.
+
+    The breaker starts closed. After `failure_threshold` consecutive failures it
+    opens and rejects calls until `recovery_timeout` seconds have passed, then
+    lets a single trial call through (half-open). A successful trial closes the
+    breaker again, a failed one re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 3, recovery_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_started_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Return True if a call to the backend may be attempted right now."""
+        now = time.monotonic()
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+
+            if self._state == self.OPEN:
+                if now - self._opened_at < self.recovery_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_started_at = now
+                logger.info(f"Circuit '{self.name}' half-open, allowing trial request")
+                return True
+
+            # Half-open: only one trial at a time. A trial that never reported
+            # back is considered lost after another recovery period.
+            if self._trial_started_at is not None and now - self._trial_started_at < self.recovery_timeout:
+                return False
+            self._trial_started_at = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"Circuit '{self.name}' closed")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_started_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"Circuit '{self.name}' opened after {self._failures} failure(s)")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_started_at = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._opened_at = 0.0
+            self._trial_started_at = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serializable view of the breaker state."""
+        with self._lock:
+            snapshot = {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout": self.recovery_timeout,
+            }
+            if self._state != self.CLOSED:
+                remaining = self.recovery_timeout - (time.monotonic() - self._opened_at)
+                snapshot["retry_in"] = round(max(0.0, remaining), 1)
+            return snapshot
+
+
+class HealthTracker:
+    """
+    Caches the result of an active health probe for `ttl` seconds and combines
+    it with a circuit breaker that is also fed by passive request failures.
+    """
+
+    def __init__(self, probe: Callable[[], bool], breaker: CircuitBreaker, ttl: float = 30.0):
+        self._probe = probe
+        self.breaker = breaker
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self._last_result: Optional[bool] = None
+        self._last_checked = 0.0
+
+    def is_available(self) -> bool:
+        """
+        Check whether the backend should be used.
+
+        Returns immediately while the breaker is open or a cached probe result
+        is still fresh; otherwise runs at most one probe at a time.
+        """
+        if not self.breaker.allow_request():
+            return False
+
+        half_open = self.breaker.state == CircuitBreaker.HALF_OPEN
+        if not half_open:
+            cached = self.cached_result()
+            if cached is not None:
+                return cached
+
+        # Only one thread probes; the others reuse the last known result
+        # instead of piling up on a slow backend.
+        if not self._probe_lock.acquire(blocking=self._last_result is None or half_open):
+            return bool(self._last_result)
+        try:
+            if not half_open:
+                cached = self.cached_result()
+                if cached is not None:
+                    return cached
+
+            return self.record_probe(self._probe())
+        finally:
+            self._probe_lock.release()
+
+    def record_probe(self, result: bool) -> bool:
+        """Store the result of a probe run elsewhere (e.g. asynchronously)."""
+        with self._lock:
+            self._last_result = result
+            self._last_checked = time.monotonic()
+
+        if result:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        return result
+
+    def cached_result(self) -> Optional[bool]:
+        """Return the last probe result if it is still within the TTL."""
+        with self._lock:
+            if self._last_result is not None and time.monotonic() - self._last_checked < self.ttl:
+                return self._last_result
+            return None
+
+    def invalidate(self) -> None:
+        """Forget the cached probe result and close the breaker."""
+        with self._lock:
+            self._last_result = None
+            self._last_checked = 0.0
+        self.breaker.reset()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serializable view of the tracker and its breaker."""
+        with self._lock:
+            snapshot = {
+                "available": self._last_result,
+                "checked_seconds_ago": round(time.monotonic() - self._last_checked, 1) if self._last_result is not None else None,
+                "ttl": self.ttl,
+            }
+        snapshot["circuit"] = self.breaker.snapshot()
+        return snapshot
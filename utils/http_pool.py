@@ -0,0 +1,186 @@
+import os
+import socket
+import logging
+import importlib
+from typing import Tuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from utils.retry import BudgetedRetry, RetryBudget, retry_budget, current_deadline
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: the backend is overloaded or restarting
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+# deep_translator modules that talk HTTP through the module-level `requests`
+DEEP_TRANSLATOR_MODULES = (
+    "deep_translator.google",
+    "deep_translator.deepl",
+    "deep_translator.mymemory",
+    "deep_translator.linguee",
+    "deep_translator.pons",
+)
+
+
+def _env_bool(env_var: str, default: bool) -> bool:
+    val = os.environ.get(env_var, str(default)).lower()
+    return val in ("true", "1", "yes", "y", "t")
+
+
+class KeepAliveHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that optionally enables TCP keep-alive on pooled sockets."""
+
+    def __init__(self, *args, tcp_keepalive: bool = True, **kwargs):
+        self.tcp_keepalive = tcp_keepalive
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.tcp_keepalive:
+            from urllib3.connection import HTTPConnection
+            kwargs["socket_options"] = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            ]
+        super().init_poolmanager(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        # Every request earns a share of the retry budget
+        budget = getattr(self.max_retries, "budget", None)
+        if budget is not None:
+            budget.record_request()
+        return super().send(request, **kwargs)
+
+
+def build_session(pool_size: Optional[int] = None,
+                  max_retries: Optional[int] = None,
+                  backoff_factor: Optional[float] = None,
+                  keep_alive: Optional[bool] = None,
+                  budget: Optional[RetryBudget] = retry_budget) -> requests.Session:
+    """
+    Create a requests session with a connection pool and retry policy.
+
+    Connection errors and overload responses are retried with jittered
+    exponential backoff, as long as the shared retry budget and the current
+    request deadline allow it. Read timeouts are not retried, since the
+    backend may still be generating and a retry would double its load.
+
+    Args:
+        pool_size: Maximum connections kept per host (HTTP_POOL_SIZE)
+        max_retries: Retries for connect errors and overload statuses (HTTP_MAX_RETRIES)
+        backoff_factor: Backoff factor between retries (HTTP_BACKOFF_FACTOR)
+        keep_alive: Reuse connections between requests (HTTP_KEEP_ALIVE)
+        budget: Retry budget shared with other sessions
+
+    Returns:
+        Configured requests.Session
+    """
+    if pool_size is None:
+        pool_size = int(os.environ.get("HTTP_POOL_SIZE", "10"))
+    if max_retries is None:
+        max_retries = int(os.environ.get("HTTP_MAX_RETRIES", "2"))
+    if backoff_factor is None:
+        backoff_factor = float(os.environ.get("HTTP_BACKOFF_FACTOR", "0.5"))
+    if keep_alive is None:
+        keep_alive = _env_bool("HTTP_KEEP_ALIVE", True)
+
+    retry = BudgetedRetry(
+        total=max_retries,
+        connect=max_retries,
+        read=0,
+        status=max_retries,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({"GET", "POST"}),
+        backoff_factor=backoff_factor,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+        budget=budget
+    )
+    adapter = KeepAliveHTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+        tcp_keepalive=keep_alive
+    )
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Connection"] = "keep-alive" if keep_alive else "close"
+    return session
+
+
+def get_timeout(read_env: str, read_default: float) -> Tuple[float, float]:
+    """
+    Build a (connect, read) timeout tuple from the environment.
+
+    Args:
+        read_env: Environment variable holding the read timeout
+        read_default: Read timeout used when the variable is unset
+
+    Returns:
+        Tuple of (connect timeout, read timeout) in seconds
+    """
+    connect = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "3.05"))
+    read = float(os.environ.get(read_env, str(read_default)))
+    return connect, read
+
+
+class _PooledRequests:
+    """
+    Stand-in for the `requests` module inside third-party code.
+
+    `get` and `post` go through a shared pooled session and get a default
+    timeout, shortened to the current request deadline; everything else is
+    delegated to the real module.
+    """
+
+    def __init__(self, session: requests.Session, timeout: Tuple[float, float]):
+        self._session = session
+        self._timeout = timeout
+
+    def _timeout_for(self, kwargs):
+        timeout = kwargs.get("timeout") or self._timeout
+        deadline = current_deadline()
+        if deadline is not None:
+            if not isinstance(timeout, tuple):
+                timeout = (timeout, timeout)
+            timeout = deadline.cap(timeout, "translator request")
+        return timeout
+
+    def get(self, url, **kwargs):
+        kwargs["timeout"] = self._timeout_for(kwargs)
+        return self._session.get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        kwargs["timeout"] = self._timeout_for(kwargs)
+        return self._session.post(url, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+
+def pool_deep_translator_requests(session: Optional[requests.Session] = None) -> requests.Session:
+    """
+    Route deep_translator's HTTP calls through one pooled session.
+
+    deep_translator calls `requests.get` directly and offers no way to pass a
+    session, so the `requests` name in each provider module is rebound.
+
+    Returns:
+        The session now used by the deep_translator providers
+    """
+    if session is None:
+        session = build_session(max_retries=int(os.environ.get("TRANSLATOR_MAX_RETRIES", os.environ.get("HTTP_MAX_RETRIES", "2"))))
+    shim = _PooledRequests(session, get_timeout("TRANSLATOR_READ_TIMEOUT", 30))
+
+    for module_name in DEEP_TRANSLATOR_MODULES:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            continue
+        if getattr(module, "requests", None) is requests:
+            module.requests = shim
+        else:
+            logger.debug(f"Not pooling {module_name}: unexpected requests binding")
+
+    return session
@@ -0,0 +1,181 @@
+import io
+import os
+import re
+import logging
+from dataclasses import dataclass, replace, asdict
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ImageProfile:
+    """
+    How images are prepared before they are sent to a vision model.
+
+    Vision models resize their input to a fixed grid of tiles, so pixels
+    beyond that resolution only make the request larger and slower to
+    upload and decode without adding detail the model can see.
+
+    Attributes:
+        name: Profile name, reported in logs and cache keys
+        max_dimension: Longest side in pixels the image is downscaled to
+        max_short_side: Shortest side in pixels the image is downscaled to, if limited
+        mode: "rgb", "grayscale" or "binary" (black and white)
+        format: Encoder, "JPEG" or "PNG"
+        quality: JPEG quality
+        min_quality: Lowest JPEG quality used to stay within `max_bytes`
+        max_bytes: Budget for the encoded image; it is recompressed and
+            then downscaled until it fits
+    """
+    name: str
+    max_dimension: int
+    max_short_side: Optional[int] = None
+    mode: str = "grayscale"
+    format: str = "JPEG"
+    quality: int = 85
+    min_quality: int = 60
+    max_bytes: int = 768 * 1024
+
+    def target_size(self, width: int, height: int) -> Tuple[int, int]:
+        """Size an image of the given size is downscaled to (never upscaled)."""
+        scale = min(1.0, self.max_dimension / max(width, height))
+        if self.max_short_side:
+            scale = min(scale, self.max_short_side / min(width, height))
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def pdf_dpi(self, page_width_pt: float, page_height_pt: float) -> int:
+        """DPI at which a PDF page of the given size in points (1/72 inch) renders at the target size."""
+        dpi = self.max_dimension * 72 / max(page_width_pt, page_height_pt)
+        if self.max_short_side:
+            dpi = min(dpi, self.max_short_side * 72 / min(page_width_pt, page_height_pt))
+        return max(1, int(dpi))
+
+    def prepare(self, image: Image.Image) -> Image.Image:
+        """Resize and convert an image to this profile's resolution and color mode."""
+        # Converting first leaves a single channel to resample for grayscale
+        if self.mode in ("grayscale", "binary"):
+            image = image.convert("L")
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        size = self.target_size(image.width, image.height)
+        if size != image.size:
+            # reducing_gap box-reduces large images before the Lanczos pass
+            image = image.resize(size, Image.LANCZOS, reducing_gap=2.0)
+
+        if self.mode == "binary":
+            image = image.point(lambda value: 255 if value > 160 else 0, mode="1")
+        return image
+
+    def encode(self, image: Image.Image) -> bytes:
+        """
+        Prepare an image and encode it within the byte budget.
+
+        Args:
+            image: PIL image of any size and mode
+
+        Returns:
+            Encoded image bytes
+        """
+        image = self.prepare(image)
+        quality = self.quality
+        while True:
+            buffer = io.BytesIO()
+            if self.format == "PNG":
+                image.save(buffer, "PNG")
+            else:
+                image.save(buffer, "JPEG", quality=quality)
+            data = buffer.getvalue()
+
+            if len(data) <= self.max_bytes or max(image.size) <= 256:
+                return data
+            if self.format == "JPEG" and quality > self.min_quality:
+                quality = max(self.min_quality, quality - 10)
+            else:
+                image = image.resize((max(1, int(image.width * 0.8)), max(1, int(image.height * 0.8))), Image.BILINEAR)
+
+    def settings(self) -> Dict[str, Any]:
+        """Profile settings, for cache keys."""
+        return asdict(self)
+
+
+# Profiles by model name prefix. The longest matching prefix wins.
+PROFILES: Dict[str, ImageProfile] = {
+    # LLaVA 1.6 splits images into 336 px tiles on a grid of up to 1344 px
+    "llava": ImageProfile("llava", max_dimension=1344, max_bytes=512 * 1024),
+    "bakllava": ImageProfile("bakllava", max_dimension=1344, max_bytes=512 * 1024),
+    # Llama 3.2 Vision uses up to four 560 px tiles
+    "llama3.2-vision": ImageProfile("llama3.2-vision", max_dimension=1120, max_bytes=512 * 1024),
+    "minicpm-v": ImageProfile("minicpm-v", max_dimension=1344, max_bytes=512 * 1024),
+    "moondream": ImageProfile("moondream", max_dimension=756, max_bytes=256 * 1024),
+    # Qwen VL models work at native resolution, with tokens growing with pixels
+    "qwen2.5vl": ImageProfile("qwen2.5vl", max_dimension=1540, max_bytes=768 * 1024),
+    "qwen2-vl": ImageProfile("qwen2-vl", max_dimension=1540, max_bytes=768 * 1024),
+    "gemma3": ImageProfile("gemma3", max_dimension=896, max_bytes=384 * 1024),
+    # OpenAI fits images into 2048 px, then scales the short side to 768 px
+    "gpt-4": ImageProfile("openai", max_dimension=2048, max_short_side=768, max_bytes=1024 * 1024),
+}
+
+DEFAULT_PROFILE = ImageProfile("default", max_dimension=1600)
+
+
+def _env_overrides() -> Dict[str, Any]:
+    overrides = {}
+    if os.environ.get("OCR_MAX_DIMENSION"):
+        overrides["max_dimension"] = int(os.environ["OCR_MAX_DIMENSION"])
+    if os.environ.get("OCR_IMAGE_MODE"):
+        overrides["mode"] = os.environ["OCR_IMAGE_MODE"].lower()
+    if os.environ.get("OCR_IMAGE_FORMAT"):
+        overrides["format"] = os.environ["OCR_IMAGE_FORMAT"].upper()
+    if os.environ.get("OCR_JPEG_QUALITY"):
+        overrides["quality"] = int(os.environ["OCR_JPEG_QUALITY"])
+    if os.environ.get("OCR_MAX_IMAGE_BYTES"):
+        overrides["max_bytes"] = int(os.environ["OCR_MAX_IMAGE_BYTES"])
+    return overrides
+
+
+@lru_cache(maxsize=64)
+def image_profile(model: str) -> ImageProfile:
+    """
+    Return the preprocessing profile for a vision model.
+
+    The profile is chosen by the longest prefix of the model name (without
+    its tag) found in PROFILES; OCR_PROFILE forces a profile by name or model and the
+    OCR_MAX_DIMENSION, OCR_IMAGE_MODE, OCR_IMAGE_FORMAT, OCR_JPEG_QUALITY and
+    OCR_MAX_IMAGE_BYTES environment variables override its fields.
+
+    Args:
+        model: Model name, e.g. "llava:13b" or "gpt-4-vision-preview"
+
+    Returns:
+        The matching ImageProfile, or DEFAULT_PROFILE
+    """
+    forced = os.environ.get("OCR_PROFILE", "").lower()
+    by_name = {profile.name: profile for profile in PROFILES.values()}
+    if forced in by_name:
+        profile = by_name[forced]
+    else:
+        name = (forced or model).lower().split(":", 1)[0]
+        matches = [prefix for prefix in PROFILES if name.startswith(prefix)]
+        profile = PROFILES[max(matches, key=len)] if matches else DEFAULT_PROFILE
+
+    overrides = _env_overrides()
+    if overrides:
+        profile = replace(profile, **overrides)
+    logger.debug(f"Using image profile {profile} for model {model}")
+    return profile
+
+
+_PAGE_SIZE = re.compile(r"([\d.]+)\s*x\s*([\d.]+)\s*pts")
+
+
+def page_size_points(pdf_info: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Parse the page size reported by pdfinfo, e.g. "612 x 792 pts (letter)"."""
+    match = _PAGE_SIZE.search(str(pdf_info.get("Page size", "")))
+    if not match:
+        return None
+    return float(match.group(1)), float(match.group(2))
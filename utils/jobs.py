@@ -0,0 +1,318 @@
+import os
+import time
+import uuid
+import sqlite3
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List
+
+from utils.ocr import process_image, OCRCancelled
+
+logger = logging.getLogger(__name__)
+
+# Jobs and their uploads live here so queued work survives a worker restart
+JOBS_DIR = os.environ.get("OCR_JOBS_DIR", os.path.join(tempfile.gettempdir(), "rag_translator_jobs"))
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLING = "cancelling"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+class JobStore:
+    """SQLite-backed store of OCR jobs, shared by all gunicorn workers."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS ocr_jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, filename TEXT NOT NULL, "
+            "file_path TEXT NOT NULL, content_hash TEXT, "
+            "pages_done INTEGER NOT NULL DEFAULT 0, pages_total INTEGER, "
+            "result TEXT, error TEXT, worker_id TEXT, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._connect().execute("CREATE INDEX IF NOT EXISTS ocr_jobs_status ON ocr_jobs (status, created_at)")
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS ocr_job_workers (worker_id TEXT PRIMARY KEY, heartbeat_at REAL NOT NULL)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def create(self, filename: str, file_path: str, content_hash: Optional[str] = None, job_id: Optional[str] = None) -> str:
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO ocr_jobs (id, status, filename, file_path, content_hash, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, QUEUED, filename, file_path, content_hash, now, now)
+        )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute("SELECT * FROM ocr_jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def claim_next(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Atomically move the oldest queued job to running for the given worker."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM ocr_jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE ocr_jobs SET status = ?, worker_id = ?, updated_at = ? WHERE id = ?",
+                (RUNNING, worker_id, time.time(), row["id"])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        job = dict(row)
+        job["status"] = RUNNING
+        return job
+
+    def update(self, job_id: str, **fields) -> None:
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        self._connect().execute(f"UPDATE ocr_jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def request_cancel(self, job_id: str) -> Optional[str]:
+        """Cancel a queued job, or flag a running one. Returns the new status."""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("UPDATE ocr_jobs SET status = ?, updated_at = ? WHERE id = ? AND status = ?",
+                     (CANCELLED, now, job_id, QUEUED))
+        conn.execute("UPDATE ocr_jobs SET status = ?, updated_at = ? WHERE id = ? AND status = ?",
+                     (CANCELLING, now, job_id, RUNNING))
+        job = self.get(job_id)
+        return job["status"] if job else None
+
+    def heartbeat(self, worker_id: str) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO ocr_job_workers (worker_id, heartbeat_at) VALUES (?, ?)",
+            (worker_id, time.time())
+        )
+
+    def requeue_orphans(self, stale_before: float) -> List[str]:
+        """
+        Put running jobs whose worker stopped sending heartbeats back in the queue.
+
+        Jobs that were being cancelled are marked cancelled instead.
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            orphans = conn.execute(
+                "SELECT id, status FROM ocr_jobs WHERE status IN (?, ?) AND (worker_id IS NULL OR worker_id NOT IN "
+                "(SELECT worker_id FROM ocr_job_workers WHERE heartbeat_at >= ?))",
+                (RUNNING, CANCELLING, stale_before)
+            ).fetchall()
+            now = time.time()
+            requeued = []
+            for row in orphans:
+                if row["status"] == CANCELLING:
+                    conn.execute("UPDATE ocr_jobs SET status = ?, worker_id = NULL, updated_at = ? WHERE id = ?",
+                                 (CANCELLED, now, row["id"]))
+                else:
+                    conn.execute("UPDATE ocr_jobs SET status = ?, worker_id = NULL, pages_done = 0, updated_at = ? "
+                                 "WHERE id = ?", (QUEUED, now, row["id"]))
+                    requeued.append(row["id"])
+            conn.execute("DELETE FROM ocr_job_workers WHERE heartbeat_at < ?", (stale_before,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return requeued
+
+    def expired(self, older_than: float) -> List[Dict[str, Any]]:
+        placeholders = ", ".join("?" for _ in FINISHED_STATES)
+        rows = self._connect().execute(
+            f"SELECT * FROM ocr_jobs WHERE status IN ({placeholders}) AND updated_at < ?",
+            (*FINISHED_STATES, older_than)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def delete(self, job_id: str) -> None:
+        self._connect().execute("DELETE FROM ocr_jobs WHERE id = ?", (job_id,))
+
+
+class OCRJobManager:
+    """
+    Runs queued OCR jobs on a bounded background executor.
+
+    Every gunicorn worker runs one manager. Managers claim jobs from the
+    shared store, so a job submitted to one worker may be processed by
+    another. Managers send heartbeats; jobs held by a manager whose
+    heartbeat is older than `STALE_AFTER` seconds are requeued.
+    """
+
+    POLL_INTERVAL = 1.0
+    STALE_AFTER = 30.0
+    CLEANUP_INTERVAL = 300.0
+
+    def __init__(self, ollama_client, jobs_dir: str = JOBS_DIR):
+        self.ollama_client = ollama_client
+        self.jobs_dir = jobs_dir
+        self.uploads_dir = os.path.join(jobs_dir, "uploads")
+        os.makedirs(self.uploads_dir, exist_ok=True)
+
+        self.max_workers = int(os.environ.get("OCR_JOB_WORKERS", "2"))
+        self.retention = float(os.environ.get("OCR_JOB_RETENTION", str(24 * 3600)))
+        self.store = JobStore(os.path.join(jobs_dir, "jobs.sqlite3"))
+
+        self.worker_id = uuid.uuid4().hex
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ocr-job")
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self._wakeup = threading.Event()
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._last_cleanup = 0.0
+        self._last_orphan_check = 0.0
+
+    def start(self) -> None:
+        """Start the dispatcher thread; safe to call more than once."""
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+        self.store.heartbeat(self.worker_id)
+        threading.Thread(target=self._dispatch_loop, name="ocr-job-dispatcher", daemon=True).start()
+
+    def upload_path(self, job_id: str, filename: str) -> str:
+        """Return where the upload for a new job should be stored."""
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(self.uploads_dir, f"{job_id}{extension}")
+
+    def new_job_id(self) -> str:
+        return uuid.uuid4().hex
+
+    def submit(self, job_id: str, filename: str, file_path: str, content_hash: Optional[str] = None) -> str:
+        """Queue an uploaded file that has already been saved to `file_path`."""
+        self.store.create(filename, file_path, content_hash, job_id=job_id)
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a JSON-serializable view of a job, or None if unknown."""
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        view = {
+            "job_id": job["id"],
+            "status": job["status"],
+            "filename": job["filename"],
+            "progress": {"pages_done": job["pages_done"], "pages_total": job["pages_total"]},
+            "created_at": job["created_at"],
+            "updated_at": job["updated_at"],
+        }
+        if job["status"] == COMPLETED:
+            view["text"] = job["result"]
+        if job["error"]:
+            view["error"] = job["error"]
+        return view
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """Cancel a job. Returns its new status, or None if unknown."""
+        status = self.store.request_cancel(job_id)
+        if status == CANCELLED:
+            job = self.store.get(job_id)
+            self._remove_upload(job["file_path"])
+        return status
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            try:
+                self.store.heartbeat(self.worker_id)
+                self._requeue_orphans()
+                self._dispatch_available()
+                self._cleanup_expired()
+            except Exception as e:
+                logger.error(f"OCR job dispatcher error: {e}")
+            self._wakeup.wait(self.POLL_INTERVAL)
+            self._wakeup.clear()
+
+    def _dispatch_available(self) -> None:
+        while self._slots.acquire(blocking=False):
+            job = self.store.claim_next(self.worker_id)
+            if job is None:
+                self._slots.release()
+                return
+            self._executor.submit(self._run, job)
+
+    def _run(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+        logger.info(f"Running OCR job {job_id} ({job['filename']})")
+
+        def progress(done: int, total: int) -> None:
+            try:
+                self.store.update(job_id, pages_done=done, pages_total=total)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not record progress of OCR job {job_id}: {e}")
+
+        def cancelled() -> bool:
+            current = self.store.get(job_id)
+            return current is None or current["status"] == CANCELLING
+
+        try:
+            text = process_image(job["file_path"], self.ollama_client, content_hash=job["content_hash"],
+                                 progress=progress, cancelled=cancelled)
+            if cancelled():
+                raise OCRCancelled("OCR cancelled")
+            self.store.update(job_id, status=COMPLETED, result=text, worker_id=None)
+            logger.info(f"OCR job {job_id} completed")
+        except OCRCancelled:
+            self.store.update(job_id, status=CANCELLED, worker_id=None)
+            logger.info(f"OCR job {job_id} cancelled")
+        except Exception as e:
+            logger.error(f"OCR job {job_id} failed: {e}")
+            self.store.update(job_id, status=FAILED, error=f"OCR processing failed: {str(e)}", worker_id=None)
+        finally:
+            self._remove_upload(job["file_path"])
+            self._slots.release()
+            self._wakeup.set()
+
+    def _requeue_orphans(self) -> None:
+        now = time.monotonic()
+        if now - self._last_orphan_check < self.STALE_AFTER:
+            return
+        self._last_orphan_check = now
+        requeued = self.store.requeue_orphans(time.time() - self.STALE_AFTER)
+        if requeued:
+            logger.info(f"Requeued {len(requeued)} OCR job(s) left by a stopped worker")
+
+    def _cleanup_expired(self) -> None:
+        now = time.monotonic()
+        if now - self._last_cleanup < self.CLEANUP_INTERVAL:
+            return
+        self._last_cleanup = now
+        for job in self.store.expired(time.time() - self.retention):
+            self._remove_upload(job["file_path"])
+            self.store.delete(job["id"])
+
+    def _remove_upload(self, file_path: str) -> None:
+        try:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        except OSError as e:
+            logger.warning(f"Could not remove job upload {file_path}: {e}")
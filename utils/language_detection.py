@@ -0,0 +1,279 @@
+import os
+import re
+import bisect
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.cache import LRUCache
+from utils.language_samples import SAMPLES, COMMON_WORDS
+from utils.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+# Only the start of a text is scored; more rarely changes the answer
+SAMPLE_CHARS = int(os.environ.get("LANGUAGE_DETECTION_SAMPLE_CHARS", "500"))
+CACHE_SIZE = int(os.environ.get("LANGUAGE_DETECTION_CACHE_SIZE", "4096"))
+
+# Character n-gram lengths of the profiles; bigrams added little but noise
+# on the bundled samples
+NGRAM_SIZES = (1, 3)
+# Additive smoothing of n-gram counts
+SMOOTHING = 0.1
+# Scores are averaged per n-gram and then sharpened by the n-gram count, up
+# to this many, so short texts get low confidence and long ones high
+CONFIDENCE_NGRAMS = 20
+# Texts with fewer letters than this have their confidence scaled down, since
+# a greeting or a heading rarely tells closely related languages apart
+CONFIDENT_LETTERS = 30
+
+# Unicode ranges of the scripts that are told apart, sorted by start
+_SCRIPT_RANGES = sorted([
+    (0x0041, 0x024F, "latin"),
+    (0x0370, 0x03FF, "greek"),
+    (0x0400, 0x04FF, "cyrillic"),
+    (0x0590, 0x05FF, "hebrew"),
+    (0x0600, 0x06FF, "arabic"),
+    (0x0750, 0x077F, "arabic"),
+    (0x0900, 0x097F, "devanagari"),
+    (0x0E00, 0x0E7F, "thai"),
+    (0x1100, 0x11FF, "hangul"),
+    (0x1E00, 0x1EFF, "latin"),
+    (0x3040, 0x30FF, "kana"),
+    (0x3130, 0x318F, "hangul"),
+    (0x3400, 0x4DBF, "han"),
+    (0x4E00, 0x9FFF, "han"),
+    (0xAC00, 0xD7AF, "hangul"),
+    (0xFB50, 0xFDFF, "arabic"),
+    (0xFE70, 0xFEFF, "arabic"),
+])
+_SCRIPT_STARTS = [start for start, _, _ in _SCRIPT_RANGES]
+
+# Scripts used by a single supported language
+_SCRIPT_LANGUAGES = {
+    "greek": "el",
+    "hebrew": "he",
+    "devanagari": "hi",
+    "thai": "th",
+    "hangul": "ko",
+}
+
+# Characters that exist only in simplified or only in traditional Chinese
+_SIMPLIFIED = set("这个们来时说国会对为发后过还问学实经东见开关长门间车书体电话语与无业产务条约议权责应该办认种")
+_TRADITIONAL = set("這個們來時說國會對為發後過還問學實經東見開關長門間車書體電話語與無業產務條約議權責應該辦認種")
+
+_NON_LETTERS = re.compile(r"[\W\d_]+")
+
+
+def _script(char: str) -> Optional[str]:
+    code = ord(char)
+    index = bisect.bisect_right(_SCRIPT_STARTS, code) - 1
+    if index >= 0:
+        start, end, script = _SCRIPT_RANGES[index]
+        if code <= end:
+            return script
+    return None
+
+
+def _normalize(text: str) -> str:
+    """Lowercase letters only, words separated by single spaces and padded with one."""
+    return f" {_NON_LETTERS.sub(' ', text.lower()).strip()} "
+
+
+def _ngrams(text: str) -> List[str]:
+    grams = []
+    for size in NGRAM_SIZES:
+        grams.extend(text[i:i + size] for i in range(len(text) - size + 1))
+    return [gram for gram in grams if gram.strip()]
+
+
+class NgramModel:
+    """
+    Naive Bayes over character n-grams for the languages of one script.
+
+    Each language's log-probabilities are stored as a row of one matrix, so
+    a batch of texts is scored with a single matrix product.
+    """
+
+    def __init__(self, samples: Dict[str, str]):
+        self.languages = list(samples)
+        counts = {language: {} for language in self.languages}
+        for language, sample in samples.items():
+            for gram in _ngrams(_normalize(sample)):
+                counts[language][gram] = counts[language].get(gram, 0) + 1
+
+        vocabulary = sorted({gram for language_counts in counts.values() for gram in language_counts})
+        self.index = {gram: i for i, gram in enumerate(vocabulary)}
+
+        matrix = np.full((len(self.languages), len(vocabulary) + 1), SMOOTHING)
+        for row, language in enumerate(self.languages):
+            for gram, count in counts[language].items():
+                matrix[row, self.index[gram]] += count
+        matrix /= matrix[:, :-1].sum(axis=1, keepdims=True)
+        self.log_probs = np.log(matrix)
+        # N-grams no language has seen carry no information
+        self.log_probs[:, -1] = 0.0
+
+    def score(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """
+        Return the most likely language of each text and its confidence.
+
+        Args:
+            texts: Texts already reduced to this model's script
+
+        Returns:
+            (language code, confidence between 0 and 1) per text
+        """
+        unknown = len(self.index)
+        rows, columns, totals, letters = [], [], [], []
+        for row, text in enumerate(texts):
+            normalized = _normalize(text)
+            letters.append(len(normalized.replace(" ", "")))
+            grams = _ngrams(normalized)
+            rows.extend([row] * len(grams))
+            columns.extend(self.index.get(gram, unknown) for gram in grams)
+            totals.append(len(grams))
+
+        counts = np.zeros((len(texts), unknown + 1))
+        np.add.at(counts, (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)), 1)
+        scores = counts @ self.log_probs.T
+
+        totals = np.maximum(np.array(totals, dtype=float), 1.0)[:, None]
+        scores = scores / totals * np.minimum(totals, CONFIDENCE_NGRAMS)
+        scores -= scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(scores)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+
+        best = probabilities.argmax(axis=1)
+        return [
+            (self.languages[i], float(probabilities[row, i]) * min(1.0, letters[row] / CONFIDENT_LETTERS))
+            for row, i in enumerate(best)
+        ]
+
+
+class LanguageDetector:
+    """
+    Offline language detection for the languages the app translates.
+
+    Languages with a script of their own are recognized by script. Texts in
+    Latin, Cyrillic or Arabic script are scored against character n-gram
+    profiles of that script's languages. Results are cached by text hash.
+    """
+
+    def __init__(self, samples: Optional[Dict[str, str]] = None, cache_size: int = CACHE_SIZE):
+        self.samples = samples or {
+            language: f"{sample} {COMMON_WORDS.get(language, '')}" for language, sample in SAMPLES.items()
+        }
+        self.cache = LRUCache(max_entries=cache_size)
+        self._models: Optional[Dict[str, NgramModel]] = None
+        self._lock = threading.Lock()
+
+    def _get_models(self) -> Dict[str, NgramModel]:
+        # Built on first use so importing the module stays cheap
+        with self._lock:
+            if self._models is None:
+                by_script: Dict[str, Dict[str, str]] = {}
+                for language, sample in self.samples.items():
+                    scripts = [_script(char) for char in sample if char.isalpha()]
+                    script = max(set(scripts), key=scripts.count)
+                    by_script.setdefault(script, {})[language] = sample
+                self._models = {script: NgramModel(samples) for script, samples in by_script.items()}
+            return self._models
+
+    def _classify_script(self, text: str) -> Tuple[Optional[str], Optional[Tuple[str, float]], str]:
+        """
+        Find the dominant script of a text.
+
+        Returns:
+            Tuple of (script, result if the script alone decides the
+            language, the text's characters in that script)
+        """
+        counts: Dict[str, int] = {}
+        for char in text:
+            if char.isalpha():
+                script = _script(char)
+                if script:
+                    counts[script] = counts.get(script, 0) + 1
+        if not counts:
+            return None, ("unknown", 0.0), ""
+
+        letters = sum(counts.values())
+        cjk = counts.get("han", 0) + counts.get("kana", 0)
+        if cjk > letters / 2:
+            # Japanese mixes kana into Han text; Chinese has none
+            if counts.get("kana", 0) >= 0.1 * cjk:
+                return "kana", ("ja", cjk / letters), ""
+            simplified = sum(1 for char in text if char in _SIMPLIFIED)
+            traditional = sum(1 for char in text if char in _TRADITIONAL)
+            language = "zh-TW" if traditional > simplified else "zh-CN"
+            return "han", (language, cjk / letters), ""
+
+        script = max(counts, key=counts.get)
+        share = counts[script] / letters
+        if script in _SCRIPT_LANGUAGES:
+            return script, (_SCRIPT_LANGUAGES[script], share), ""
+        if script not in self._get_models():
+            return script, ("unknown", 0.0), ""
+        return script, None, "".join(char if _script(char) == script else " " for char in text)
+
+    def detect(self, text: str) -> Tuple[str, float]:
+        """
+        Detect the language of a text.
+
+        Args:
+            text: The text to analyze
+
+        Returns:
+            Tuple of (language code, confidence between 0 and 1); ("unknown",
+            0.0) if the text has no letters of a supported script
+        """
+        return self.detect_batch([text])[0]
+
+    def detect_batch(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """
+        Detect the language of many texts, scoring each script's texts in one pass.
+
+        Args:
+            texts: Texts to analyze
+
+        Returns:
+            (language code, confidence) per text, in input order
+        """
+        results: List[Optional[Tuple[str, float]]] = [None] * len(texts)
+        keys = []
+        computed = []
+        pending: Dict[str, List[Tuple[int, str]]] = {}
+
+        for i, text in enumerate(texts):
+            sample = text[:SAMPLE_CHARS]
+            key = hashlib.sha1(sample.encode("utf-8")).hexdigest()
+            keys.append(key)
+            cached = self.cache.get(key)
+            CACHE_LOOKUPS.labels("language", "miss" if cached is None else "memory_hit").inc()
+            if cached is not None:
+                results[i] = cached
+                continue
+
+            computed.append(i)
+            script, decided, script_text = self._classify_script(sample)
+            if decided is not None:
+                results[i] = decided
+            else:
+                pending.setdefault(script, []).append((i, script_text))
+
+        models = self._get_models() if pending else {}
+        for script, items in pending.items():
+            scores = models[script].score([script_text for _, script_text in items])
+            for (i, _), result in zip(items, scores):
+                results[i] = result
+
+        for i in computed:
+            self.cache.set(keys[i], results[i])
+        return results
+
+
+# Shared by all requests of this process
+language_detector = LanguageDetector()
@@ -0,0 +1,180 @@
+"""
+Reference texts the local language detector learns its n-gram profiles from.
+
+Languages written in a script of their own (Greek, Hebrew, Thai, Hindi,
+Korean, Japanese, Chinese) are recognized by script and need no sample.
+Each sample combines Article 1 of the Universal Declaration of Human Rights
+with sentences typical of the business documents this app translates.
+COMMON_WORDS adds each language's most frequent function words, which
+tell closely related languages apart even in short texts.
+"""
+
+SAMPLES = {
+    'en': "All human beings are born free and equal in dignity and rights. They are endowed with reason and "
+          "conscience and should act towards one another in a spirit of brotherhood. This agreement shall enter "
+          "into force on the date of its signature by both parties. The supplier shall deliver the goods within "
+          "thirty days of receiving the order. Please find attached the invoice for the services provided last "
+          "month. We would like to thank you for your cooperation and look forward to working with you.",
+    'es': "Todos los seres humanos nacen libres e iguales en dignidad y derechos y, dotados como están de razón y "
+          "conciencia, deben comportarse fraternalmente los unos con los otros. El presente contrato entrará en "
+          "vigor en la fecha de su firma por ambas partes. El proveedor deberá entregar las mercancías dentro de "
+          "los treinta días siguientes a la recepción del pedido. Adjuntamos la factura correspondiente a los "
+          "servicios prestados el mes pasado. Le agradecemos su colaboración y esperamos seguir trabajando con usted.",
+    'fr': "Tous les êtres humains naissent libres et égaux en dignité et en droits. Ils sont doués de raison et de "
+          "conscience et doivent agir les uns envers les autres dans un esprit de fraternité. Le présent contrat "
+          "entre en vigueur à la date de sa signature par les deux parties. Le fournisseur doit livrer les "
+          "marchandises dans un délai de trente jours à compter de la réception de la commande. Veuillez trouver "
+          "ci-joint la facture des services rendus le mois dernier. Nous vous remercions de votre collaboration "
+          "et nous nous réjouissons de travailler avec vous.",
+    'de': "Alle Menschen sind frei und gleich an Würde und Rechten geboren. Sie sind mit Vernunft und Gewissen "
+          "begabt und sollen einander im Geist der Brüderlichkeit begegnen. Dieser Vertrag tritt mit der "
+          "Unterzeichnung durch beide Parteien in Kraft. Der Lieferant muss die Waren innerhalb von dreißig Tagen "
+          "nach Eingang der Bestellung liefern. Anbei erhalten Sie die Rechnung für die im letzten Monat "
+          "erbrachten Leistungen. Wir danken Ihnen für die Zusammenarbeit und freuen uns auf die weitere "
+          "Zusammenarbeit mit Ihnen.",
+    'it': "Tutti gli esseri umani nascono liberi ed eguali in dignità e diritti. Essi sono dotati di ragione e di "
+          "coscienza e devono agire gli uni verso gli altri in spirito di fratellanza. Il presente contratto entra "
+          "in vigore alla data della sua sottoscrizione da parte di entrambe le parti. Il fornitore deve "
+          "consegnare la merce entro trenta giorni dal ricevimento dell'ordine. In allegato troverà la fattura "
+          "per i servizi prestati il mese scorso. La ringraziamo per la collaborazione e speriamo di continuare "
+          "a lavorare con lei.",
+    'pt': "Todos os seres humanos nascem livres e iguais em dignidade e em direitos. Dotados de razão e de "
+          "consciência, devem agir uns para com os outros em espírito de fraternidade. O presente contrato entra "
+          "em vigor na data da sua assinatura por ambas as partes. O fornecedor deverá entregar as mercadorias no "
+          "prazo de trinta dias após a receção da encomenda. Segue em anexo a fatura referente aos serviços "
+          "prestados no mês passado. Agradecemos a sua colaboração e esperamos continuar a trabalhar consigo.",
+    'nl': "Alle mensen worden vrij en gelijk in waardigheid en rechten geboren. Zij zijn begiftigd met verstand "
+          "en geweten, en behoren zich jegens elkander in een geest van broederschap te gedragen. Deze "
+          "overeenkomst treedt in werking op de datum van ondertekening door beide partijen. De leverancier moet "
+          "de goederen binnen dertig dagen na ontvangst van de bestelling leveren. Bijgaand vindt u de factuur "
+          "voor de diensten die vorige maand zijn geleverd. Wij danken u voor de samenwerking en kijken ernaar "
+          "uit om met u verder te werken.",
+    'sv': "Alla människor är födda fria och lika i värde och rättigheter. De har utrustats med förnuft och "
+          "samvete och bör handla gentemot varandra i en anda av broderskap. Detta avtal träder i kraft den dag "
+          "det undertecknas av båda parter. Leverantören ska leverera varorna inom trettio dagar från mottagandet "
+          "av beställningen. Bifogat finner ni fakturan för de tjänster som utfördes förra månaden. Vi tackar för "
+          "samarbetet och ser fram emot att fortsätta arbeta med er.",
+    'fi': "Kaikki ihmiset syntyvät vapaina ja tasavertaisina arvoltaan ja oikeuksiltaan. Heille on annettu järki "
+          "ja omatunto, ja heidän on toimittava toisiaan kohtaan veljeyden hengessä. Tämä sopimus tulee voimaan "
+          "päivänä, jona molemmat osapuolet ovat allekirjoittaneet sen. Toimittajan on toimitettava tavarat "
+          "kolmenkymmenen päivän kuluessa tilauksen vastaanottamisesta. Liitteenä on lasku viime kuussa "
+          "suoritetuista palveluista. Kiitämme yhteistyöstä ja odotamme innolla jatkoa kanssanne.",
+    'tr': "Bütün insanlar hür, haysiyet ve haklar bakımından eşit doğarlar. Akıl ve vicdana sahiptirler ve "
+          "birbirlerine karşı kardeşlik zihniyeti ile hareket etmelidirler. Bu sözleşme her iki tarafça "
+          "imzalandığı tarihte yürürlüğe girer. Tedarikçi, malları siparişin alınmasından itibaren otuz gün "
+          "içinde teslim etmelidir. Geçen ay verilen hizmetlere ait fatura ekte sunulmuştur. İş birliğiniz için "
+          "teşekkür eder, sizinle çalışmaya devam etmeyi dileriz.",
+    'pl': "Wszyscy ludzie rodzą się wolni i równi pod względem swej godności i swych praw. Są oni obdarzeni "
+          "rozumem i sumieniem i powinni postępować wobec innych w duchu braterstwa. Niniejsza umowa wchodzi w "
+          "życie z dniem jej podpisania przez obie strony. Dostawca zobowiązany jest dostarczyć towar w terminie "
+          "trzydziestu dni od otrzymania zamówienia. W załączeniu przesyłamy fakturę za usługi wykonane w "
+          "zeszłym miesiącu. Dziękujemy za współpracę i liczymy na dalszą owocną współpracę.",
+    'cs': "Všichni lidé rodí se svobodní a sobě rovní co do důstojnosti a práv. Jsou nadáni rozumem a svědomím a "
+          "mají spolu jednat v duchu bratrství. Tato smlouva nabývá účinnosti dnem jejího podpisu oběma smluvními "
+          "stranami. Dodavatel je povinen dodat zboží do třiceti dnů od obdržení objednávky. V příloze zasíláme "
+          "fakturu za služby poskytnuté v minulém měsíci. Děkujeme za spolupráci a těšíme se na další společnou "
+          "práci.",
+    'da': "Alle mennesker er født frie og lige i værdighed og rettigheder. De er udstyret med fornuft og "
+          "samvittighed, og de bør handle mod hverandre i en broderskabets ånd. Denne aftale træder i kraft på "
+          "datoen for underskrivelsen af begge parter. Leverandøren skal levere varerne inden for tredive dage "
+          "efter modtagelsen af ordren. Vedlagt finder De fakturaen for de ydelser, der blev leveret i sidste "
+          "måned. Vi takker for samarbejdet og ser frem til at arbejde sammen med Dem igen.",
+    'no': "Alle mennesker er født frie og med samme menneskeverd og menneskerettigheter. De er utstyrt med "
+          "fornuft og samvittighet og bør handle mot hverandre i brorskapets ånd. Denne avtalen trer i kraft på "
+          "datoen den blir signert av begge parter. Leverandøren skal levere varene innen tretti dager etter at "
+          "bestillingen er mottatt. Vedlagt følger fakturaen for tjenestene som ble levert forrige måned. Vi "
+          "takker for samarbeidet og ser frem til å jobbe videre med dere.",
+    'hu': "Minden emberi lény szabadon születik és egyenlő méltósága és joga van. Az emberek, ésszel és "
+          "lelkiismerettel bírván, egymással szemben testvéri szellemben kell hogy viseltessenek. Ez a szerződés "
+          "mindkét fél általi aláírás napján lép hatályba. A szállító köteles az árut a megrendelés "
+          "kézhezvételétől számított harminc napon belül leszállítani. Mellékelten küldjük a múlt hónapban "
+          "nyújtott szolgáltatások számláját. Köszönjük az együttműködést, és örömmel dolgozunk Önnel a jövőben is.",
+    'vi': "Tất cả mọi người sinh ra đều được tự do và bình đẳng về nhân phẩm và quyền. Mọi con người đều được "
+          "tạo hóa ban cho lý trí và lương tâm và cần phải đối xử với nhau trong tình anh em. Hợp đồng này có "
+          "hiệu lực kể từ ngày hai bên ký kết. Nhà cung cấp phải giao hàng trong vòng ba mươi ngày kể từ ngày "
+          "nhận được đơn đặt hàng. Xin gửi kèm theo hóa đơn cho các dịch vụ đã cung cấp trong tháng trước. Chúng "
+          "tôi cảm ơn sự hợp tác của quý vị và mong được tiếp tục làm việc với quý vị.",
+    'id': "Semua orang dilahirkan merdeka dan mempunyai martabat dan hak-hak yang sama. Mereka dikaruniai akal "
+          "dan hati nurani dan hendaknya bergaul satu sama lain dalam semangat persaudaraan. Perjanjian ini "
+          "mulai berlaku pada tanggal penandatanganan oleh kedua belah pihak. Pemasok wajib mengirimkan barang "
+          "dalam waktu tiga puluh hari setelah pesanan diterima. Terlampir kami kirimkan faktur untuk layanan "
+          "yang diberikan bulan lalu. Kami berterima kasih atas kerja sama Anda dan berharap dapat terus bekerja "
+          "sama dengan Anda.",
+    'ro': "Toate ființele umane se nasc libere și egale în demnitate și în drepturi. Ele sunt înzestrate cu "
+          "rațiune și conștiință și trebuie să se comporte unele față de altele în spiritul fraternității. "
+          "Prezentul contract intră în vigoare la data semnării sale de către ambele părți. Furnizorul trebuie "
+          "să livreze mărfurile în termen de treizeci de zile de la primirea comenzii. Vă transmitem atașat "
+          "factura pentru serviciile prestate luna trecută. Vă mulțumim pentru colaborare și sperăm să lucrăm "
+          "în continuare împreună.",
+    'ru': "Все люди рождаются свободными и равными в своем достоинстве и правах. Они наделены разумом и совестью "
+          "и должны поступать в отношении друг друга в духе братства. Настоящий договор вступает в силу с даты "
+          "его подписания обеими сторонами. Поставщик обязан поставить товар в течение тридцати дней с момента "
+          "получения заказа. Во вложении направляем счёт за услуги, оказанные в прошлом месяце. Благодарим вас "
+          "за сотрудничество и надеемся на дальнейшую совместную работу.",
+    'uk': "Всі люди народжуються вільними і рівними у своїй гідності та правах. Вони наділені розумом і совістю "
+          "і повинні діяти у відношенні один до одного в дусі братерства. Цей договір набирає чинності з дати "
+          "його підписання обома сторонами. Постачальник зобов'язаний поставити товар протягом тридцяти днів з "
+          "моменту отримання замовлення. У додатку надсилаємо рахунок за послуги, надані минулого місяця. "
+          "Дякуємо вам за співпрацю і сподіваємося на подальшу спільну роботу.",
+    'bg': "Всички хора се раждат свободни и равни по достойнство и права. Те са надарени с разум и съвест и "
+          "следва да се отнасят помежду си в дух на братство. Настоящият договор влиза в сила от датата на "
+          "подписването му от двете страни. Доставчикът е длъжен да достави стоките в срок от тридесет дни от "
+          "получаването на поръчката. Приложено изпращаме фактурата за услугите, предоставени през миналия "
+          "месец. Благодарим ви за сътрудничеството и се надяваме на по-нататъшна съвместна работа.",
+    'ar': "يولد جميع الناس أحرارًا متساوين في الكرامة والحقوق. وقد وهبوا عقلًا وضميرًا وعليهم أن يعامل بعضهم "
+          "بعضًا بروح الإخاء. يدخل هذا العقد حيز التنفيذ من تاريخ توقيعه من قبل الطرفين. يجب على المورد تسليم "
+          "البضائع خلال ثلاثين يومًا من تاريخ استلام الطلب. مرفق طيه الفاتورة الخاصة بالخدمات المقدمة في الشهر "
+          "الماضي. نشكركم على تعاونكم ونتطلع إلى مواصلة العمل معكم.",
+    'fa': "تمام افراد بشر آزاد به دنیا می‌آیند و از لحاظ حیثیت و حقوق با هم برابرند. همه دارای عقل و وجدان "
+          "هستند و باید نسبت به یکدیگر با روح برادری رفتار کنند. این قرارداد از تاریخ امضای آن توسط هر دو طرف "
+          "لازم‌الاجرا است. تأمین‌کننده باید کالاها را ظرف سی روز پس از دریافت سفارش تحویل دهد. فاکتور خدمات "
+          "ارائه شده در ماه گذشته به پیوست ارسال می‌شود. از همکاری شما سپاسگزاریم و امیدواریم به همکاری با شما "
+          "ادامه دهیم.",
+}
+
+COMMON_WORDS = {
+    'en': "the of and to a in is that it for was on are as with be at by this have from or an but not which "
+          "you we they will would can there their all",
+    'es': "de la que el en y a los se del las un por con no una su para es al lo como más pero sus le ya o "
+          "este sí porque esta entre cuando muy sin sobre también",
+    'fr': "de la le et les des en un du une que est pour qui dans par plus pas au sur ne se ce il sont avec ou "
+          "mais nous vous leur cette aussi être été",
+    'de': "der die und in den von zu das mit sich des auf für ist im dem nicht ein eine als auch es an werden "
+          "aus er hat dass sie nach wird bei einer um",
+    'it': "di e il la che a per un in è del non una i le si con da sono alla al come più ma anche lo nel "
+          "questo della gli ha essere molto",
+    'pt': "de a o que e do da em um para é com não uma os no se na por mais as dos como mas foi ao ele das "
+          "tem à seu sua ou ser quando muito também",
+    'nl': "de en van het een in is dat op te zijn voor met die niet aan er om ook als dan maar bij of uit nog "
+          "wat door wordt naar heeft zij kan worden",
+    'sv': "och i att det som en på är av för med till den har de inte om ett han men var jag sig från vi så "
+          "kan man när år säger hon under också efter",
+    'fi': "ja on ei se että hän oli mutta joka kun niin kuin myös ovat tämä sen hänen olla vain jo sitten "
+          "tai ole mitä nyt sitä kanssa minä",
+    'tr': "ve bir bu da de için ile çok ne o gibi daha ama en olarak kadar sonra var değil mi ben her şey ya "
+          "olan diye çünkü veya göre",
+    'pl': "i w nie na się z do że to jest jak o co ale po tak za od jego już tylko przez może czy przy być "
+          "są dla było jej lub",
+    'cs': "a v se na je že to s z do o jako ale by jsem tak pro jeho už jsou po jen nebo který když být má "
+          "bylo ve také k této",
+    'da': "og i at det er en til på som de med han af for ikke der var mig sig men et har om vi min havde "
+          "ham hun nu over da fra du ud sin",
+    'no': "og i det er som en på til av at med for ikke de har den han et var jeg seg om men fra vi så kan "
+          "hun også etter skal være hadde",
+    'hu': "a az és hogy nem is egy meg ez de van csak már el ki mint volt még azt vagy lesz mert ha kell "
+          "nagyon minden után amely",
+    'vi': "và của là có trong không được cho những một các người này với đã để khi đến cũng như từ rằng thì "
+          "nhưng đó ra về",
+    'id': "yang dan di ini itu dengan untuk tidak dari dalam akan pada juga ke karena ada oleh mereka atau "
+          "saya kita sudah bisa lebih harus",
+    'ro': "și de la în a cu că nu pe o se din un este pentru mai care sunt ca ce sau dar fost au după acest "
+          "prin fi doar",
+    'ru': "и в не на что я с он как а то это по но из у за от все так же для она было вы мы бы его только "
+          "или уже если",
+    'uk': "і в не на що я з він як а та це по але із у за від все так же для вона було ви ми би його тільки "
+          "або вже якщо є",
+    'bg': "и в не на да се че с за от как това е са по но които една един всички ще бъде или също има при "
+          "към",
+    'ar': "في من على أن إلى عن مع هذا التي الذي كان ما لا هذه بين كل قد لم ثم أو عند هو هي",
+    'fa': "و در به از که این را با است برای آن یک خود تا می شود بود کرد هم نیز اما یا هر",
+}
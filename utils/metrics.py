@@ -0,0 +1,96 @@
+import os
+import logging
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+)
+
+logger = logging.getLogger(__name__)
+
+# Under gunicorn, gunicorn.conf.py sets PROMETHEUS_MULTIPROC_DIR before the
+# workers fork; each worker then writes its samples to files there and
+# /metrics sums them over all workers.
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Latency buckets in seconds, from cache-speed to model timeouts
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+# Size buckets in bytes, 1 KB to 64 MB
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(9))
+
+STAGE_SECONDS = Histogram(
+    "rag_stage_duration_seconds",
+    "Time spent in a processing stage",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+
+MODEL_REQUEST_SECONDS = Histogram(
+    "rag_model_request_duration_seconds",
+    "Latency of requests to a model backend",
+    ["backend", "operation", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+
+MODEL_REQUEST_BYTES = Histogram(
+    "rag_model_request_bytes",
+    "Size of request bodies sent to a model backend",
+    ["backend", "operation"],
+    buckets=SIZE_BUCKETS
+)
+
+TRANSLATION_SECONDS = Histogram(
+    "rag_translation_duration_seconds",
+    "Latency of uncached translation calls per provider",
+    ["provider", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+
+TRANSLATION_CHARS = Histogram(
+    "rag_translation_chars",
+    "Length of texts sent to a translation provider",
+    ["provider"],
+    buckets=(50, 100, 250, 500, 1000, 2000, 4000, 8000)
+)
+
+UPLOAD_BYTES = Histogram(
+    "rag_upload_bytes",
+    "Size of uploaded files",
+    ["kind"],
+    buckets=SIZE_BUCKETS
+)
+
+FALLBACKS = Counter(
+    "rag_fallbacks_total",
+    "Requests served by a fallback instead of the first choice",
+    ["stage", "source", "target"]
+)
+
+CACHE_LOOKUPS = Counter(
+    "rag_cache_lookups_total",
+    "Cache lookups by result (memory_hit, disk_hit, miss)",
+    ["cache", "result"]
+)
+
+
+def time_stage(stage: str):
+    """Context manager recording the duration of a processing stage."""
+    return STAGE_SECONDS.labels(stage=stage).time()
+
+
+def record_fallback(stage: str, source: str, target: str) -> None:
+    FALLBACKS.labels(stage=stage, source=source, target=target).inc()
+
+
+def render() -> Tuple[bytes, str]:
+    """
+    Render all metrics in the Prometheus text format.
+
+    Returns:
+        Tuple of (body, content type)
+    """
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,88 @@
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Roles whose models are loaded when a worker starts and after their model
+# changes; empty disables warm-up
+WARMUP_ROLES = [
+    role.strip() for role in os.environ.get("OLLAMA_WARMUP_MODELS", "ocr,translation").split(",") if role.strip()
+]
+# Seconds between keep-warm requests, which reload the models and restart
+# their keep_alive countdown; 0 disables them
+KEEP_WARM_INTERVAL = float(os.environ.get("OLLAMA_KEEP_WARM_INTERVAL", "0"))
+
+
+class ModelWarmer:
+    """
+    Loads the configured Ollama models in a background thread.
+
+    Models are warmed once on `start()`, again whenever `request()` is
+    called (e.g. after a model change) and, with a keep-warm interval, on a
+    timer so they are not unloaded between bursts of traffic.
+    """
+
+    def __init__(self, client, roles: Optional[List[str]] = None, interval: float = KEEP_WARM_INTERVAL):
+        self.client = client
+        self.roles = list(WARMUP_ROLES if roles is None else roles)
+        self.interval = interval
+        self.last_warmup: Dict[str, Dict[str, Any]] = {}
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._started = False
+
+    def start(self) -> None:
+        """Start the warm-up thread and warm all roles; safe to call more than once."""
+        if not self.roles:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self.request()
+        threading.Thread(target=self._warm_loop, name="ollama-model-warmer", daemon=True).start()
+
+    def request(self, roles: Optional[Iterable[str]] = None) -> None:
+        """
+        Ask for the models of some roles to be loaded.
+
+        Args:
+            roles: Roles to warm; defaults to all configured roles. Roles not
+                configured for warm-up are ignored.
+        """
+        roles = set(self.roles if roles is None else roles) & set(self.roles)
+        if not roles:
+            return
+        with self._lock:
+            self._pending |= roles
+        self._wakeup.set()
+
+    def _warm_loop(self) -> None:
+        while True:
+            requested = self._wakeup.wait(self.interval if self.interval > 0 else None)
+            self._wakeup.clear()
+            with self._lock:
+                roles = self._pending if requested else set(self.roles)
+                self._pending = set()
+            if not roles:
+                continue
+
+            try:
+                results = self.client.warm_up([role for role in self.roles if role in roles])
+            except Exception as e:
+                logger.error(f"Model warm-up failed: {e}")
+                continue
+            models = self.client.models()
+            for role, loaded in results.items():
+                self.last_warmup[role] = {"model": models[role], "loaded": loaded, "at": time.time()}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "roles": self.roles,
+            "keep_warm_interval": self.interval,
+            "last_warmup": dict(self.last_warmup)
+        }
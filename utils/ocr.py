@@ -1,23 +1,137 @@
 import os
+import io
+import asyncio
+import time
+import hashlib
 import logging
+import functools
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 import pytesseract
-from pdf2image import convert_from_path
-from typing import List, Optional
+from pdf2image import convert_from_path, pdfinfo_from_path
+from typing import List, Optional, Tuple, Union, Dict, Any, Callable
 import tempfile
+from utils.cache import OCRCache
+from utils import tesseract
+from utils.image_profiles import page_size_points
+from utils.metrics import time_stage, record_fallback
 
 logger = logging.getLogger(__name__)
 
-def process_image(file_path: str, ollama_client) -> str:
+# How often a single failed PDF page is retried before it is given up on
+PAGE_RETRIES = int(os.environ.get("OCR_PAGE_RETRIES", "1"))
+PAGE_RETRY_DELAY = float(os.environ.get("OCR_PAGE_RETRY_DELAY", "1.0"))
+
+# PDF rasterization settings. Pages are rendered in windows of
+# PDF_RENDER_WINDOW pages and at most PDF_MAX_PAGES_IN_MEMORY rendered pages
+# are waiting for or undergoing OCR at any time. With PDF_DPI "auto" pages
+# are rendered at the resolution the OCR model's image profile asks for.
+PDF_DPI = os.environ.get("PDF_DPI", "auto")
+PDF_MIN_DPI = int(os.environ.get("PDF_MIN_DPI", "72"))
+PDF_MAX_DPI = int(os.environ.get("PDF_MAX_DPI", "300"))
+PDF_GRAYSCALE = os.environ.get("PDF_GRAYSCALE", "false").lower() in ("true", "1", "yes", "y", "t")
+PDF_RENDER_WINDOW = int(os.environ.get("PDF_RENDER_WINDOW", "4"))
+PDF_MAX_PAGES_IN_MEMORY = int(os.environ.get("PDF_MAX_PAGES_IN_MEMORY", "8"))
+
+# Pages whose embedded text has at least PDF_TEXT_MIN_CHARS visible
+# characters, mostly letters, digits and punctuation, use that text instead
+# of being rasterized and OCR'd
+PDF_TEXT_LAYER = os.environ.get("PDF_TEXT_LAYER", "true").lower() in ("true", "1", "yes", "y", "t")
+PDF_TEXT_MIN_CHARS = int(os.environ.get("PDF_TEXT_MIN_CHARS", "20"))
+PDF_TEXT_MIN_READABLE = float(os.environ.get("PDF_TEXT_MIN_READABLE", "0.8"))
+PDF_TEXT_TIMEOUT = float(os.environ.get("PDF_TEXT_TIMEOUT", "60"))
+
+# "vlm" always uses the vision model; "tiered" reads images with Tesseract
+# first and only sends them to the model when its confidence is too low.
+# With OCR_ESCALATION "regions" only low-confidence blocks are sent to it.
+OCR_MODE = os.environ.get("OCR_MODE", "vlm").lower()
+OCR_ESCALATION = os.environ.get("OCR_ESCALATION", "page").lower()
+
+# Tesseract is most accurate around 300 DPI, so PDF pages rendered at a
+# lower DPI for the vision model are rendered again at this resolution
+# before Tesseract reads them, in the tiered pass or as the fallback for
+# short model results
+TESSERACT_DPI = int(os.environ.get("TESSERACT_DPI", "300"))
+
+# Images larger than this (in pixels, longest side) are downscaled before
+# OCR. The vision model gets a smaller copy sized by its image profile; this
+# limit applies to the image Tesseract sees.
+MAX_IMAGE_DIMENSION = 3000
+
+# Content-addressed cache of document and page OCR results
+ocr_cache = OCRCache()
+
+# Progress callbacks receive (pages done, total pages); cancellation checks
+# return True once the caller no longer wants the result
+ProgressCallback = Callable[[int, int], None]
+CancelCheck = Callable[[], bool]
+
+class OCRCancelled(Exception):
+    """Raised when OCR is stopped because the caller cancelled it."""
+
+def _ocr_settings(ollama_client) -> Dict[str, Any]:
+    """Preprocessing settings that influence OCR output, used in cache keys."""
+    return {
+        'dpi': PDF_DPI,
+        'grayscale': PDF_GRAYSCALE,
+        'max_dimension': MAX_IMAGE_DIMENSION,
+        'profile': ollama_client.ocr_profile().settings(),
+        'generation': ollama_client.generation_settings(),
+        'max_tokens': ollama_client.ocr_max_tokens,
+        'text_layer': (PDF_TEXT_MIN_CHARS, PDF_TEXT_MIN_READABLE) if PDF_TEXT_LAYER else None,
+        'mode': OCR_MODE,
+        'escalation': OCR_ESCALATION,
+        'tesseract': {**tesseract.settings(), 'dpi': TESSERACT_DPI} if OCR_MODE == 'tiered' else {'dpi': TESSERACT_DPI}
+    }
+
+def _pdf_render_settings(pdf_info: Dict[str, Any], ollama_client) -> Tuple[int, bool]:
+    """
+    Pick the DPI and color mode PDF pages are rasterized with.
+    
+    Args:
+        pdf_info: Output of pdfinfo for the document
+        ollama_client: Instance of OllamaClient whose OCR model's profile is used
+        
+    Returns:
+        Tuple of (DPI, whether to render in grayscale)
+    """
+    profile = ollama_client.ocr_profile()
+    grayscale = PDF_GRAYSCALE or profile.mode != 'rgb'
+    if PDF_DPI != 'auto':
+        return int(PDF_DPI), grayscale
+    
+    page_size = page_size_points(pdf_info)
+    dpi = 200 if page_size is None else profile.pdf_dpi(*page_size)
+    return max(PDF_MIN_DPI, min(PDF_MAX_DPI, dpi)), grayscale
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def process_image(file_path: str, ollama_client, image_data: Optional[bytes] = None,
+                  content_hash: Optional[str] = None, progress: Optional[ProgressCallback] = None,
+                  cancelled: Optional[CancelCheck] = None) -> str:
     """
     Process an image or PDF file to extract text using OCR.
     
     This function handles both image files (JPEG, PNG) and PDF files.
     It uses pytesseract for preprocessing and enhancement, then Ollama for actual OCR.
+    Results are cached by content hash, OCR model and preprocessing settings.
     
     Args:
-        file_path: Path to the image or PDF file
+        file_path: Path (or file name) of the image or PDF file
         ollama_client: Instance of OllamaClient to use for OCR
+        image_data: Contents of an image file already held in memory; when
+            given, `file_path` is only used to determine the file type
+        content_hash: SHA-256 hex digest of the file contents, if already known
+        progress: Called with (pages done, total pages) as OCR advances
+        cancelled: Polled between pages; when it returns True, OCRCancelled is raised
         
     Returns:
         str: Extracted text from the image
@@ -25,13 +139,40 @@ def process_image(file_path: str, ollama_client) -> str:
     file_extension = os.path.splitext(file_path)[1].lower()
     
     try:
+        if content_hash is None:
+            if image_data is not None:
+                content_hash = hashlib.sha256(image_data).hexdigest()
+            else:
+                content_hash = hash_file(file_path)
+        
+        cache_key = ocr_cache.key('document', content_hash, ollama_client.ocr_model, _ocr_settings(ollama_client))
+        cached = ocr_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"OCR cache hit for document {content_hash[:12]}")
+            if progress:
+                progress(1, 1)
+            return cached
+        
         # Handle PDF files
         if file_extension == '.pdf':
-            return process_pdf(file_path, ollama_client)
+            extracted_text, complete = _process_pdf(file_path, ollama_client, progress, cancelled)
+        else:
+            # Handle image files
+            if progress:
+                progress(0, 1)
+            extracted_text = process_single_image(image_data if image_data is not None else file_path, ollama_client)
+            complete = True
+            if progress:
+                progress(1, 1)
         
-        # Handle image files
-        return process_single_image(file_path, ollama_client)
+        # Documents with failed pages are not cached as a whole; their good
+        # pages are already cached individually
+        if complete:
+            ocr_cache.set(cache_key, extracted_text)
+        return extracted_text
     
+    except OCRCancelled:
+        raise
     except Exception as e:
         logger.error(f"Error processing file {file_path}: {e}")
         raise
@@ -40,6 +181,18 @@ def process_pdf(pdf_path: str, ollama_client) -> str:
     """
     Extract text from a PDF file by converting pages to images and performing OCR.
     
+    Pages of born-digital PDFs that carry a usable text layer are read
+    directly with pdftotext; only the remaining, image-only pages are
+    rasterized and OCR'd. Pages are rasterized lazily in small windows
+    straight to disk, so memory stays flat regardless of page count and OCR
+    of the first pages starts while later pages are still being rendered. Pages are OCR'd concurrently,
+    bounded by the concurrency limit of the backend that serves them, and
+    reassembled in page order. A page that fails is retried on its own; if
+    it still fails, a placeholder is kept in its place so the rest of the
+    document is not lost. Pages whose rendered image was OCR'd before are
+    served from the cache, so only changed pages of a revised PDF are
+    sent to the model again.
+    
     Args:
         pdf_path: Path to the PDF file
         ollama_client: Instance of OllamaClient to use for OCR
@@ -47,89 +200,488 @@ def process_pdf(pdf_path: str, ollama_client) -> str:
     Returns:
         str: Extracted text from all pages of the PDF
     """
+    return _process_pdf(pdf_path, ollama_client)[0]
+
+def _process_pdf(pdf_path: str, ollama_client, progress: Optional[ProgressCallback] = None,
+                 cancelled: Optional[CancelCheck] = None) -> Tuple[str, bool]:
+    """
+    Read the text layer of a PDF and rasterize and OCR the rest, see `process_pdf`.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        ollama_client: Instance of OllamaClient to use for OCR
+        progress: Called with (pages done, total pages) as pages finish
+        cancelled: Polled before each page; when it returns True, OCRCancelled is raised
+        
+    Returns:
+        Tuple of (extracted text, whether every page was OCR'd successfully)
+    """
     try:
-        # Create a temporary directory for storing image files
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Convert PDF to images
-            images = convert_from_path(pdf_path)
-            
-            all_text = []
+        pdf_info = pdfinfo_from_path(pdf_path)
+        page_count = pdf_info["Pages"]
+        if not page_count:
+            return "", True
+        
+        # Pages with a usable text layer don't need to be rendered or OCR'd
+        page_texts = _extract_text_layer(pdf_path, page_count)
+        results = {number: (text, True) for number, text in enumerate(page_texts, 1) if text is not None}
+        ocr_pages = [number for number, text in enumerate(page_texts, 1) if text is None]
+        if results:
+            logger.info(f"Using the text layer of {len(results)} of {page_count} PDF pages")
+        
+        is_cancelled = cancelled or (lambda: False)
+        pages_done = [len(results)]
+        progress_lock = threading.Lock()
+        
+        window = max(1, min(PDF_RENDER_WINDOW, PDF_MAX_PAGES_IN_MEMORY))
+        page_slots = threading.BoundedSemaphore(max(window, PDF_MAX_PAGES_IN_MEMORY))
+        
+        def page_finished(_):
+            page_slots.release()
+            if progress:
+                with progress_lock:
+                    pages_done[0] += 1
+                    progress(pages_done[0], page_count)
+        
+        if progress:
+            progress(pages_done[0], page_count)
+        
+        if ocr_pages:
+            dpi, grayscale = _pdf_render_settings(pdf_info, ollama_client)
+            max_workers = min(len(ocr_pages), ollama_client.ocr_concurrency())
+            logger.info(f"OCR of {len(ocr_pages)} PDF pages with {max_workers} worker(s), rendering {window} page(s) at a time at {dpi} DPI")
             
-            # Process each page
-            for i, image in enumerate(images):
-                # Save image temporarily
-                img_path = os.path.join(temp_dir, f'page_{i}.jpg')
-                image.save(img_path, 'JPEG')
-                
-                # Process the image and extract text
-                page_text = process_single_image(img_path, ollama_client)
-                all_text.append(page_text)
+            # Create a temporary directory for the rendered page files
+            with tempfile.TemporaryDirectory() as temp_dir, ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {}
+                for first_page, last_page in _page_runs(ocr_pages, window):
+                    # Wait until enough earlier pages are done before rendering more
+                    for _ in range(first_page, last_page + 1):
+                        page_slots.acquire()
+                    
+                    if is_cancelled():
+                        raise OCRCancelled(f"OCR cancelled before page {first_page}")
+                    
+                    try:
+                        page_paths = _render_pdf_pages(pdf_path, first_page, last_page, temp_dir, dpi, grayscale)
+                    except Exception as e:
+                        # Only these pages fail, the rest of the document is still OCR'd
+                        logger.error(f"Rendering PDF pages {first_page}-{last_page} failed: {e}")
+                        page_paths = []
+                        for number in range(first_page, last_page + 1):
+                            results[number] = (f"[Page {number}: OCR failed]", False)
+                        if progress:
+                            with progress_lock:
+                                pages_done[0] += last_page - first_page + 1
+                                progress(pages_done[0], page_count)
+                    for _ in range(last_page - first_page + 1 - len(page_paths)):
+                        page_slots.release()
+                    
+                    for offset, page_path in enumerate(page_paths):
+                        number = first_page + offset
+                        rerender = None
+                        if dpi < TESSERACT_DPI:
+                            rerender = functools.partial(_render_pdf_pages, pdf_path, number, number, temp_dir,
+                                                         TESSERACT_DPI, grayscale, "tesseract")
+                        future = executor.submit(_process_pdf_page, page_path, number, ollama_client, is_cancelled,
+                                                 rerender)
+                        future.add_done_callback(page_finished)
+                        futures[first_page + offset] = future
                 
-                # Clean up temporary image file
-                os.remove(img_path)
-            
-            # Combine text from all pages
-            return "\n\n".join(all_text)
+                for number, future in futures.items():
+                    results[number] = future.result()
+        
+        # Reassemble text-layer and OCR'd pages in page order
+        results = [results[number] for number in sorted(results)]
+        
+        if is_cancelled():
+            raise OCRCancelled("OCR cancelled")
+        
+        if not any(ok for _, ok in results):
+            raise Exception(f"OCR failed for all {len(results)} pages")
+        
+        # Combine text from all pages
+        return "\n\n".join(text for text, _ in results), all(ok for _, ok in results)
     
+    except OCRCancelled:
+        raise
     except Exception as e:
         logger.error(f"Error processing PDF {pdf_path}: {e}")
         raise
 
-def process_single_image(image_path: str, ollama_client) -> str:
+def _page_runs(pages: List[int], max_length: int) -> List[Tuple[int, int]]:
+    """Split sorted page numbers into (first, last) runs of consecutive pages, at most `max_length` long."""
+    runs = []
+    for number in pages:
+        if runs and runs[-1][1] == number - 1 and number - runs[-1][0] < max_length:
+            runs[-1] = (runs[-1][0], number)
+        else:
+            runs.append((number, number))
+    return runs
+
+def _usable_text_layer(text: str) -> bool:
+    """
+    Whether embedded page text is real text rather than empty or garbage.
+    
+    Scanned pages have no text layer, and PDFs with broken font encodings
+    yield mostly symbols or replacement characters.
+    """
+    visible = [char for char in text if not char.isspace()]
+    if len(visible) < PDF_TEXT_MIN_CHARS:
+        return False
+    readable = sum(1 for char in visible if char.isalnum() or char in ".,;:!?'\"()-")
+    return readable / len(visible) >= PDF_TEXT_MIN_READABLE
+
+def _extract_text_layer(pdf_path: str, page_count: int) -> List[Optional[str]]:
+    """
+    Read the embedded text of every page of a PDF with pdftotext.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        page_count: Number of pages in the PDF
+        
+    Returns:
+        The text of each page in page order, or None for pages without a
+        usable text layer, which have to be OCR'd
+    """
+    if not PDF_TEXT_LAYER:
+        return [None] * page_count
+    
+    try:
+        with time_stage("pdf_text_layer"):
+            result = subprocess.run(
+                ["pdftotext", "-enc", "UTF-8", pdf_path, "-"],
+                capture_output=True,
+                timeout=PDF_TEXT_TIMEOUT,
+                check=True
+            )
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning(f"Could not read the text layer of {pdf_path}, OCR'ing all pages: {e}")
+        return [None] * page_count
+    
+    # pdftotext ends every page with a form feed
+    pages = result.stdout.decode("utf-8", errors="replace").split("\f")
+    texts = []
+    for index in range(page_count):
+        text = pages[index].strip() if index < len(pages) else ""
+        texts.append(text if _usable_text_layer(text) else None)
+    return texts
+
+def _render_pdf_pages(pdf_path: str, first_page: int, last_page: int, output_folder: str,
+                      dpi: int = 200, grayscale: bool = False, prefix: str = "page") -> List[str]:
     """
-    Process a single image file to extract text using OCR.
+    Rasterize a range of PDF pages to JPEG files without decoding them.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        first_page: First page to render (1-based, inclusive)
+        last_page: Last page to render (1-based, inclusive)
+        output_folder: Directory the page files are written to
+        dpi: Rendering resolution
+        grayscale: Render in grayscale instead of color
+        prefix: File name prefix, so renderings of a page at another
+            resolution don't overwrite each other
+        
+    Returns:
+        List of page file paths in page order
+    """
+    with time_stage("pdf_render"):
+        return convert_from_path(
+            pdf_path,
+            dpi=dpi,
+            grayscale=grayscale,
+            first_page=first_page,
+            last_page=last_page,
+            output_folder=output_folder,
+            output_file=f"{prefix}_{first_page:05d}_",
+            fmt="jpeg",
+            paths_only=True
+        )
+
+def _process_pdf_page(page_path: str, page_number: int, ollama_client,
+                      cancelled: Optional[CancelCheck] = None,
+                      rerender: Optional[Callable[[], List[str]]] = None) -> Tuple[str, bool]:
+    """
+    OCR a single rendered PDF page, retrying it alone on failure.
+    
+    Args:
+        page_path: Path to the rendered page file
+        page_number: 1-based page number
+        ollama_client: Instance of OllamaClient to use for OCR
+        cancelled: Checked before the page is OCR'd; cancelled pages are skipped
+        rerender: Renders the page again at TESSERACT_DPI, when it was
+            rendered at a lower DPI for the vision model; only called once
+            Tesseract is about to read the page
+        
+    Returns:
+        Tuple of (page text or failure placeholder, whether OCR succeeded)
+    """
+    tesseract_data = []
+    
+    def tesseract_source() -> bytes:
+        # Rendered on first use, then kept for retries of the page
+        if not tesseract_data:
+            tesseract_path = rerender()[0]
+            with open(tesseract_path, 'rb') as f:
+                tesseract_data.append(f.read())
+            os.remove(tesseract_path)
+        return tesseract_data[0]
+    
+    try:
+        if cancelled and cancelled():
+            return f"[Page {page_number}: cancelled]", False
+        
+        page_data = None
+        for attempt in range(PAGE_RETRIES + 1):
+            try:
+                # Reading and hashing the page can fail too, so it is part
+                # of the attempt rather than failing the whole document
+                if page_data is None:
+                    with open(page_path, 'rb') as f:
+                        data = f.read()
+                    page_hash = hashlib.sha256(data).hexdigest()
+                    cache_key = ocr_cache.key('page', page_hash, ollama_client.ocr_model, _ocr_settings(ollama_client))
+                    cached = ocr_cache.get(cache_key)
+                    if cached is not None:
+                        logger.debug(f"OCR cache hit for page {page_number}")
+                        return cached, True
+                    page_data = data
+                
+                page_text = process_single_image(page_data, ollama_client,
+                                                 tesseract_source if rerender is not None else None)
+                ocr_cache.set(cache_key, page_text)
+                return page_text, True
+            except Exception as e:
+                if attempt == PAGE_RETRIES:
+                    logger.error(f"OCR failed for page {page_number} after {attempt + 1} attempt(s): {e}")
+                    return f"[Page {page_number}: OCR failed]", False
+                logger.warning(f"OCR failed for page {page_number}, retrying: {e}")
+                time.sleep(PAGE_RETRY_DELAY * (2 ** attempt))
+    finally:
+        # Clean up the rendered page file
+        try:
+            os.remove(page_path)
+        except OSError:
+            pass
+
+def process_single_image(image_source: Union[str, bytes, Image.Image], ollama_client,
+                         tesseract_source: Union[str, bytes, Image.Image, Callable[[], bytes], None] = None) -> str:
+    """
+    Process a single image to extract text using OCR.
     
     This function performs preprocessing to enhance image quality,
-    then uses Ollama for the actual OCR.
+    then uses Ollama for the actual OCR. The preprocessed image is handed
+    to the client in memory rather than through a temporary file; the
+    client shrinks it to the OCR model's image profile, while Tesseract
+    works on the full-resolution image.
+    
+    In "tiered" OCR mode Tesseract reads the image first and its text is
+    returned as is when its word confidences pass the thresholds in
+    utils.tesseract. Otherwise the vision model re-reads the whole image or,
+    with OCR_ESCALATION "regions", only the low-confidence blocks.
     
     Args:
-        image_path: Path to the image file
+        image_source: Path to the image file, encoded image bytes or a PIL image
         ollama_client: Instance of OllamaClient to use for OCR
+        tesseract_source: Sharper rendering of the same image for Tesseract,
+            if the vision model's copy is too coarse for it, or a function
+            returning one; it is only loaded when Tesseract runs
         
     Returns:
         str: Extracted text from the image
     """
     try:
-        # Open and preprocess the image
-        image = Image.open(image_path)
-        
-        # Convert to RGB if image has alpha channel
-        if image.mode == 'RGBA':
-            image = image.convert('RGB')
-        
-        # Perform preprocessing to improve OCR accuracy
-        # - Resize if needed
-        # - Enhance contrast
-        # - Apply mild filtering for noise reduction
-        
-        # If image is very small or very large, resize to a reasonable size
-        max_dimension = max(image.width, image.height)
-        if max_dimension > 3000:
-            scale_factor = 3000 / max_dimension
-            new_width = int(image.width * scale_factor)
-            new_height = int(image.height * scale_factor)
-            image = image.resize((new_width, new_height), Image.LANCZOS)
-        
-        # Save preprocessed image
-        with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp_file:
-            preprocessed_path = tmp_file.name
-            image.save(preprocessed_path, 'JPEG', quality=95)
+        with time_stage("preprocess"):
+            image = _preprocess_image(image_source)
         
-        try:
-            # Use Ollama for OCR
-            extracted_text = ollama_client.process_image(preprocessed_path)
-            
-            # If Ollama returns empty or too short result, fallback to Tesseract
-            if not extracted_text or len(extracted_text) < 10:
-                logger.info("Ollama OCR result too short, falling back to Tesseract")
-                extracted_text = pytesseract.image_to_string(image)
-            
-            return extracted_text.strip()
+        page = None
+        if OCR_MODE == 'tiered':
+            with time_stage("preprocess"):
+                tesseract_image = _tesseract_image(image, tesseract_source)
+            with time_stage("tesseract"):
+                page = tesseract.read_page(tesseract_image)
+        
+        if page is None:
+            return _ocr_with_model(image, ollama_client, tesseract_source=tesseract_source)
+        
+        if page.accepted():
+            logger.debug(f"Tesseract result accepted: {page.word_count} words, "
+                         f"mean confidence {page.mean_confidence:.1f}, coverage {page.coverage:.2f}")
+            return page.text()
+        
+        regions = page.low_confidence_blocks() if OCR_ESCALATION == 'regions' else None
+        if regions is None:
+            record_fallback("ocr", "tesseract", "vlm")
+            return _ocr_with_model(image, ollama_client, page.text())
+        
+        record_fallback("ocr", "tesseract", "vlm_regions")
+        replacements = {}
+        for block in regions:
+            # Keep Tesseract's reading of a region the model returns nothing for
+            replacements[block.number] = ollama_client.process_image(tesseract.crop(tesseract_image, block)).strip() or block.text
+        return page.text(replacements)
+    
+    except Exception as e:
+        source = image_source if isinstance(image_source, str) else type(image_source).__name__
+        logger.error(f"Error processing image {source}: {e}")
+        raise
+
+def _tesseract_image(image: Image.Image,
+                     tesseract_source: Union[str, bytes, Image.Image, Callable[[], bytes], None]) -> Image.Image:
+    """Return the image Tesseract should read: the sharper rendering if there is one, else `image`."""
+    if tesseract_source is None:
+        return image
+    if callable(tesseract_source):
+        tesseract_source = tesseract_source()
+    return _preprocess_image(tesseract_source)
+
+def _ocr_with_model(image: Image.Image, ollama_client, tesseract_text: Optional[str] = None,
+                    tesseract_source: Union[str, bytes, Image.Image, Callable[[], bytes], None] = None) -> str:
+    """
+    OCR an image with the vision model, falling back to Tesseract on short results.
+    
+    Args:
+        image: Preprocessed image
+        ollama_client: Instance of OllamaClient to use for OCR
+        tesseract_text: Tesseract's text for the image, if it was already read
+        tesseract_source: Sharper rendering of the image for the Tesseract
+            fallback, see `process_single_image`
+        
+    Returns:
+        str: Extracted text from the image
+    """
+    extracted_text = ollama_client.process_image(image)
+    
+    # If Ollama returns empty or too short result, fallback to Tesseract
+    if not extracted_text or len(extracted_text) < 10:
+        logger.info("Ollama OCR result too short, falling back to Tesseract")
+        record_fallback("ocr", "vlm", "tesseract")
+        if tesseract_text is not None:
+            return tesseract_text
+        with time_stage("tesseract_fallback"):
+            extracted_text = pytesseract.image_to_string(_tesseract_image(image, tesseract_source))
+    
+    return extracted_text.strip()
+
+def _preprocess_image(image_source: Union[str, bytes, Image.Image]) -> Image.Image:
+    """
+    Open an image and prepare it for OCR.
+    
+    Args:
+        image_source: Path to the image file, encoded image bytes or a PIL image
+        
+    Returns:
+        The preprocessed PIL image
+    """
+    # Open and preprocess the image
+    if isinstance(image_source, Image.Image):
+        image = image_source
+    elif isinstance(image_source, (bytes, bytearray)):
+        image = Image.open(io.BytesIO(image_source))
+    else:
+        image = Image.open(image_source)
+    
+    # Convert to RGB if image has alpha channel or a palette
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    
+    # Perform preprocessing to improve OCR accuracy
+    # - Resize if needed
+    # - Enhance contrast
+    # - Apply mild filtering for noise reduction
+    
+    # If image is very small or very large, resize to a reasonable size
+    max_dimension = max(image.width, image.height)
+    if max_dimension > MAX_IMAGE_DIMENSION:
+        scale_factor = MAX_IMAGE_DIMENSION / max_dimension
+        new_width = int(image.width * scale_factor)
+        new_height = int(image.height * scale_factor)
+        image = image.resize((new_width, new_height), Image.LANCZOS)
+    
+    return image
+
+async def _ocr_with_model_async(image: Image.Image, async_client, tesseract_text: Optional[str] = None) -> str:
+    """Asyncio version of `_ocr_with_model`."""
+    extracted_text = await async_client.process_image(image)
+    
+    if not extracted_text or len(extracted_text) < 10:
+        logger.info("Ollama OCR result too short, falling back to Tesseract")
+        record_fallback("ocr", "vlm", "tesseract")
+        if tesseract_text is not None:
+            return tesseract_text
+        with time_stage("tesseract_fallback"):
+            extracted_text = await asyncio.to_thread(pytesseract.image_to_string, image)
+    
+    return extracted_text.strip()
+
+async def process_image_async(file_path: str, async_client, image_data: Optional[bytes] = None,
+                              content_hash: Optional[str] = None) -> str:
+    """
+    Asyncio version of `process_image`.
+    
+    Images are sent to the model through the async client, so waiting for
+    the model holds no thread. Preprocessing and Tesseract run in worker
+    threads; low-confidence regions are re-read concurrently. PDFs go through the threaded `process_image` path,
+    which already bounds its own page concurrency.
+    
+    Args:
+        file_path: Path (or file name) of the image or PDF file
+        async_client: Instance of AsyncOllamaClient to use for OCR
+        image_data: Contents of an image file already held in memory; when
+            given, `file_path` is only used to determine the file type
+        content_hash: SHA-256 hex digest of the file contents, if already known
         
-        finally:
-            # Clean up temporary file
-            os.unlink(preprocessed_path)
+    Returns:
+        str: Extracted text from the image
+    """
+    ollama_client = async_client.client
+    if os.path.splitext(file_path)[1].lower() == '.pdf':
+        return await asyncio.to_thread(process_image, file_path, ollama_client,
+                                       image_data=image_data, content_hash=content_hash)
+    
+    try:
+        if content_hash is None:
+            if image_data is not None:
+                content_hash = hashlib.sha256(image_data).hexdigest()
+            else:
+                content_hash = await asyncio.to_thread(hash_file, file_path)
+        
+        cache_key = ocr_cache.key('document', content_hash, ollama_client.ocr_model, _ocr_settings(ollama_client))
+        cached = ocr_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"OCR cache hit for document {content_hash[:12]}")
+            return cached
+        
+        with time_stage("preprocess"):
+            image = await asyncio.to_thread(_preprocess_image, image_data if image_data is not None else file_path)
+        
+        page = None
+        if OCR_MODE == 'tiered':
+            with time_stage("tesseract"):
+                page = await asyncio.to_thread(tesseract.read_page, image)
+        
+        if page is None:
+            extracted_text = await _ocr_with_model_async(image, async_client)
+        elif page.accepted():
+            extracted_text = page.text()
+        else:
+            regions = page.low_confidence_blocks() if OCR_ESCALATION == 'regions' else None
+            if regions is None:
+                record_fallback("ocr", "tesseract", "vlm")
+                extracted_text = await _ocr_with_model_async(image, async_client, page.text())
+            else:
+                record_fallback("ocr", "tesseract", "vlm_regions")
+                region_texts = await asyncio.gather(*(
+                    async_client.process_image(tesseract.crop(image, block)) for block in regions
+                ))
+                extracted_text = page.text({
+                    block.number: text.strip() or block.text for block, text in zip(regions, region_texts)
+                })
+        
+        extracted_text = extracted_text.strip()
+        ocr_cache.set(cache_key, extracted_text)
+        return extracted_text
     
     except Exception as e:
-        logger.error(f"Error processing image {image_path}: {e}")
+        logger.error(f"Error processing file {file_path}: {e}")
         raise
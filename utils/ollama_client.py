@@ -1,11 +1,114 @@
 import os
+import io
+import base64
 import requests
 import logging
 import json
-from typing import Optional, Dict, Any, List
+import math
+import time
+from typing import Optional, Dict, Any, List, Tuple, Union, Iterator
+from PIL import Image
+from utils.health import CircuitBreaker, HealthTracker
+from utils.image_profiles import ImageProfile, DEFAULT_PROFILE, image_profile
+from utils.http_pool import build_session, get_timeout
+from utils.retry import Deadline, DeadlineExceeded, deadline_scope, current_deadline
+from utils.metrics import MODEL_REQUEST_SECONDS, MODEL_REQUEST_BYTES, record_fallback
 
 logger = logging.getLogger(__name__)
 
+# Images can be passed as a file path, raw encoded bytes or a PIL image
+ImageInput = Union[str, bytes, Image.Image]
+
+# Vision model used for the OpenAI OCR fallback
+OPENAI_VISION_MODEL = "gpt-4-vision-preview"
+
+# Ollama's context window when neither the model nor the request sets one
+DEFAULT_NUM_CTX = 2048
+# Largest context window the adaptive mode asks for
+MAX_NUM_CTX = int(os.environ.get("OLLAMA_MAX_NUM_CTX", "32768"))
+# Fewest tokens a translation may generate in adaptive mode, so short texts
+# that expand (or come out in another script) aren't cut off
+MIN_PREDICT_TOKENS = 256
+# How many times more tokens a translation into each script takes than one
+# into a Latin-script language; estimate_tokens() counts the source, but
+# tokenizers split Cyrillic, Greek, Hebrew, Arabic and especially Indic and
+# Thai text into several tokens per character
+SCRIPT_LENGTH_FACTORS = {"latin": 1.0, "cjk": 1.5, "cyrillic": 2.0, "greek": 2.0, "hebrew": 2.0, "arabic": 2.0, "indic": 4.0}
+# Script of each target language by display name; languages not listed here
+# get the largest factor
+TARGET_SCRIPTS = {
+    **dict.fromkeys((
+        "English", "Spanish", "French", "German", "Italian", "Portuguese", "Dutch", "Swedish", "Finnish",
+        "Turkish", "Polish", "Czech", "Danish", "Hungarian", "Norwegian", "Vietnamese", "Indonesian", "Romanian"
+    ), "latin"),
+    **dict.fromkeys(("Japanese", "Chinese (Simplified)", "Chinese (Traditional)", "Korean"), "cjk"),
+    **dict.fromkeys(("Russian", "Ukrainian", "Bulgarian"), "cyrillic"),
+    "Greek": "greek",
+    "Hebrew": "hebrew",
+    **dict.fromkeys(("Arabic", "Persian"), "arabic"),
+    **dict.fromkeys(("Hindi", "Thai"), "indic")
+}
+
+def length_factor(target_language: Optional[str]) -> float:
+    """Return the output length factor of a target language's script."""
+    script = TARGET_SCRIPTS.get(target_language or "")
+    return SCRIPT_LENGTH_FACTORS[script] if script else max(SCRIPT_LENGTH_FACTORS.values())
+
+def truncated(result: Dict[str, Any]) -> bool:
+    """Whether an Ollama generate or OpenAI chat completion response stopped at its output token limit."""
+    if result.get("done_reason") == "length":
+        return True
+    choices = result.get("choices") or [{}]
+    return choices[0].get("finish_reason") == "length"
+
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly count the tokens of a text without a tokenizer.
+    
+    ASCII text averages about four characters per token; other scripts are
+    counted as one token per character, which errs on the long side.
+    """
+    ascii_chars = sum(1 for char in text if ord(char) < 128)
+    return math.ceil(ascii_chars / 4) + len(text) - ascii_chars
+
+def _model_tag(name: str) -> str:
+    """Return a model name with its tag, as Ollama reports it ("llava" -> "llava:latest")."""
+    return name if ":" in name.rsplit("/", 1)[-1] else f"{name}:latest"
+
+def encode_image(image: ImageInput, profile: Optional[ImageProfile] = None) -> Tuple[str, str]:
+    """
+    Base64-encode an image for a vision model request.
+    
+    PIL images are downscaled, converted and encoded according to the
+    profile straight into an in-memory buffer. File paths are read once and
+    bytes are used as they are, unless they exceed the profile's byte
+    budget, in which case they are decoded and re-encoded as well.
+    
+    Args:
+        image: File path, encoded image bytes or PIL image
+        profile: Preprocessing profile of the target model; defaults to DEFAULT_PROFILE
+        
+    Returns:
+        Tuple of (base64 string, MIME type)
+    """
+    profile = profile or DEFAULT_PROFILE
+    if isinstance(image, (bytes, bytearray)):
+        image_data = bytes(image)
+    elif isinstance(image, str):
+        with open(image, "rb") as f:
+            image_data = f.read()
+    else:
+        image_data = None
+    
+    if image_data is None:
+        image_data = profile.encode(image)
+    elif len(image_data) > profile.max_bytes:
+        with Image.open(io.BytesIO(image_data)) as decoded:
+            image_data = profile.encode(decoded)
+    
+    mime_type = "image/png" if image_data.startswith(b"\x89PNG") else "image/jpeg"
+    return base64.b64encode(image_data).decode("utf-8"), mime_type
+
 class OllamaClient:
     """Client for communicating with Ollama API for OCR and translation."""
     
@@ -20,6 +123,7 @@ class OllamaClient:
         # Model configuration
         self.ocr_model = os.environ.get("OLLAMA_OCR_MODEL", "llava")
         self.translation_model = os.environ.get("OLLAMA_TRANSLATION_MODEL", "mistral")
+        self.embedding_model = os.environ.get("OLLAMA_EMBEDDING_MODEL", "nomic-embed-text")
         
         # Feature flags
         self.use_openai_fallback = self.openai_api_key is not None
@@ -28,7 +132,73 @@ class OllamaClient:
         # Settings for model parameters
         self.temperature = float(os.environ.get("OLLAMA_TEMPERATURE", "0.3"))
         self.top_p = float(os.environ.get("OLLAMA_TOP_P", "0.9"))
-        self.max_tokens = int(os.environ.get("OLLAMA_MAX_TOKENS", "1000"))
+        # Output limit of translations; unset leaves Ollama to its default
+        # and sends OpenAI none
+        max_tokens = os.environ.get("OLLAMA_MAX_TOKENS")
+        self.max_tokens = int(max_tokens) if max_tokens else None
+        # Output limit of OCR, which is larger since a dense page holds a lot
+        # of text and there is no input text to size it from
+        self.ocr_max_tokens = int(os.environ.get("OLLAMA_OCR_MAX_TOKENS", "4096"))
+        # Context window sent to Ollama; 0 leaves it to the model
+        self.num_ctx = int(os.environ.get("OLLAMA_NUM_CTX", "0"))
+        # Size translation output limits and context from the source text
+        # and target script, never above max_tokens when that is set
+        self.adaptive_length = self._parse_boolean_env("OLLAMA_ADAPTIVE_LENGTH", False)
+        # Output tokens per source token for Latin-script targets, scaled by
+        # SCRIPT_LENGTH_FACTORS for other scripts
+        self.translation_length_ratio = float(os.environ.get("TRANSLATION_LENGTH_RATIO", "2.0"))
+        
+        # How long Ollama keeps each model loaded after its last request: a
+        # duration such as "30m", a number of seconds, or -1 for no limit
+        default_keep_alive = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+        self.keep_alive = {
+            "ocr": os.environ.get("OLLAMA_OCR_KEEP_ALIVE", default_keep_alive),
+            "translation": os.environ.get("OLLAMA_TRANSLATION_KEEP_ALIVE", default_keep_alive),
+            "embedding": os.environ.get("OLLAMA_EMBEDDING_KEEP_ALIVE", default_keep_alive)
+        }
+        
+        # How many OCR pages may be in flight at once for each backend
+        self.ocr_concurrency_limits = {
+            "ollama": int(os.environ.get("OLLAMA_OCR_CONCURRENCY", "2")),
+            "openai": int(os.environ.get("OPENAI_OCR_CONCURRENCY", "4"))
+        }
+        
+        # Pooled keep-alive sessions, one per backend, with their own retry
+        # limits, and (connect, read) timeouts
+        default_pool_size = os.environ.get("HTTP_POOL_SIZE", "10")
+        default_retries = os.environ.get("HTTP_MAX_RETRIES", "2")
+        self.ollama_session = build_session(
+            pool_size=int(os.environ.get("OLLAMA_POOL_SIZE", default_pool_size)),
+            max_retries=int(os.environ.get("OLLAMA_MAX_RETRIES", default_retries))
+        )
+        self.openai_session = build_session(
+            pool_size=int(os.environ.get("OPENAI_POOL_SIZE", default_pool_size)),
+            max_retries=int(os.environ.get("OPENAI_MAX_RETRIES", default_retries))
+        )
+        # The health probe runs while a request waits for it, so it gets no
+        # retries of its own: a failed probe means falling back
+        self.probe_session = build_session(pool_size=1, max_retries=0)
+        self.probe_timeout = get_timeout("OLLAMA_PROBE_TIMEOUT", 5)
+        self.ollama_timeout = get_timeout("OLLAMA_READ_TIMEOUT", 60)
+        self.openai_timeout = get_timeout("OPENAI_READ_TIMEOUT", 60)
+        # Embeddings sit in front of every model translation, so they get
+        # little time
+        self.embedding_timeout = get_timeout("OLLAMA_EMBED_READ_TIMEOUT", 5)
+        # Loading a large model from disk can take minutes
+        self.warmup_timeout = get_timeout("OLLAMA_WARMUP_TIMEOUT", 300)
+        
+        # Health tracking: the /api/tags probe result is cached for a TTL and
+        # each backend has a circuit breaker fed by failed generate calls
+        failure_threshold = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "3"))
+        recovery_timeout = float(os.environ.get("CIRCUIT_RECOVERY_TIMEOUT", "30"))
+        self.ollama_health = HealthTracker(
+            self._probe_ollama,
+            CircuitBreaker("ollama", failure_threshold, recovery_timeout),
+            ttl=float(os.environ.get("OLLAMA_HEALTH_TTL", "30"))
+        )
+        self.openai_breaker = CircuitBreaker("openai", failure_threshold, recovery_timeout)
+        # Embedding failures must not stop generation and OCR calls to Ollama
+        self.embedding_breaker = CircuitBreaker("ollama_embedding", failure_threshold, recovery_timeout)
         
         logger.info(f"Initialized Ollama client with OCR model: {self.ocr_model}, Translation model: {self.translation_model}")
         logger.info(f"Local Ollama {'enabled' if self.enable_local_ollama else 'disabled'}")
@@ -42,78 +212,360 @@ class OllamaClient:
         val = os.environ.get(env_var, str(default)).lower()
         return val in ("true", "1", "yes", "y", "t")
         
-    def _check_ollama_availability(self) -> bool:
-        """Check if Ollama API is available."""
+    def _probe_ollama(self) -> bool:
+        """
+        Actively probe the Ollama API, within the current request deadline.
+        
+        Raises:
+            DeadlineExceeded: If the deadline passed before or during the
+                probe, which then says nothing about Ollama's health
+        """
+        deadline = current_deadline()
+        timeout = deadline.cap(self.probe_timeout, "Ollama health probe") if deadline else self.probe_timeout
         try:
-            response = requests.get(f"{self.ollama_base_url}/api/tags", timeout=5)
+            response = self.probe_session.get(f"{self.ollama_base_url}/api/tags", timeout=timeout)
             return response.status_code == 200
         except requests.RequestException as e:
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded(f"Deadline of {deadline.seconds:g}s exceeded during Ollama health probe") from e
             logger.warning(f"Ollama API is not available: {e}")
             return False
+        
+    def _check_ollama_availability(self, deadline: Optional[Deadline] = None) -> bool:
+        """Check if Ollama API is available, using the cached health state."""
+        with deadline_scope(deadline or current_deadline()):
+            return self.ollama_health.is_available()
+    
+    def reset_health(self) -> None:
+        """Forget cached health state, e.g. after the Ollama URL changed."""
+        self.ollama_health.invalidate()
+        self.openai_breaker.reset()
+    
+    def models(self) -> Dict[str, str]:
+        """Return the configured Ollama model for each role."""
+        return {
+            "ocr": self.ocr_model,
+            "translation": self.translation_model,
+            "embedding": self.embedding_model
+        }
+    
+    def keep_alive_value(self, role: str) -> Union[str, int, float, None]:
+        """Return the keep_alive to send for a role's model, or None to use Ollama's default."""
+        value = str(self.keep_alive.get(role) or "").strip()
+        if not value:
+            return None
+        # Ollama reads plain numbers as seconds, but only as JSON numbers
+        for number in (int, float):
+            try:
+                return number(value)
+            except ValueError:
+                pass
+        return value
+    
+    def _with_keep_alive(self, payload: Dict[str, Any], role: str) -> Dict[str, Any]:
+        keep_alive = self.keep_alive_value(role)
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        return payload
+    
+    def warm_up(self, roles: Optional[List[str]] = None) -> Dict[str, bool]:
+        """
+        Load models into Ollama's memory so the next request doesn't wait for it.
+        
+        Args:
+            roles: Roles whose models to load ("ocr", "translation",
+                "embedding"); defaults to all
             
-    def process_image(self, image_path: str) -> str:
+        Returns:
+            Whether each role's model was loaded; empty if Ollama is not
+            reachable
+        """
+        # Gated on the same health probe as model requests, which don't
+        # depend on ENABLE_LOCAL_OLLAMA either
+        if not self._check_ollama_availability():
+            logger.info("Skipping model warm-up, Ollama is not available")
+            return {}
+        
+        results = {}
+        models = self.models()
+        for role in roles or list(models):
+            model = models[role]
+            if role == "embedding":
+                url = f"{self.ollama_base_url}/api/embed"
+                payload = {"model": model, "input": "warm-up"}
+            else:
+                # A generate request without a prompt only loads the model
+                url = f"{self.ollama_base_url}/api/generate"
+                payload = {"model": model}
+            self._with_keep_alive(payload, role)
+            
+            start = time.perf_counter()
+            try:
+                response = self.ollama_session.post(url, json=payload, timeout=self.warmup_timeout)
+                loaded = response.status_code == 200
+                if not loaded:
+                    logger.warning(f"Warm-up of {role} model {model} failed: {response.status_code}, {response.text[:200]}")
+            except requests.RequestException as e:
+                logger.warning(f"Warm-up of {role} model {model} failed: {e}")
+                loaded = False
+            elapsed = time.perf_counter() - start
+            MODEL_REQUEST_SECONDS.labels("ollama", "warmup", "ok" if loaded else "error").observe(elapsed)
+            if loaded:
+                logger.info(f"Warmed up {role} model {model} in {elapsed:.1f}s")
+            results[role] = loaded
+        return results
+    
+    def loaded_models(self) -> Optional[List[Dict[str, Any]]]:
+        """Return the models Ollama holds in memory (/api/ps), or None if it can't be asked."""
+        try:
+            response = self.ollama_session.get(f"{self.ollama_base_url}/api/ps", timeout=self.probe_timeout)
+            if response.status_code != 200:
+                return None
+            return response.json().get("models") or []
+        except (requests.RequestException, ValueError) as e:
+            logger.debug(f"Could not list loaded Ollama models: {e}")
+            return None
+    
+    def model_status(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Report whether each role's model is loaded in Ollama.
+        
+        Returns:
+            Per role: model name, keep_alive, status ("loaded", "cold", or
+            "unknown" if Ollama can't be reached) and, for loaded models,
+            when Ollama will unload them and their VRAM use
+        """
+        loaded = self.loaded_models() if self._check_ollama_availability() else None
+        by_name = {}
+        for entry in loaded or []:
+            for name in (entry.get("name"), entry.get("model")):
+                if name:
+                    by_name[_model_tag(name)] = entry
+        
+        status = {}
+        for role, model in self.models().items():
+            entry = by_name.get(_model_tag(model))
+            status[role] = {
+                "model": model,
+                "keep_alive": self.keep_alive.get(role),
+                "status": "unknown" if loaded is None else ("loaded" if entry else "cold"),
+                "expires_at": entry.get("expires_at") if entry else None,
+                "size_vram": entry.get("size_vram") if entry else None
+            }
+        return status
+    
+    def generation_settings(self) -> Dict[str, Any]:
+        """Generation settings that influence model output, used in cache keys."""
+        return {
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "max_tokens": self.max_tokens,
+            "num_ctx": self.num_ctx,
+            "adaptive_length": self.translation_length_ratio if self.adaptive_length else None
+        }
+    
+    def _length_limits(self, prompt: str, max_tokens: Optional[int], source: Optional[str] = None,
+                       target_language: Optional[str] = None) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Pick how many tokens a request may generate and the context it needs.
+        
+        Args:
+            prompt: Full prompt sent to the model
+            max_tokens: Most tokens the request may generate; None for no limit
+            source: Text whose length the output follows, e.g. the text to
+                translate; None uses max_tokens
+            target_language: Display name of the language the output is in
+            
+        Returns:
+            Tuple of (num_predict or None for no limit, num_ctx or None for
+            the model's default)
+        """
+        if not self.adaptive_length or source is None:
+            return max_tokens, self.num_ctx or None
+        
+        ratio = self.translation_length_ratio * length_factor(target_language)
+        num_predict = max(MIN_PREDICT_TOKENS, math.ceil(estimate_tokens(source) * ratio))
+        if max_tokens:
+            num_predict = min(max_tokens, num_predict)
+        num_ctx = self.num_ctx or None
+        needed = estimate_tokens(prompt) + num_predict
+        if needed > (self.num_ctx or DEFAULT_NUM_CTX):
+            # Rounded up to a power of two, since Ollama reloads the model
+            # whenever num_ctx changes
+            num_ctx = min(MAX_NUM_CTX, 1 << (needed - 1).bit_length())
+        return num_predict, num_ctx
+    
+    def _ollama_options(self, prompt: str, max_tokens: Optional[int], source: Optional[str] = None,
+                        target_language: Optional[str] = None) -> Dict[str, Any]:
+        num_predict, num_ctx = self._length_limits(prompt, max_tokens, source, target_language)
+        options = {"temperature": self.temperature, "top_p": self.top_p}
+        if num_predict:
+            options["num_predict"] = num_predict
+        if num_ctx:
+            options["num_ctx"] = num_ctx
+        return options
+    
+    def _openai_options(self, prompt: str, max_tokens: Optional[int], source: Optional[str] = None,
+                        target_language: Optional[str] = None) -> Dict[str, Any]:
+        num_predict, _ = self._length_limits(prompt, max_tokens, source, target_language)
+        options = {"temperature": self.temperature, "top_p": self.top_p}
+        if num_predict:
+            options["max_tokens"] = num_predict
+        return options
+    
+    def _retry_truncated(self, payload: Dict[str, Any], result: Dict[str, Any], backend: str) -> Optional[Dict[str, Any]]:
+        """
+        Check a translation response for output cut off at its token limit.
+        
+        Truncation is logged. An adaptive limit is only an estimate, so if
+        the response stopped below max_tokens the payload is returned with
+        the limit raised to max_tokens (or removed) to try once more.
+        
+        Args:
+            payload: Request payload, an Ollama or OpenAI translation payload
+            result: Decoded response
+            backend: "Ollama" or "OpenAI", for the log
+            
+        Returns:
+            The payload to retry with, or None
+        """
+        if not truncated(result):
+            return None
+        options, key = (payload["options"], "num_predict") if "options" in payload else (payload, "max_tokens")
+        limit = options.get(key)
+        if limit is None or (self.max_tokens and limit >= self.max_tokens):
+            logger.warning(f"{backend} translation stopped at its limit of {limit} tokens and may be incomplete")
+            return None
+        logger.warning(f"{backend} translation stopped at the adaptive limit of {limit} tokens, "
+                       f"retrying with {self.max_tokens or 'no limit'}")
+        options = dict(options)
+        if self.max_tokens:
+            options[key] = self.max_tokens
+        else:
+            del options[key]
+        return {**payload, "options": options} if key == "num_predict" else options
+    
+    def ocr_profile(self) -> ImageProfile:
+        """Return the image preprocessing profile of the configured OCR model."""
+        return image_profile(self.ocr_model)
+    
+    def ocr_concurrency(self) -> int:
+        """Return how many pages may be OCR'd in parallel on the backend that will serve them."""
+        if self._check_ollama_availability():
+            return max(1, self.ocr_concurrency_limits["ollama"])
+        if self.use_openai_fallback:
+            return max(1, self.ocr_concurrency_limits["openai"])
+        return 1
+    
+    def health_status(self) -> Dict[str, Any]:
+        """Return health and circuit breaker state for each backend."""
+        return {
+            "ollama": self.ollama_health.snapshot(),
+            "openai": {"circuit": self.openai_breaker.snapshot()},
+            "ollama_embedding": {"circuit": self.embedding_breaker.snapshot()}
+        }
+    
+    def _post(self, session: requests.Session, url: str, breaker: CircuitBreaker, timeout: Tuple[float, float],
+              deadline: Optional[Deadline] = None, operation: str = "generate", **kwargs) -> requests.Response:
+        """
+        POST to a backend, giving it only the time left before the deadline.
+        
+        Connection errors and timeouts count as backend failures, unless
+        the call was cut short by the caller's deadline. Latency and request
+        size are recorded per backend and operation.
+        """
+        if deadline is not None:
+            timeout = deadline.cap(timeout, url)
+        start = time.perf_counter()
+        try:
+            with deadline_scope(deadline):
+                response = session.post(url, timeout=timeout, **kwargs)
+        except requests.RequestException:
+            MODEL_REQUEST_SECONDS.labels(breaker.name, operation, "error").observe(time.perf_counter() - start)
+            if deadline is None or not deadline.expired():
+                breaker.record_failure()
+            raise
+        
+        outcome = "ok" if response.status_code == 200 else str(response.status_code)
+        MODEL_REQUEST_SECONDS.labels(breaker.name, operation, outcome).observe(time.perf_counter() - start)
+        if response.request is not None and response.request.body is not None:
+            MODEL_REQUEST_BYTES.labels(breaker.name, operation).observe(len(response.request.body))
+        return response
+            
+    def process_image(self, image: ImageInput, deadline: Optional[Deadline] = None) -> str:
         """
         Process image with Ollama vision model for OCR.
         
         Args:
-            image_path: Path to the image file
+            image: Path to the image file, encoded image bytes or a PIL image
+            deadline: Time by which the whole call, fallbacks included, must finish
             
         Returns:
             Extracted text from the image
         """
-        if not self._check_ollama_availability():
+        if not self._check_ollama_availability(deadline):
             if self.use_openai_fallback:
-                return self._process_image_with_openai(image_path)
+                record_fallback("ocr", "ollama", "openai")
+                return self._process_image_with_openai(image, None, deadline)
             else:
                 raise Exception("Ollama API is not available and no fallback configured")
         
+        # Encode once for the OCR model; the OpenAI fallback reuses the same payload
+        encoded = encode_image(image, self.ocr_profile())
+        base64_image = encoded[0]
+        
         try:
-            import base64
-            
-            # Read and encode the image
-            with open(image_path, "rb") as f:
-                image_data = f.read()
-            
-            base64_image = base64.b64encode(image_data).decode("utf-8")
-            
             # Prepare the request payload
-            payload = {
-                "model": self.ocr_model,
-                "prompt": "Extract all text from this image. Return only the extracted text without any commentary or explanation.",
-                "images": [base64_image],
-                "stream": False
-            }
+            payload = self._ocr_payload(base64_image)
             
             # Make the API request
-            response = requests.post(
+            response = self._post(
+                self.ollama_session,
                 f"{self.ollama_base_url}/api/generate",
-                json=payload,
-                timeout=60
+                self.ollama_health.breaker,
+                self.ollama_timeout,
+                deadline,
+                operation="ocr",
+                json=payload
             )
             
+            if response.status_code >= 500:
+                self.ollama_health.breaker.record_failure()
+            else:
+                self.ollama_health.breaker.record_success()
+            
             if response.status_code != 200:
                 logger.error(f"Ollama API error: {response.status_code}, {response.text}")
                 if self.use_openai_fallback:
-                    return self._process_image_with_openai(image_path)
+                    record_fallback("ocr", "ollama", "openai")
+                    return self._process_image_with_openai(image, encoded, deadline)
                 else:
                     raise Exception(f"Failed to process image with Ollama: {response.text}")
             
             result = response.json()
+            if truncated(result):
+                logger.warning(f"Ollama OCR stopped at its limit of {self.ocr_max_tokens} tokens and may be incomplete")
             return result.get("response", "").strip()
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error processing image with Ollama: {e}")
             if self.use_openai_fallback:
-                return self._process_image_with_openai(image_path)
+                record_fallback("ocr", "ollama", "openai")
+                return self._process_image_with_openai(image, encoded, deadline)
             else:
                 raise
     
-    def _process_image_with_openai(self, image_path: str) -> str:
+    def _process_image_with_openai(self, image: ImageInput, encoded: Optional[Tuple[str, str]] = None,
+                                   deadline: Optional[Deadline] = None) -> str:
         """
         Process image using OpenAI's Vision API as fallback.
         
         Args:
-            image_path: Path to the image file
+            image: Path to the image file, encoded image bytes or a PIL image
+            encoded: Already base64-encoded image and its MIME type, if available
+            deadline: Time by which the call must finish
             
         Returns:
             Extracted text from the image
@@ -121,118 +573,217 @@ class OllamaClient:
         if not self.openai_api_key:
             raise Exception("OpenAI API key not provided for fallback")
         
+        if not self.openai_breaker.allow_request():
+            raise Exception("OpenAI API circuit is open, skipping request")
+        
         try:
-            import base64
-            
-            # Read and encode the image
-            with open(image_path, "rb") as f:
-                image_data = f.read()
+            base64_image, mime_type = encoded or encode_image(image, image_profile(OPENAI_VISION_MODEL))
             
-            base64_image = base64.b64encode(image_data).decode("utf-8")
+            headers = self._openai_headers()
+            payload = self._openai_ocr_payload(base64_image, mime_type)
             
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.openai_api_key}"
-            }
-            
-            payload = {
-                "model": "gpt-4-vision-preview",
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": "Extract all text from this image. Return only the extracted text without any commentary."
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                "max_tokens": 1000
-            }
-            
-            response = requests.post(
+            response = self._post(
+                self.openai_session,
                 f"{self.openai_base_url}/chat/completions",
+                self.openai_breaker,
+                self.openai_timeout,
+                deadline,
+                operation="ocr",
                 headers=headers,
-                json=payload,
-                timeout=60
+                json=payload
             )
             
+            if response.status_code >= 500 or response.status_code == 429:
+                self.openai_breaker.record_failure()
+            else:
+                self.openai_breaker.record_success()
+            
             if response.status_code != 200:
                 logger.error(f"OpenAI API error: {response.status_code}, {response.text}")
                 raise Exception(f"Failed to process image with OpenAI: {response.text}")
             
             result = response.json()
+            if truncated(result):
+                logger.warning(f"OpenAI OCR stopped at its limit of {self.ocr_max_tokens} tokens and may be incomplete")
             return result["choices"][0]["message"]["content"].strip()
             
         except Exception as e:
             logger.error(f"Error processing image with OpenAI: {e}")
             raise
     
-    def translate(self, text: str, target_language: str) -> str:
+    def _ocr_payload(self, base64_image: str) -> Dict[str, Any]:
+        """Build the /api/generate payload for OCR of a base64-encoded image."""
+        prompt = "Extract all text from this image. Return only the extracted text without any commentary or explanation."
+        return self._with_keep_alive({
+            "model": self.ocr_model,
+            "prompt": prompt,
+            "images": [base64_image],
+            "stream": False,
+            "options": self._ollama_options(prompt, self.ocr_max_tokens)
+        }, "ocr")
+    
+    def _openai_ocr_payload(self, base64_image: str, mime_type: str) -> Dict[str, Any]:
+        """Build the /chat/completions payload for OCR of a base64-encoded image."""
+        prompt = "Extract all text from this image. Return only the extracted text without any commentary."
+        return {
+            "model": OPENAI_VISION_MODEL,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": prompt
+                        },
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:{mime_type};base64,{base64_image}"
+                            }
+                        }
+                    ]
+                }
+            ],
+            **self._openai_options(prompt, self.ocr_max_tokens)
+        }
+    
+    def _translation_payload(self, text: str, target_language: str, stream: bool,
+                             examples: Optional[List[Tuple[str, str]]] = None) -> Dict[str, Any]:
+        """
+        Build the /api/generate payload for a translation.
+        
+        Args:
+            text: Text to translate
+            target_language: Target language name
+            stream: Whether Ollama should stream the response
+            examples: Earlier (source, translation) pairs of similar text, shown
+                to the model so it keeps their terminology
+        """
+        prompt = f"Translate the following text to {target_language}:\n\n{text}\n\nTranslation:"
+        if examples:
+            shots = "\n\n".join(f"Text:\n{source}\nTranslation:\n{translation}" for source, translation in examples)
+            prompt = (f"Here are earlier translations of similar text to {target_language}. Keep their terminology "
+                      f"and phrasing where they apply.\n\n{shots}\n\n{prompt}")
+        return self._with_keep_alive({
+            "model": self.translation_model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": self._ollama_options(prompt, self.max_tokens, text, target_language)
+        }, "translation")
+    
+    def _openai_headers(self) -> Dict[str, str]:
+        return {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.openai_api_key}"
+        }
+    
+    def _openai_translation_payload(self, text: str, target_language: str, stream: bool,
+                                    examples: Optional[List[Tuple[str, str]]] = None) -> Dict[str, Any]:
+        """Build the /chat/completions payload for a translation, with earlier translations as prior turns."""
+        shots = []
+        for source, translation in examples or []:
+            shots.append({"role": "user", "content": source})
+            shots.append({"role": "assistant", "content": translation})
+        messages = [
+            {
+                "role": "system",
+                "content": f"You are a translator. Translate the user's text to {target_language}. Only respond with the translation, no explanations."
+            },
+            *shots,
+            {
+                "role": "user",
+                "content": text
+            }
+        ]
+        payload = {
+            "model": "gpt-3.5-turbo",
+            "messages": messages,
+            **self._openai_options("\n".join(message["content"] for message in messages), self.max_tokens, text,
+                                   target_language)
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+    
+    def translate(self, text: str, target_language: str, deadline: Optional[Deadline] = None,
+                  examples: Optional[List[Tuple[str, str]]] = None, fallback: bool = True) -> str:
         """
         Translate text using Ollama model.
         
         Args:
             text: Text to translate
             target_language: Target language code or name
+            deadline: Time by which the whole call, fallbacks included, must finish
+            examples: Earlier (source, translation) pairs shown to the model
+            fallback: Fall back to OpenAI if Ollama fails. Callers that store
+                the result per backend pass False and fall back themselves,
+                so OpenAI output is never attributed to Ollama.
             
         Returns:
             Translated text
         """
-        if not self._check_ollama_availability():
-            if self.use_openai_fallback:
-                return self._translate_with_openai(text, target_language)
+        use_openai_fallback = self.use_openai_fallback and fallback
+        
+        if not self._check_ollama_availability(deadline):
+            if use_openai_fallback:
+                record_fallback("translation", "ollama", "openai")
+                return self._translate_with_openai(text, target_language, deadline, examples)
             else:
-                raise Exception("Ollama API is not available and no fallback configured")
+                raise Exception("Ollama API is not available" if not fallback else "Ollama API is not available and no fallback configured")
         
         try:
             # Prepare the request payload
-            prompt = f"Translate the following text to {target_language}:\n\n{text}\n\nTranslation:"
+            payload = self._translation_payload(text, target_language, stream=False, examples=examples)
             
-            payload = {
-                "model": self.translation_model,
-                "prompt": prompt,
-                "stream": False
-            }
-            
-            # Make the API request
-            response = requests.post(
-                f"{self.ollama_base_url}/api/generate",
-                json=payload,
-                timeout=60
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"Ollama API error: {response.status_code}, {response.text}")
-                if self.use_openai_fallback:
-                    return self._translate_with_openai(text, target_language)
+            while payload is not None:
+                # Make the API request
+                response = self._post(
+                    self.ollama_session,
+                    f"{self.ollama_base_url}/api/generate",
+                    self.ollama_health.breaker,
+                    self.ollama_timeout,
+                    deadline,
+                    operation="translate",
+                    json=payload
+                )
+                
+                if response.status_code >= 500:
+                    self.ollama_health.breaker.record_failure()
                 else:
-                    raise Exception(f"Failed to translate with Ollama: {response.text}")
-            
-            result = response.json()
+                    self.ollama_health.breaker.record_success()
+                
+                if response.status_code != 200:
+                    logger.error(f"Ollama API error: {response.status_code}, {response.text}")
+                    if use_openai_fallback:
+                        record_fallback("translation", "ollama", "openai")
+                        return self._translate_with_openai(text, target_language, deadline, examples)
+                    else:
+                        raise Exception(f"Failed to translate with Ollama: {response.text}")
+                
+                result = response.json()
+                payload = self._retry_truncated(payload, result, "Ollama")
             return result.get("response", "").strip()
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error translating with Ollama: {e}")
-            if self.use_openai_fallback:
-                return self._translate_with_openai(text, target_language)
+            if use_openai_fallback:
+                record_fallback("translation", "ollama", "openai")
+                return self._translate_with_openai(text, target_language, deadline, examples)
             else:
                 raise
     
-    def _translate_with_openai(self, text: str, target_language: str) -> str:
+    def _translate_with_openai(self, text: str, target_language: str, deadline: Optional[Deadline] = None,
+                               examples: Optional[List[Tuple[str, str]]] = None) -> str:
         """
         Translate text using OpenAI API as fallback.
         
         Args:
             text: Text to translate
             target_language: Target language code or name
+            deadline: Time by which the call must finish
+            examples: Earlier (source, translation) pairs shown to the model
             
         Returns:
             Translated text
@@ -240,41 +791,230 @@ class OllamaClient:
         if not self.openai_api_key:
             raise Exception("OpenAI API key not provided for fallback")
         
+        if not self.openai_breaker.allow_request():
+            raise Exception("OpenAI API circuit is open, skipping request")
+        
         try:
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.openai_api_key}"
-            }
+            headers = self._openai_headers()
+            payload = self._openai_translation_payload(text, target_language, stream=False, examples=examples)
             
-            payload = {
-                "model": "gpt-3.5-turbo",
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": f"You are a translator. Translate the user's text to {target_language}. Only respond with the translation, no explanations."
-                    },
-                    {
-                        "role": "user",
-                        "content": text
-                    }
-                ],
-                "temperature": 0.3
-            }
+            while payload is not None:
+                response = self._post(
+                    self.openai_session,
+                    f"{self.openai_base_url}/chat/completions",
+                    self.openai_breaker,
+                    self.openai_timeout,
+                    deadline,
+                    operation="translate",
+                    headers=headers,
+                    json=payload
+                )
+                
+                if response.status_code >= 500 or response.status_code == 429:
+                    self.openai_breaker.record_failure()
+                else:
+                    self.openai_breaker.record_success()
+                
+                if response.status_code != 200:
+                    logger.error(f"OpenAI API error: {response.status_code}, {response.text}")
+                    raise Exception(f"Failed to translate with OpenAI: {response.text}")
+                
+                result = response.json()
+                payload = self._retry_truncated(payload, result, "OpenAI")
+            return result["choices"][0]["message"]["content"].strip()
             
-            response = requests.post(
-                f"{self.openai_base_url}/chat/completions",
-                headers=headers,
+        except Exception as e:
+            logger.error(f"Error translating with OpenAI: {e}")
+            raise
+    
+    def embed(self, texts: List[str], deadline: Optional[Deadline] = None) -> List[List[float]]:
+        """
+        Embed texts with the Ollama embedding model.
+        
+        Args:
+            texts: Texts to embed
+            deadline: Time by which the call must finish
+            
+        Returns:
+            One embedding vector per text
+        """
+        if not self._check_ollama_availability(deadline):
+            raise Exception("Ollama API is not available")
+        if not self.embedding_breaker.allow_request():
+            raise Exception("Ollama embedding circuit is open, skipping request")
+        
+        response = self._post(
+            self.ollama_session,
+            f"{self.ollama_base_url}/api/embed",
+            self.embedding_breaker,
+            self.embedding_timeout,
+            deadline,
+            operation="embed",
+            json=self._with_keep_alive({"model": self.embedding_model, "input": texts}, "embedding")
+        )
+        if response.status_code >= 500:
+            self.embedding_breaker.record_failure()
+        else:
+            self.embedding_breaker.record_success()
+        if response.status_code != 200:
+            raise Exception(f"Failed to embed with Ollama: {response.status_code}, {response.text}")
+        return response.json()["embeddings"]
+    
+    def translate_stream(self, text: str, target_language: str,
+                         examples: Optional[List[Tuple[str, str]]] = None,
+                         deadline: Optional[Deadline] = None, fallback: bool = True) -> Iterator[str]:
+        """
+        Translate text using Ollama model, yielding tokens as they are generated.
+        
+        Falls back to a streamed OpenAI translation if Ollama is unavailable or
+        fails before producing any output. Closing the generator closes the
+        upstream connection, which makes Ollama stop generating.
+        
+        Args:
+            text: Text to translate
+            target_language: Target language code or name
+            examples: Earlier (source, translation) pairs shown to the model
+            deadline: Time by which the whole stream, fallback included, must
+                finish; defaults to the current deadline
+            fallback: Fall back to OpenAI if Ollama fails, as in `translate`
+            
+        Returns:
+            Iterator over translated text fragments
+            
+        Raises:
+            DeadlineExceeded: If the deadline passes before the stream ends
+        """
+        deadline = deadline or current_deadline()
+        use_openai_fallback = self.use_openai_fallback and fallback
+        if not self._check_ollama_availability(deadline):
+            if use_openai_fallback:
+                record_fallback("translation", "ollama", "openai")
+                yield from self._translate_with_openai_stream(text, target_language, examples, deadline)
+                return
+            raise Exception("Ollama API is not available" if not fallback else "Ollama API is not available and no fallback configured")
+        
+        payload = self._translation_payload(text, target_language, stream=True, examples=examples)
+        timeout = deadline.cap(self.ollama_timeout, "Ollama stream") if deadline else self.ollama_timeout
+        
+        try:
+            response = self.ollama_session.post(
+                f"{self.ollama_base_url}/api/generate",
                 json=payload,
-                timeout=60
+                timeout=timeout,
+                stream=True
             )
+        except requests.RequestException as e:
+            if deadline is None or not deadline.expired():
+                self.ollama_health.breaker.record_failure()
+            logger.error(f"Error streaming translation from Ollama: {e}")
+            if use_openai_fallback:
+                record_fallback("translation", "ollama", "openai")
+                yield from self._translate_with_openai_stream(text, target_language, examples, deadline)
+                return
+            raise
+        
+        try:
+            if response.status_code >= 500:
+                self.ollama_health.breaker.record_failure()
+            else:
+                self.ollama_health.breaker.record_success()
             
             if response.status_code != 200:
-                logger.error(f"OpenAI API error: {response.status_code}, {response.text}")
-                raise Exception(f"Failed to translate with OpenAI: {response.text}")
+                logger.error(f"Ollama API error: {response.status_code}, {response.text}")
+                if not use_openai_fallback:
+                    raise Exception(f"Failed to translate with Ollama: {response.text}")
+            else:
+                # Ollama streams one JSON object per line
+                for line in response.iter_lines():
+                    if deadline is not None:
+                        deadline.check("the end of the Ollama stream")
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise Exception(f"Ollama stream error: {chunk['error']}")
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        if truncated(chunk):
+                            logger.warning(f"Ollama translation stream stopped at its limit of "
+                                           f"{payload['options'].get('num_predict')} tokens and may be incomplete")
+                        break
+                return
+        finally:
+            response.close()
+        
+        record_fallback("translation", "ollama", "openai")
+        yield from self._translate_with_openai_stream(text, target_language, examples, deadline)
+    
+    def _translate_with_openai_stream(self, text: str, target_language: str,
+                                      examples: Optional[List[Tuple[str, str]]] = None,
+                                      deadline: Optional[Deadline] = None) -> Iterator[str]:
+        """
+        Translate text using OpenAI API as fallback, yielding tokens as they arrive.
+        
+        Args:
+            text: Text to translate
+            target_language: Target language code or name
+            examples: Earlier (source, translation) pairs shown to the model
+            deadline: Time by which the stream must finish; defaults to the
+                current deadline
             
-            result = response.json()
-            return result["choices"][0]["message"]["content"].strip()
+        Returns:
+            Iterator over translated text fragments
             
-        except Exception as e:
-            logger.error(f"Error translating with OpenAI: {e}")
+        Raises:
+            DeadlineExceeded: If the deadline passes before the stream ends
+        """
+        deadline = deadline or current_deadline()
+        if not self.openai_api_key:
+            raise Exception("OpenAI API key not provided for fallback")
+        
+        # Don't start a fallback there is no time left for
+        timeout = deadline.cap(self.openai_timeout, "OpenAI stream") if deadline else self.openai_timeout
+        
+        if not self.openai_breaker.allow_request():
+            raise Exception("OpenAI API circuit is open, skipping request")
+        
+        try:
+            response = self.openai_session.post(
+                f"{self.openai_base_url}/chat/completions",
+                headers=self._openai_headers(),
+                json=self._openai_translation_payload(text, target_language, stream=True, examples=examples),
+                timeout=timeout,
+                stream=True
+            )
+        except requests.RequestException as e:
+            if deadline is None or not deadline.expired():
+                self.openai_breaker.record_failure()
+            logger.error(f"Error streaming translation from OpenAI: {e}")
             raise
+        
+        try:
+            if response.status_code >= 500 or response.status_code == 429:
+                self.openai_breaker.record_failure()
+            else:
+                self.openai_breaker.record_success()
+            
+            if response.status_code != 200:
+                logger.error(f"OpenAI API error: {response.status_code}, {response.text}")
+                raise Exception(f"Failed to translate with OpenAI: {response.text}")
+            
+            # Server-sent events: "data: {...}" lines, terminated by "data: [DONE]"
+            for line in response.iter_lines(decode_unicode=True):
+                if deadline is not None:
+                    deadline.check("the end of the OpenAI stream")
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                if truncated(event):
+                    logger.warning("OpenAI translation stream stopped at its token limit and may be incomplete")
+                choices = event.get("choices") or [{}]
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+        finally:
+            response.close()
@@ -0,0 +1,172 @@
+import os
+import time
+import random
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Optional, Tuple, Iterator, Dict, Any
+
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline passes before a stage could run."""
+
+
+class Deadline:
+    """
+    Point in time by which a request must be answered.
+
+    Every hop of a request (model call, retry, fallback provider) gets only
+    the time that is left, instead of its own full timeout.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self, stage: str) -> None:
+        """Raise DeadlineExceeded if no time is left for `stage`."""
+        if self.expired():
+            raise DeadlineExceeded(f"Deadline of {self.seconds:g}s exceeded before {stage}")
+
+    def cap(self, timeout: Tuple[float, float], stage: str = "request") -> Tuple[float, float]:
+        """
+        Shorten a (connect, read) timeout to the remaining time.
+
+        Raises:
+            DeadlineExceeded: If the deadline has already passed
+        """
+        self.check(stage)
+        remaining = self.remaining()
+        connect, read = timeout
+        return min(connect, remaining), min(read, remaining)
+
+
+# Deadline of the request the current thread is working on. Set around
+# calls into code that can't take it as an argument (deep_translator,
+# urllib3 retries).
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[None]:
+    """Make `deadline` the current deadline for the duration of a `with` block."""
+    token = _current_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _current_deadline.reset(token)
+
+
+class RetryBudget:
+    """
+    Process-wide allowance for retries.
+
+    Every request earns `ratio` of a retry and every retry spends one, so
+    retries stay a bounded fraction of traffic however many providers fail
+    at once. `min_per_second` retries are always allowed so a quiet process
+    can still retry.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, max_tokens: float = 100.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+
+        self._lock = threading.Lock()
+        self._tokens = max_tokens * ratio
+        self._refilled_at = time.monotonic()
+        self._counters = {"requests": 0, "retries": 0, "denied": 0}
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._counters["requests"] += 1
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Take one retry from the budget; False if it is exhausted."""
+        now = time.monotonic()
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + (now - self._refilled_at) * self.min_per_second)
+            self._refilled_at = now
+            if self._tokens >= 1.0 - 1e-9:
+                self._tokens -= 1.0
+                self._counters["retries"] += 1
+                return True
+            self._counters["denied"] += 1
+            return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._counters)
+            snapshot["available"] = round(self._tokens, 2)
+        return snapshot
+
+
+# Shared by every pooled session of this process
+retry_budget = RetryBudget(
+    ratio=float(os.environ.get("RETRY_BUDGET_RATIO", "0.2")),
+    min_per_second=float(os.environ.get("RETRY_BUDGET_MIN_PER_SECOND", "1"))
+)
+
+
+class BudgetedRetry(Retry):
+    """
+    urllib3 retry policy with full-jitter backoff, a retry budget and deadlines.
+
+    A retry is only made if the shared budget allows it and the current
+    deadline leaves time for the backoff; otherwise the last error or
+    response is returned to the caller as if retries were exhausted.
+    """
+
+    def __init__(self, *args, budget: Optional[RetryBudget] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.budget = budget
+
+    def new(self, **kw: Any) -> "BudgetedRetry":
+        retry = super().new(**kw)
+        retry.budget = self.budget
+        return retry
+
+    def _backoff_cap(self) -> float:
+        errors = sum(1 for entry in self.history if entry.redirect_location is None)
+        if errors == 0:
+            return 0.0
+        return min(self.backoff_max, self.backoff_factor * (2 ** (errors - 1)))
+
+    def get_backoff_time(self) -> float:
+        # Full jitter spreads out retries of clients that failed together
+        return random.uniform(0, self._backoff_cap())
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        retry = super().increment(method, url, response, error, _pool, _stacktrace)
+
+        deadline = current_deadline()
+        if deadline is not None:
+            wait = retry._backoff_cap()
+            if response is not None and self.respect_retry_after_header:
+                wait = max(wait, retry.get_retry_after(response) or 0)
+            if deadline.remaining() <= wait:
+                logger.debug(f"Not retrying {url}: deadline leaves no time")
+                raise MaxRetryError(_pool, url, error or ResponseError("deadline leaves no time to retry"))
+
+        if self.budget is not None and not self.budget.try_spend():
+            logger.warning(f"Not retrying {url}: retry budget exhausted")
+            raise MaxRetryError(_pool, url, error or ResponseError("retry budget exhausted"))
+
+        return retry
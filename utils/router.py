@@ -0,0 +1,130 @@
+import math
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderStats:
+    """EWMA latency and error rate of one provider, plus a window of recent latencies."""
+
+    def __init__(self, alpha: float, window: int):
+        self.alpha = alpha
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.samples = 0
+        self.recent: "deque[float]" = deque(maxlen=window)
+
+    def record(self, latency: float, ok: bool) -> None:
+        self.samples += 1
+        self.error_rate += self.alpha * ((0.0 if ok else 1.0) - self.error_rate)
+        # Failures often return fast; only successful calls say how long a
+        # useful answer takes
+        if ok:
+            self.latency = latency if self.latency is None else self.latency + self.alpha * (latency - self.latency)
+            self.recent.append(latency)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+class ProviderRouter:
+    """
+    Picks the provider expected to answer fastest.
+
+    Every provider call reports its latency and outcome. Providers are
+    ranked by EWMA latency, inflated by their recent error rate; providers
+    that don't support the target language, are not configured or are
+    failing more often than `max_error_rate` are skipped. Providers without
+    measurements yet are ranked at `default_latency` so they get tried.
+    """
+
+    def __init__(self, providers: Iterable[str], language_support: Dict[str, List[str]], alpha: float = 0.2,
+                 window: int = 200, default_latency: float = 1.0, max_error_rate: float = 0.5,
+                 min_samples: int = 20):
+        self.providers = list(providers)
+        self.language_support = language_support
+        self.default_latency = default_latency
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+
+        self._lock = threading.Lock()
+        self._stats = {provider: ProviderStats(alpha, window) for provider in self.providers}
+
+    def record(self, provider: str, latency: float, ok: bool) -> None:
+        """Record the latency and outcome of one call to a provider."""
+        with self._lock:
+            stats = self._stats.get(provider)
+            if stats is not None:
+                stats.record(latency, ok)
+
+    def supports(self, provider: str, target_language: str) -> bool:
+        supported = self.language_support.get(provider)
+        return supported is None or target_language in supported
+
+    def _score(self, stats: ProviderStats) -> float:
+        latency = stats.latency if stats.latency is not None else self.default_latency
+        return latency * (1.0 + 4.0 * stats.error_rate)
+
+    def rank(self, target_language: str, exclude: Iterable[str] = (),
+             is_available: Optional[Callable[[str], bool]] = None) -> List[str]:
+        """
+        Return usable providers for a language, fastest expected first.
+
+        Args:
+            target_language: Normalized target language code
+            exclude: Providers not to include
+            is_available: Returns False for providers that are not
+                configured or whose circuit is open
+
+        Returns:
+            Provider names; failing providers only if nothing else is left
+        """
+        excluded = set(exclude)
+        candidates = [provider for provider in self.providers
+                      if provider not in excluded and self.supports(provider, target_language)
+                      and (is_available is None or is_available(provider))]
+        with self._lock:
+            scored = [(self._score(self._stats[provider]), self._stats[provider].error_rate, provider)
+                      for provider in candidates]
+        healthy = [entry for entry in scored if entry[1] <= self.max_error_rate]
+        return [provider for _, _, provider in sorted(healthy or scored)]
+
+    def choose(self, target_language: str, is_available: Optional[Callable[[str], bool]] = None,
+               default: str = 'google') -> str:
+        """Return the provider expected to answer fastest for a language."""
+        ranked = self.rank(target_language, is_available=is_available)
+        provider = ranked[0] if ranked else default
+        logger.debug(f"Router picked {provider} for {target_language} out of {ranked}")
+        return provider
+
+    def hedge_delay(self, provider: str, default: float) -> float:
+        """
+        Return how long to wait for a provider before hedging.
+
+        This is the provider's p95 latency once `min_samples` calls have
+        been measured, and `default` until then.
+        """
+        with self._lock:
+            stats = self._stats.get(provider)
+            if stats is None or len(stats.recent) < self.min_samples:
+                return default
+            return stats.percentile(0.95)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serializable view of every provider's statistics."""
+        with self._lock:
+            return {
+                provider: {
+                    "ewma_latency": round(stats.latency, 3) if stats.latency is not None else None,
+                    "p95_latency": round(stats.percentile(0.95), 3) if stats.recent else None,
+                    "error_rate": round(stats.error_rate, 3),
+                    "samples": stats.samples
+                }
+                for provider, stats in self._stats.items()
+            }
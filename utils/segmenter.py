@@ -0,0 +1,86 @@
+import logging
+from typing import Callable, List, NamedTuple
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+logger = logging.getLogger(__name__)
+
+# Split on paragraphs first, then lines, then sentence ends, then words.
+# Separators are kept at the end of each piece so no text is lost.
+SEPARATORS = [
+    r"\n\s*\n",
+    r"\n",
+    r"(?<=[.!?;:])\s+",
+    r"(?<=[。！？；])",
+    r"\s+",
+    ""
+]
+
+
+class Segment(NamedTuple):
+    """A piece of text to translate plus the whitespace around it."""
+    leading: str
+    text: str
+    trailing: str
+
+
+def split_text(text: str, max_length: int, length_function: Callable[[str], int] = len) -> List[Segment]:
+    """
+    Split text into chunks of at most `max_length` characters, or whatever
+    unit `length_function` counts.
+
+    Chunks end on paragraph, line or sentence boundaries where possible and
+    small paragraphs are packed together. The whitespace around each chunk
+    is kept separately so the original layout can be restored.
+
+    Args:
+        text: The text to split
+        max_length: Maximum chunk length the provider accepts
+        length_function: Measures a chunk's length, e.g. in estimated tokens
+            instead of characters
+
+    Returns:
+        List of segments; joining leading + text + trailing of every segment
+        reproduces the input exactly
+    """
+    if length_function(text) <= max_length:
+        pieces = [text]
+    else:
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=max_length,
+            chunk_overlap=0,
+            length_function=length_function,
+            separators=SEPARATORS,
+            is_separator_regex=True,
+            keep_separator="end",
+            strip_whitespace=False
+        )
+        pieces = splitter.split_text(text)
+
+    segments = []
+    for piece in pieces:
+        core = piece.strip()
+        if not core:
+            segments.append(Segment(piece, "", ""))
+            continue
+        start = piece.index(core)
+        segments.append(Segment(piece[:start], core, piece[start + len(core):]))
+
+    logger.debug(f"Split {len(text)} chars into {len(segments)} segment(s) of at most {max_length}")
+    return segments
+
+
+def join_segments(segments: List[Segment], translations: List[str]) -> str:
+    """
+    Reassemble translated segments with their original surrounding whitespace.
+
+    Args:
+        segments: Segments returned by `split_text`
+        translations: Translation of each segment's text, in the same order
+
+    Returns:
+        The reassembled text
+    """
+    return "".join(
+        segment.leading + translation + segment.trailing
+        for segment, translation in zip(segments, translations)
+    )
@@ -0,0 +1,187 @@
+import os
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import pytesseract
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# A Tesseract result is accepted without the vision model when its mean word
+# confidence is at least TESSERACT_MIN_CONFIDENCE, at least
+# TESSERACT_MIN_COVERAGE of its words reach TESSERACT_WORD_CONFIDENCE, and it
+# has at least TESSERACT_MIN_WORDS words. Confidences are 0-100.
+MIN_CONFIDENCE = float(os.environ.get("TESSERACT_MIN_CONFIDENCE", "80"))
+WORD_CONFIDENCE = float(os.environ.get("TESSERACT_WORD_CONFIDENCE", "60"))
+MIN_COVERAGE = float(os.environ.get("TESSERACT_MIN_COVERAGE", "0.9"))
+MIN_WORDS = int(os.environ.get("TESSERACT_MIN_WORDS", "3"))
+
+# Region escalation only pays off for a few small regions; beyond these the
+# whole page is sent to the vision model instead
+REGION_MAX_COUNT = int(os.environ.get("OCR_REGION_MAX_COUNT", "4"))
+REGION_MAX_SHARE = float(os.environ.get("OCR_REGION_MAX_SHARE", "0.5"))
+REGION_PADDING = 8
+
+# Set once the tesseract binary turned out to be missing, so the fast path
+# is skipped instead of failing on every page
+_unavailable = False
+
+
+def settings() -> Dict[str, float]:
+    """Thresholds that decide which text is returned, for cache keys."""
+    return {
+        "min_confidence": MIN_CONFIDENCE,
+        "word_confidence": WORD_CONFIDENCE,
+        "min_coverage": MIN_COVERAGE,
+        "min_words": MIN_WORDS,
+        "region_max_count": REGION_MAX_COUNT,
+        "region_max_share": REGION_MAX_SHARE
+    }
+
+
+def _mean(values: List[float]) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+def _coverage(confidences: List[float]) -> float:
+    if not confidences:
+        return 0.0
+    return sum(1 for conf in confidences if conf >= WORD_CONFIDENCE) / len(confidences)
+
+
+@dataclass
+class Block:
+    """A text block found by Tesseract, with its words grouped into lines."""
+    number: int
+    lines: Dict[Tuple[int, int], List[str]] = field(default_factory=dict)
+    confidences: List[float] = field(default_factory=list)
+    box: Optional[List[int]] = None  # left, top, right, bottom
+
+    def add_word(self, line: Tuple[int, int], word: str, confidence: float, box: Tuple[int, int, int, int]) -> None:
+        self.lines.setdefault(line, []).append(word)
+        self.confidences.append(confidence)
+        left, top, right, bottom = box
+        if self.box is None:
+            self.box = [left, top, right, bottom]
+        else:
+            self.box = [min(self.box[0], left), min(self.box[1], top),
+                        max(self.box[2], right), max(self.box[3], bottom)]
+
+    @property
+    def text(self) -> str:
+        return "\n".join(" ".join(words) for words in self.lines.values())
+
+    @property
+    def confident(self) -> bool:
+        return _mean(self.confidences) >= MIN_CONFIDENCE and _coverage(self.confidences) >= MIN_COVERAGE
+
+
+@dataclass
+class PageResult:
+    """Words Tesseract read from a page, and how sure it is of them."""
+    blocks: List[Block]
+
+    @property
+    def confidences(self) -> List[float]:
+        return [conf for block in self.blocks for conf in block.confidences]
+
+    @property
+    def mean_confidence(self) -> float:
+        return _mean(self.confidences)
+
+    @property
+    def coverage(self) -> float:
+        return _coverage(self.confidences)
+
+    @property
+    def word_count(self) -> int:
+        return len(self.confidences)
+
+    def accepted(self) -> bool:
+        """Whether the text is good enough to return without the vision model."""
+        return (self.word_count >= MIN_WORDS
+                and self.mean_confidence >= MIN_CONFIDENCE
+                and self.coverage >= MIN_COVERAGE)
+
+    def low_confidence_blocks(self) -> Optional[List[Block]]:
+        """
+        Blocks to re-read with the vision model.
+
+        Returns:
+            The blocks below the thresholds, or None if they are too many or
+            too large a share of the page, or the page has too few words, so
+            that the whole page should be re-read instead
+        """
+        if self.word_count < MIN_WORDS:
+            return None
+        low = [block for block in self.blocks if not block.confident]
+        low_words = sum(len(block.confidences) for block in low)
+        if len(low) > REGION_MAX_COUNT or low_words > REGION_MAX_SHARE * self.word_count:
+            return None
+        return low
+
+    def text(self, replacements: Optional[Dict[int, str]] = None) -> str:
+        """
+        Page text in reading order, blocks separated by blank lines.
+
+        Args:
+            replacements: Text to use instead of Tesseract's, by block number
+        """
+        replacements = replacements or {}
+        return "\n\n".join(replacements.get(block.number, block.text) for block in self.blocks).strip()
+
+
+def crop(image: Image.Image, block: Block) -> Image.Image:
+    """Cut a block out of the page image, with a little margin."""
+    left, top, right, bottom = block.box
+    return image.crop((
+        max(0, left - REGION_PADDING),
+        max(0, top - REGION_PADDING),
+        min(image.width, right + REGION_PADDING),
+        min(image.height, bottom + REGION_PADDING)
+    ))
+
+
+def read_page(image: Image.Image) -> Optional[PageResult]:
+    """
+    Run Tesseract on a page and collect its words with their confidences.
+
+    Args:
+        image: Preprocessed page image
+
+    Returns:
+        The page result, or None if Tesseract is not installed or failed
+    """
+    global _unavailable
+    if _unavailable:
+        return None
+
+    try:
+        data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+    except pytesseract.TesseractNotFoundError:
+        logger.warning("Tesseract is not installed, OCR fast path disabled")
+        _unavailable = True
+        return None
+    except Exception as e:
+        logger.warning(f"Tesseract failed, using the vision model: {e}")
+        return None
+
+    blocks: Dict[int, Block] = {}
+    for i, word in enumerate(data["text"]):
+        word = word.strip()
+        confidence = float(data["conf"][i])
+        if not word or confidence < 0:
+            continue
+
+        number = data["block_num"][i]
+        block = blocks.setdefault(number, Block(number))
+        left, top = data["left"][i], data["top"][i]
+        block.add_word(
+            (data["par_num"][i], data["line_num"][i]),
+            word,
+            confidence,
+            (left, top, left + data["width"][i], top + data["height"][i])
+        )
+
+    return PageResult(list(blocks.values()))
@@ -0,0 +1,444 @@
+import os
+import re
+import time
+import fcntl
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from utils.cache import CACHE_DB_PATH, normalize_text, make_cache_key
+from utils.metrics import CACHE_LOOKUPS
+from utils.retry import Deadline, DeadlineExceeded, current_deadline
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("TRANSLATION_MEMORY_ENABLED", "true").lower() in ("true", "1", "yes", "y", "t")
+# FAISS index snapshots, one per embedding model, translation model and
+# target language
+INDEX_DIR = os.environ.get("TRANSLATION_MEMORY_DIR", os.path.join(tempfile.gettempdir(), "rag_translator_memory"))
+
+# A stored translation is reused as is when both the embedding similarity and
+# the character-level similarity of its source reach this, and both sources
+# contain the same numbers
+REUSE_THRESHOLD = float(os.environ.get("TRANSLATION_MEMORY_REUSE_THRESHOLD", "0.97"))
+# Less similar matches above this are given to the model as examples
+EXAMPLE_THRESHOLD = float(os.environ.get("TRANSLATION_MEMORY_EXAMPLE_THRESHOLD", "0.75"))
+MAX_EXAMPLES = int(os.environ.get("TRANSLATION_MEMORY_EXAMPLES", "3"))
+
+# Entries older than this are dropped, and beyond this many the oldest are
+TTL = float(os.environ.get("TRANSLATION_MEMORY_TTL", str(90 * 24 * 3600)))
+MAX_ENTRIES = int(os.environ.get("TRANSLATION_MEMORY_MAX_ENTRIES", "100000"))
+PRUNE_EVERY = 100
+
+# Only model providers are given examples. Serving their stored output for
+# a request that asked for another provider would ignore that choice.
+PROVIDERS = ("ollama", "openai")
+
+# Bumped when stored entries can't be trusted anymore. Before version 2,
+# OpenAI fallback output could be stored as Ollama's.
+SCHEMA_VERSION = 2
+
+# New rows of other workers are picked up at most this often per language
+SYNC_INTERVAL = 1.0
+# The on-disk index is rewritten after this many vectors were added to it
+SNAPSHOT_EVERY = int(os.environ.get("TRANSLATION_MEMORY_SNAPSHOT_EVERY", "100"))
+# After a failed embedding call, only exact matches are served for this long
+EMBED_RETRY_AFTER = 60.0
+# The embedding call is skipped when it could take more than this share of
+# the time left before the request's deadline
+EMBED_DEADLINE_SHARE = 0.5
+
+_NUMBERS = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def _source_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def _near_exact(text: str, source: str) -> bool:
+    """Whether two sources differ so little that one's translation serves the other."""
+    if _NUMBERS.findall(text) != _NUMBERS.findall(source):
+        return False
+    a, b = normalize_text(text).lower(), normalize_text(source).lower()
+    return SequenceMatcher(None, a, b, autojunk=False).ratio() >= REUSE_THRESHOLD
+
+
+@dataclass
+class MemoryMatch:
+    """A stored translation of a source similar to the text being translated."""
+    source: str
+    translation: str
+    similarity: float
+
+
+@dataclass
+class MemoryLookup:
+    """
+    What the translation memory knows about a text.
+
+    Attributes:
+        reuse: Stored translation to return without calling a model
+        examples: Similar translations to show the model
+        embedding: Embedding of the text, kept to store its translation
+    """
+    reuse: Optional[str] = None
+    examples: List[MemoryMatch] = field(default_factory=list)
+    embedding: Optional[np.ndarray] = None
+
+
+class _LanguageIndex:
+    """In-process FAISS index of one target language, kept in step with the database."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index: Optional[faiss.Index] = None
+        self.last_id = 0
+        self.unsaved = 0
+        self.synced_at = 0.0
+        self.lock = threading.Lock()
+
+        if os.path.exists(path):
+            try:
+                self.index = faiss.read_index(path)
+                if self.index.ntotal:
+                    self.last_id = int(faiss.vector_to_array(self.index.id_map).max())
+            except RuntimeError as e:
+                logger.warning(f"Ignoring unreadable translation memory index {path}: {e}")
+                self.index = None
+
+    def add(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        if self.index is None:
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(vectors.shape[1]))
+        self.index.add_with_ids(vectors, ids)
+        self.unsaved += len(ids)
+
+    def drop_before(self, first_id: Optional[int]) -> None:
+        """
+        Drop the vectors of rows evicted from the database, which are the oldest.
+
+        Rows deleted otherwise (a replaced entry) leave a stale vector,
+        whose search results are skipped when their row is not found.
+        """
+        if self.index is None or not self.index.ntotal:
+            return
+        if first_id is None:
+            self.index.reset()
+        else:
+            removed = self.index.remove_ids(faiss.IDSelectorRange(0, first_id))
+            if not removed:
+                return
+        self.unsaved += 1
+
+    def search(self, vector: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        if self.index is None or not self.index.ntotal or self.index.d != vector.shape[0]:
+            return []
+        scores, ids = self.index.search(vector.reshape(1, -1), min(k, self.index.ntotal))
+        return [(int(i), float(score)) for i, score in zip(ids[0], scores[0]) if i >= 0]
+
+    def save(self) -> None:
+        """Write the index to disk, unless another worker is writing it right now."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f"{self.path}.lock", "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+            # Readers only ever see a complete file
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            faiss.write_index(self.index, temp_path)
+            os.replace(temp_path, self.path)
+        self.unsaved = 0
+
+
+class TranslationMemory:
+    """
+    Translation memory of (source segment, target language, translation).
+
+    Entries are kept apart per provider, model and generation settings, so
+    a translation is only reused for requests that would have produced it,
+    and only for the model providers in PROVIDERS.
+
+    Entries live in a table of the shared cache database, so every gunicorn
+    worker sees every other worker's translations. Each worker keeps a
+    FAISS inner-product index of the normalized source embeddings per
+    target language and model and adds the rows it has not seen yet before
+    searching. The index is snapshotted to TRANSLATION_MEMORY_DIR so a new
+    worker only has to load the rows written since the last snapshot.
+    Entries expire after TTL and the oldest are evicted beyond MAX_ENTRIES;
+    ids only grow, so workers drop evicted vectors by id range.
+
+    Exact matches are found by source hash and need no embedding.
+    """
+
+    def __init__(self, db_path: str = CACHE_DB_PATH, index_dir: str = INDEX_DIR, enabled: bool = ENABLED,
+                 ttl: float = TTL, max_entries: int = MAX_ENTRIES):
+        self.db_path = db_path
+        self.index_dir = index_dir
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._indexes: Dict[Tuple[str, ...], _LanguageIndex] = {}
+        self._indexes_lock = threading.Lock()
+        self._embed_failed_at = 0.0
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+
+        if self.enabled:
+            try:
+                self._create_tables()
+            except sqlite3.Error as e:
+                logger.warning(f"Translation memory unavailable: {e}")
+                self.enabled = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread (and per process, since gunicorn forks)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _create_tables(self) -> None:
+        conn = self._connect()
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(translation_memory)")}
+        if columns and "provider" not in columns:
+            # Entries from before the memory was kept per provider can't be
+            # attributed to one
+            logger.info("Dropping translation memory entries stored without their provider")
+            conn.execute("DROP TABLE translation_memory")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS translation_memory ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, source_hash TEXT NOT NULL, target_language TEXT NOT NULL, "
+            "provider TEXT NOT NULL, model TEXT NOT NULL, settings_hash TEXT NOT NULL, "
+            "source TEXT NOT NULL, translation TEXT NOT NULL, embedding_model TEXT, embedding BLOB, "
+            "created_at REAL NOT NULL, "
+            "UNIQUE (source_hash, target_language, provider, model, settings_hash))"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS translation_memory_vectors "
+            "ON translation_memory (target_language, provider, model, settings_hash, embedding_model, id)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS translation_memory_created ON translation_memory (created_at)")
+        conn.execute("CREATE TABLE IF NOT EXISTS translation_memory_version (version INTEGER NOT NULL)")
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("SELECT MAX(version) FROM translation_memory_version").fetchone()[0] or 0
+            if version < 2:
+                # Deleted rather than dropped so ids keep growing; the vectors
+                # left in FAISS snapshots are skipped as their rows are gone
+                deleted = conn.execute("DELETE FROM translation_memory WHERE provider = 'ollama'").rowcount
+                if deleted:
+                    logger.info(f"Dropped {deleted} Ollama translation memory entries that may hold OpenAI output")
+            if version < SCHEMA_VERSION:
+                conn.execute("INSERT INTO translation_memory_version (version) VALUES (?)", (SCHEMA_VERSION,))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _scope(target_language: str, provider: str, model: Optional[str],
+               options: Optional[Dict[str, Any]]) -> Tuple[str, str, str, str]:
+        """Return the (target language, provider, model, settings hash) entries are kept apart by."""
+        return target_language, provider, model or "", make_cache_key(options or {})
+
+    def _index(self, scope: Tuple[str, str, str, str], embedding_model: str) -> _LanguageIndex:
+        key = (*scope, embedding_model)
+        with self._indexes_lock:
+            if key not in self._indexes:
+                target_language, provider, model, settings_hash = scope
+                slug = re.sub(r"[^\w.-]+", "_",
+                              f"{embedding_model}-{provider}-{model}-{settings_hash[:12]}-{target_language}")
+                self._indexes[key] = _LanguageIndex(os.path.join(self.index_dir, f"{slug}.faiss"))
+            return self._indexes[key]
+
+    def _sync(self, scope: Tuple[str, str, str, str], embedding_model: str, force: bool = False) -> _LanguageIndex:
+        """Add the rows written by any worker since this worker last looked, and drop evicted ones."""
+        index = self._index(scope, embedding_model)
+        with index.lock:
+            if not force and time.monotonic() - index.synced_at < SYNC_INTERVAL:
+                return index
+            index.synced_at = time.monotonic()
+            conn = self._connect()
+            first_id = conn.execute(
+                "SELECT MIN(id) FROM translation_memory WHERE target_language = ? AND provider = ? AND model = ? "
+                "AND settings_hash = ? AND embedding_model = ? AND embedding IS NOT NULL",
+                (*scope, embedding_model)
+            ).fetchone()[0]
+            index.drop_before(first_id)
+            rows = conn.execute(
+                "SELECT id, embedding FROM translation_memory WHERE target_language = ? AND provider = ? "
+                "AND model = ? AND settings_hash = ? AND embedding_model = ? AND id > ? AND embedding IS NOT NULL "
+                "ORDER BY id",
+                (*scope, embedding_model, index.last_id)
+            ).fetchall()
+            if rows:
+                ids = np.array([row[0] for row in rows], dtype=np.int64)
+                vectors = np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+                index.add(ids, vectors)
+                index.last_id = int(ids[-1])
+                if index.unsaved >= SNAPSHOT_EVERY:
+                    index.save()
+        return index
+
+    def _embed(self, text: str, ollama_client, deadline: Optional[Deadline] = None) -> Optional[np.ndarray]:
+        if time.monotonic() - self._embed_failed_at < EMBED_RETRY_AFTER:
+            return None
+        if deadline is not None and deadline.remaining() * EMBED_DEADLINE_SHARE < ollama_client.embedding_timeout[1]:
+            # Leave the time to the translation itself
+            return None
+        try:
+            vector = np.asarray(ollama_client.embed([text], deadline)[0], dtype=np.float32)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.warning(f"Embedding failed, translation memory limited to exact matches: {e}")
+            self._embed_failed_at = time.monotonic()
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def lookup(self, text: str, target_language: str, provider: str, model: Optional[str],
+               options: Optional[Dict[str, Any]], ollama_client, deadline: Optional[Deadline] = None) -> MemoryLookup:
+        """
+        Look up stored translations of a text and of similar texts.
+
+        Args:
+            text: Source segment
+            target_language: Normalized target language code
+            provider: Resolved provider that will translate the text
+            model: Model the provider uses
+            options: Generation options that affect the provider's output
+            ollama_client: Instance of OllamaClient, used for embeddings
+            deadline: Time by which the request must finish; defaults to the
+                current deadline. The embedding call is skipped if it doesn't fit.
+
+        Returns:
+            MemoryLookup with a translation to reuse, or examples for the model
+        """
+        if not self.enabled or provider not in PROVIDERS or not text.strip():
+            return MemoryLookup()
+
+        scope = self._scope(target_language, provider, model, options)
+        try:
+            row = self._connect().execute(
+                "SELECT translation FROM translation_memory WHERE source_hash = ? AND target_language = ? "
+                "AND provider = ? AND model = ? AND settings_hash = ? AND created_at >= ?",
+                (_source_hash(text), *scope, time.time() - self.ttl)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Translation memory lookup failed: {e}")
+            return MemoryLookup()
+        if row is not None:
+            CACHE_LOOKUPS.labels("translation_memory", "exact_hit").inc()
+            return MemoryLookup(reuse=row[0])
+
+        embedding = self._embed(text, ollama_client, deadline or current_deadline())
+        if embedding is None:
+            CACHE_LOOKUPS.labels("translation_memory", "miss").inc()
+            return MemoryLookup()
+
+        try:
+            hits = self._sync(scope, ollama_client.embedding_model).search(embedding, max(MAX_EXAMPLES, 1))
+            hits = [(i, score) for i, score in hits if score >= EXAMPLE_THRESHOLD]
+            rows = {}
+            if hits:
+                placeholders = ",".join("?" * len(hits))
+                rows = {row[0]: row[1:] for row in self._connect().execute(
+                    f"SELECT id, source, translation FROM translation_memory WHERE id IN ({placeholders})",
+                    [i for i, _ in hits]
+                )}
+        except (sqlite3.Error, RuntimeError) as e:
+            logger.warning(f"Translation memory search failed: {e}")
+            return MemoryLookup(embedding=embedding)
+
+        matches = [MemoryMatch(*rows[i], similarity=score) for i, score in hits if i in rows]
+        if matches and matches[0].similarity >= REUSE_THRESHOLD and _near_exact(text, matches[0].source):
+            CACHE_LOOKUPS.labels("translation_memory", "near_hit").inc()
+            return MemoryLookup(reuse=matches[0].translation, embedding=embedding)
+
+        CACHE_LOOKUPS.labels("translation_memory", "example_hit" if matches else "miss").inc()
+        return MemoryLookup(examples=matches[:MAX_EXAMPLES], embedding=embedding)
+
+    def add(self, text: str, target_language: str, provider: str, model: Optional[str],
+            options: Optional[Dict[str, Any]], translation: str, lookup: Optional[MemoryLookup] = None,
+            ollama_client=None) -> None:
+        """
+        Store a finished translation.
+
+        Args:
+            text: Source segment
+            target_language: Normalized target language code
+            provider: Provider that produced the translation
+            model: Model the provider used
+            options: Generation options the provider used
+            translation: Its translation
+            lookup: The lookup made before translating, whose embedding is reused
+            ollama_client: Instance of OllamaClient, names the embedding model
+        """
+        if (not self.enabled or provider not in PROVIDERS or not text.strip() or not translation
+                or (lookup and lookup.reuse is not None)):
+            return
+
+        scope = self._scope(target_language, provider, model, options)
+        embedding = lookup.embedding if lookup else None
+        embedding_model = ollama_client.embedding_model if ollama_client is not None and embedding is not None else None
+        try:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO translation_memory "
+                "(source_hash, target_language, provider, model, settings_hash, source, translation, "
+                "embedding_model, embedding, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (_source_hash(text), *scope, text, translation, embedding_model,
+                 embedding.astype(np.float32).tobytes() if embedding is not None else None, time.time())
+            )
+            with self._writes_lock:
+                self._writes += 1
+                prune = self._writes % PRUNE_EVERY == 0
+            if prune:
+                self.prune()
+            if embedding_model:
+                self._sync(scope, embedding_model, force=True)
+        except (sqlite3.Error, RuntimeError) as e:
+            logger.warning(f"Could not store translation in memory: {e}")
+
+    def prune(self) -> None:
+        """Drop expired entries and the oldest ones beyond max_entries."""
+        conn = self._connect()
+        conn.execute("DELETE FROM translation_memory WHERE created_at < ?", (time.time() - self.ttl,))
+        conn.execute(
+            "DELETE FROM translation_memory WHERE id <= "
+            "(SELECT id FROM translation_memory ORDER BY id DESC LIMIT 1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def stats(self) -> Dict[str, object]:
+        if not self.enabled:
+            return {"enabled": False}
+        count, embedded = self._connect().execute(
+            "SELECT COUNT(*), COUNT(embedding) FROM translation_memory"
+        ).fetchone()
+        return {"enabled": True, "entries": count, "embedded": embedded}
+
+    def purge(self) -> None:
+        """Delete all entries and on-disk indexes."""
+        if not self.enabled:
+            return
+        self._connect().execute("DELETE FROM translation_memory")
+        with self._indexes_lock:
+            for index in self._indexes.values():
+                if os.path.exists(index.path):
+                    os.remove(index.path)
+            self._indexes.clear()
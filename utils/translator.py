@@ -1,11 +1,126 @@
+import asyncio
 import logging
 import os
-from typing import Dict, Optional, Tuple, List, Union
+import time
+import threading
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout, wait, FIRST_COMPLETED
+from typing import Dict, Optional, Tuple, List, Union, Iterator, Callable, Any
 from deep_translator import GoogleTranslator, LingueeTranslator, MyMemoryTranslator
 from deep_translator import PonsTranslator, DeeplTranslator  # DeeplTranslator is the correct import
+from utils.http_pool import pool_deep_translator_requests
+from utils.cache import TranslationCache
+from utils.segmenter import Segment, split_text, join_segments
+from utils.health import CircuitBreaker
+from utils.ollama_client import DEFAULT_NUM_CTX, estimate_tokens, length_factor
+from utils.router import ProviderRouter
+from utils.retry import Deadline, DeadlineExceeded, deadline_scope
+from utils.metrics import TRANSLATION_SECONDS, TRANSLATION_CHARS, record_fallback
+from utils.language_detection import language_detector
+from utils.translation_memory import TranslationMemory
 
 logger = logging.getLogger(__name__)
 
+# Share one pooled keep-alive session across all deep_translator providers
+translator_session = pool_deep_translator_requests()
+
+# Two-tier (memory + shared SQLite) cache of finished translations
+translation_cache = TranslationCache()
+
+# Earlier translations of similar segments, shared by all workers
+translation_memory = TranslationMemory()
+
+# How deep_translator providers are constructed for a (source, target) pair
+TRANSLATOR_FACTORIES: Dict[str, Callable[[str, str], Any]] = {
+    'google': lambda source, target: GoogleTranslator(source=source, target=target),
+    'deepl': lambda source, target: DeeplTranslator(api_key=os.environ.get('DEEPL_API_KEY'), source=source, target=target),
+    # MyMemory has daily limits but works without API key
+    'mymemory': lambda source, target: MyMemoryTranslator(source=source, target=target),
+    'linguee': lambda source, target: LingueeTranslator(source=source, target=target),
+    'pons': lambda source, target: PonsTranslator(source=source, target=target)
+}
+
+class TranslatorPool:
+    """
+    Pool of reusable deep_translator instances keyed on (provider, source, target).
+    
+    deep_translator instances keep per-call state, so each one is leased
+    to a single thread at a time and returned afterwards. At most
+    `max_idle_per_key` idle instances are kept per key, and the least
+    recently used keys are evicted beyond `max_keys`.
+    """
+    
+    def __init__(self, factories: Dict[str, Callable[[str, str], Any]], max_keys: int = 64, max_idle_per_key: int = 8):
+        self.factories = factories
+        self.max_keys = max_keys
+        self.max_idle_per_key = max_idle_per_key
+        self._lock = threading.Lock()
+        self._idle: "OrderedDict[Tuple[str, str, str], List[Any]]" = OrderedDict()
+        self._counters = {'created': 0, 'reused': 0, 'evicted': 0}
+    
+    @contextmanager
+    def lease(self, provider: str, source: str, target: str) -> Iterator[Any]:
+        """
+        Borrow a translator for the duration of a `with` block.
+        
+        Instances whose call raised are discarded rather than returned.
+        
+        Args:
+            provider: Provider name in `factories`
+            source: Source language code or 'auto'
+            target: Target language code
+            
+        Returns:
+            Context manager yielding the translator instance
+        """
+        key = (provider, source, target)
+        translator = None
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                translator = idle.pop()
+                self._idle.move_to_end(key)
+                self._counters['reused'] += 1
+        
+        if translator is None:
+            # Construction validates languages and may do network setup,
+            # so it happens outside the lock
+            translator = self.factories[provider](source, target)
+            with self._lock:
+                self._counters['created'] += 1
+        
+        yield translator
+        self._release(key, translator)
+    
+    def _release(self, key: Tuple[str, str, str], translator: Any) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+            if len(idle) < self.max_idle_per_key:
+                idle.append(translator)
+            while len(self._idle) > self.max_keys:
+                _, evicted = self._idle.popitem(last=False)
+                self._counters['evicted'] += len(evicted)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._idle.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats['keys'] = len(self._idle)
+            stats['idle'] = sum(len(idle) for idle in self._idle.values())
+        return stats
+
+# Translator instances shared by all requests of this worker
+translator_pool = TranslatorPool(
+    TRANSLATOR_FACTORIES,
+    max_keys=int(os.environ.get("TRANSLATOR_POOL_MAX_KEYS", "64")),
+    max_idle_per_key=int(os.environ.get("TRANSLATOR_POOL_SIZE", "8"))
+)
+
 # Language codes mapping (ISO 639-1)
 LANGUAGE_CODES = {
     'en': 'English',
@@ -43,6 +158,7 @@ LANGUAGE_CODES = {
 
 # Translation providers
 TRANSLATION_PROVIDERS = {
+    'auto': 'Automatic (fastest available)',
     'ollama': 'Ollama (Local AI)',
     'openai': 'OpenAI',
     'google': 'Google Translate',
@@ -60,19 +176,85 @@ PROVIDER_LANGUAGE_SUPPORT = {
     'deepl': ['en', 'de', 'fr', 'es', 'it', 'pt', 'ru', 'ja', 'zh', 'nl', 'pl']
 }
 
-def translate_text(text: str, target_language: str, ollama_client, provider: str = 'ollama') -> str:
+# Providers `auto` chooses from. Linguee and Pons are dictionaries and
+# are only used when asked for explicitly.
+AUTO_PROVIDERS = ['ollama', 'openai', 'deepl', 'google', 'mymemory']
+
+# Longest chunk (in characters) each provider is sent in one request.
+# Longer texts are split on paragraph and sentence boundaries. Ollama's
+# chunks are sized in tokens instead, see `_split_for_provider`.
+PROVIDER_MAX_CHUNK_CHARS = {
+    'openai': 4000,
+    'google': 4500,
+    'deepl': 4500,
+    'mymemory': 450,
+    'linguee': 500,
+    'pons': 200
+}
+DEFAULT_MAX_CHUNK_CHARS = 2000
+
+# Tokens of Ollama's context window kept for the prompt and translation
+# memory examples; the rest is shared by a chunk and its translation
+OLLAMA_PROMPT_TOKENS = 512
+# Smallest Ollama chunk, in estimated tokens, however small the context
+MIN_OLLAMA_CHUNK_TOKENS = 64
+
+# Providers that can return a translation token by token
+STREAMING_PROVIDERS = {'ollama', 'openai'}
+
+# How many chunks of one text are translated in parallel
+CHUNK_CONCURRENCY = int(os.environ.get("TRANSLATION_CHUNK_CONCURRENCY", "4"))
+
+# Hedged requests: when enabled, a chunk is also sent to the next best
+# provider if the first one hasn't answered within its p95 latency (or
+# TRANSLATION_HEDGE_DELAY seconds until enough calls have been measured)
+HEDGING_ENABLED = os.environ.get("TRANSLATION_HEDGING", "false").lower() in ("true", "1", "yes", "y", "t")
+HEDGE_DEFAULT_DELAY = float(os.environ.get("TRANSLATION_HEDGE_DELAY", "2.0"))
+hedge_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("TRANSLATION_HEDGE_WORKERS", "32")))
+
+# Tracks latency and errors of every provider call for `auto` and hedging
+provider_router = ProviderRouter(AUTO_PROVIDERS, PROVIDER_LANGUAGE_SUPPORT)
+
+# How many chunks a batch sends to each provider in parallel. Override with
+# TRANSLATION_BATCH_CONCURRENCY_<PROVIDER>, e.g. TRANSLATION_BATCH_CONCURRENCY_OLLAMA=4
+BATCH_CONCURRENCY = {
+    'ollama': 2,
+    'openai': 8,
+    'google': 4,
+    'deepl': 4,
+    'mymemory': 2,
+    'linguee': 2,
+    'pons': 2
+}
+
+def translate_text(text: str, target_language: str, ollama_client, provider: str = 'ollama',
+                   hedge: Optional[bool] = None, deadline: Optional[Deadline] = None) -> str:
     """
     Translate text to the target language using selected provider.
     
+    Text longer than the provider's maximum chunk size is split on paragraph
+    and sentence boundaries, the chunks are translated concurrently and then
+    reassembled with the original layout. Each chunk is cached under the
+    provider that actually produced it, so a chunk that fell back to Google
+    is stored as a Google result.
+    
     Args:
         text: The text to translate
         target_language: The language code or name to translate to
         ollama_client: Instance of OllamaClient (for Ollama/OpenAI)
-        provider: The translation provider to use
+        provider: The translation provider to use, or 'auto' for the
+            fastest healthy one
+        hedge: Race a second provider when the first is slow; defaults
+            to TRANSLATION_HEDGING
+        deadline: Time by which the translation must finish; every
+            provider call and fallback only gets the time that is left
         
     Returns:
         The translated text
     """
+    if hedge is None:
+        hedge = HEDGING_ENABLED
+    
     try:
         # Normalize target language
         target_language = _normalize_language_code(target_language)
@@ -83,79 +265,750 @@ def translate_text(text: str, target_language: str, ollama_client, provider: str
         # Log translation request
         logger.info(f"Translating text ({len(text)} chars) to {language_name} using {provider}")
         
-        # Check if provider supports this language
-        if provider in PROVIDER_LANGUAGE_SUPPORT:
-            if target_language not in PROVIDER_LANGUAGE_SUPPORT[provider]:
-                logger.warning(f"{provider} doesn't support {language_name}, falling back to Google Translate")
-                provider = 'google'
-        
-        # Perform translation based on provider
-        if provider == 'ollama':
-            translated_text = ollama_client.translate(text, language_name)
-        elif provider == 'openai':
-            translated_text = ollama_client._translate_with_openai(text, language_name)
-        elif provider == 'google':
-            translator = GoogleTranslator(source='auto', target=target_language)
-            translated_text = translator.translate(text)
-        elif provider == 'deepl':
-            # DeepL requires an API key
-            deepl_api_key = os.environ.get('DEEPL_API_KEY')
-            if not deepl_api_key:
-                logger.warning("DeepL API key not found, falling back to Google Translate")
-                translator = GoogleTranslator(source='auto', target=target_language)
-                translated_text = translator.translate(text)
-            else:
-                translator = DeeplTranslator(api_key=deepl_api_key, source='auto', target=target_language)
-                translated_text = translator.translate(text)
-        elif provider == 'mymemory':
-            # MyMemory has daily limits but works without API key
-            translator = MyMemoryTranslator(source='auto', target=target_language)
-            translated_text = translator.translate(text)
-        elif provider == 'linguee':
-            # Linguee has limitations on length
-            if len(text) > 500:
-                logger.warning("Text too long for Linguee (>500 chars), falling back to Google Translate")
-                translator = GoogleTranslator(source='auto', target=target_language)
-                translated_text = translator.translate(text)
-            else:
-                translator = LingueeTranslator(source='auto', target=target_language)
-                translated_text = translator.translate(text)
-        elif provider == 'pons':
-            # Pons has severe limitations on length
-            if len(text) > 200:
-                logger.warning("Text too long for Pons (>200 chars), falling back to Google Translate")
-                translator = GoogleTranslator(source='auto', target=target_language)
-                translated_text = translator.translate(text)
-            else:
-                translator = PonsTranslator(source='auto', target=target_language)
-                translated_text = translator.translate(text)
+        # Switch to Google up front where the provider can't handle the request
+        provider = _resolve_provider(provider, target_language, language_name, ollama_client)
+        
+        # Split into chunks the provider can handle
+        segments = _split_for_provider(text, provider, language_name, ollama_client)
+        
+        def translate_segment(segment: Segment) -> str:
+            if not segment.text:
+                return ""
+            return _translate_with_fallback(segment.text, target_language, language_name, ollama_client, provider,
+                                            hedge, deadline)
+        
+        if len(segments) == 1:
+            translations = [translate_segment(segments[0])]
         else:
-            # Default to Google Translate as fallback
-            translator = GoogleTranslator(source='auto', target=target_language)
-            translated_text = translator.translate(text)
+            logger.info(f"Translating {len(segments)} chunks with up to {CHUNK_CONCURRENCY} in parallel")
+            with ThreadPoolExecutor(max_workers=min(CHUNK_CONCURRENCY, len(segments))) as executor:
+                translations = list(executor.map(translate_segment, segments))
         
-        # Make sure we return a string (some translators might return different types)
-        if translated_text is None:
-            return ""
-        if isinstance(translated_text, list):
-            return " ".join(translated_text)
+        return join_segments(segments, translations).strip()
         
-        return str(translated_text).strip()
+    except Exception as e:
+        logger.error(f"Translation error with {provider}: {e}")
+        raise
+
+async def translate_text_async(text: str, target_language: str, async_client, provider: str = 'ollama',
+                               hedge: Optional[bool] = None, deadline: Optional[Deadline] = None) -> str:
+    """
+    Asyncio version of `translate_text`.
+    
+    Ollama and OpenAI chunks are translated through the async client, so
+    waiting for the model holds no thread; other providers, and the Google
+    fallback, run the sync code in worker threads.
+    
+    Args:
+        text: The text to translate
+        target_language: The language code or name to translate to
+        async_client: Instance of AsyncOllamaClient (for Ollama/OpenAI)
+        provider: The translation provider to use
+        hedge: Race a second provider when the first is slow; defaults
+            to TRANSLATION_HEDGING
+        deadline: Time by which the translation must finish; every
+            provider call and fallback only gets the time that is left
         
+    Returns:
+        The translated text
+    """
+    if hedge is None:
+        hedge = HEDGING_ENABLED
+    
+    ollama_client = async_client.client
+    target_language = _normalize_language_code(target_language)
+    language_name = LANGUAGE_CODES.get(target_language, target_language)
+    provider = _resolve_provider(provider, target_language, language_name, ollama_client)
+    
+    if provider not in STREAMING_PROVIDERS:
+        return await asyncio.to_thread(translate_text, text, target_language, ollama_client, provider,
+                                       hedge=hedge, deadline=deadline)
+    
+    logger.info(f"Translating text ({len(text)} chars) to {language_name} using {provider} (async)")
+    segments = _split_for_provider(text, provider, language_name, ollama_client)
+    semaphore = asyncio.Semaphore(max(1, CHUNK_CONCURRENCY))
+    
+    async def translate_segment(segment: Segment) -> str:
+        if not segment.text:
+            return ""
+        try:
+            async with semaphore:
+                translate = _translate_hedged_async if hedge else _translate_cached_async
+                return await translate(segment.text, target_language, language_name, async_client, provider,
+                                       deadline)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Translation error with {provider}: {e}")
+            logger.info(f"Falling back to Google Translate after {provider} failed")
+            record_fallback("translation", provider, "google")
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded(f"Deadline exceeded after {provider} failed, not falling back") from e
+            return await asyncio.to_thread(_translate_cached, segment.text, target_language, language_name,
+                                           ollama_client, 'google', deadline)
+    
+    try:
+        # Tasks started by gather, and threads started by to_thread, inherit
+        # the deadline for the async client to read
+        with deadline_scope(deadline):
+            translations = await asyncio.gather(*(translate_segment(segment) for segment in segments))
+        return join_segments(segments, translations).strip()
     except Exception as e:
         logger.error(f"Translation error with {provider}: {e}")
+        raise
+
+async def _translate_cached_async(text: str, target_language: str, language_name: str, async_client, provider: str,
+                                  deadline: Optional[Deadline] = None) -> str:
+    """
+    Async `_translate_cached` for the Ollama and OpenAI providers.
+    
+    Args:
+        text: The text to translate
+        target_language: Normalized target language code
+        language_name: Display name of the target language
+        async_client: Instance of AsyncOllamaClient
+        provider: 'ollama' or 'openai'
+        deadline: Time by which the provider must answer
+        
+    Returns:
+        The translated text
+    """
+    ollama_client = async_client.client
+    model, options = _model_parameters(provider, ollama_client)
+    cache_key = translation_cache.key(text, target_language, provider, model, options)
+    cached = translation_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    memory = await asyncio.to_thread(translation_memory.lookup, text, target_language, provider, model,
+                                     options, ollama_client, deadline)
+    if memory.reuse is not None:
+        return memory.reuse
+    examples = [(match.source, match.translation) for match in memory.examples]
+    
+    TRANSLATION_CHARS.labels(provider).observe(len(text))
+    start = time.monotonic()
+    try:
+        with deadline_scope(deadline):
+            if provider == 'ollama':
+                translated_text = await async_client.translate(text, language_name, examples, fallback=False)
+            else:
+                translated_text = await async_client._translate_with_openai(text, language_name, examples=examples)
+    except Exception as e:
+        elapsed = time.monotonic() - start
+        TRANSLATION_SECONDS.labels(provider, "error").observe(elapsed)
+        # Calls cut short by the caller's deadline say nothing about the provider
+        if deadline is None or not deadline.expired():
+            provider_router.record(provider, elapsed, False)
+        backup = _model_fallback(provider, ollama_client, e, deadline)
+        if backup is None:
+            raise
+        return await _translate_cached_async(text, target_language, language_name, async_client, backup, deadline)
+    elapsed = time.monotonic() - start
+    TRANSLATION_SECONDS.labels(provider, "ok").observe(elapsed)
+    provider_router.record(provider, elapsed, True)
+    
+    translation_cache.set(cache_key, translated_text)
+    await asyncio.to_thread(translation_memory.add, text, target_language, provider, model, options,
+                            translated_text, memory, ollama_client)
+    return translated_text
+
+async def _translate_hedged_async(text: str, target_language: str, language_name: str, async_client, provider: str,
+                                  deadline: Optional[Deadline] = None) -> str:
+    """
+    Async `_translate_hedged` for the Ollama and OpenAI providers.
+    
+    Whichever provider answers first wins. The slower call is left running
+    on the event loop so its result still lands in the cache. A backup that
+    has no async client runs the sync code in a worker thread.
+    
+    Args:
+        text: The chunk to translate
+        target_language: Normalized target language code
+        language_name: Display name of the target language
+        async_client: Instance of AsyncOllamaClient
+        provider: 'ollama' or 'openai'
+        deadline: Time by which the chunk must be translated
+        
+    Returns:
+        The translated chunk
+    """
+    ollama_client = async_client.client
+    primary = asyncio.ensure_future(_translate_cached_async(text, target_language, language_name, async_client,
+                                                            provider, deadline))
+    primary.add_done_callback(_consume_result)
+    delay = provider_router.hedge_delay(provider, HEDGE_DEFAULT_DELAY)
+    if deadline is not None:
+        delay = min(delay, deadline.remaining())
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done:
+        return primary.result()
+    if deadline is not None and deadline.expired():
+        raise DeadlineExceeded(f"Deadline exceeded waiting for {provider}")
+    
+    backups = provider_router.rank(target_language, exclude=[provider],
+                                   is_available=lambda candidate: _provider_available(candidate, ollama_client))
+    if not backups:
+        return await primary
+    
+    logger.info(f"{provider} has not answered within {delay:.2f}s, hedging with {backups[0]}")
+    record_fallback("hedge", provider, backups[0])
+    if backups[0] in STREAMING_PROVIDERS:
+        secondary = asyncio.ensure_future(_translate_cached_async(text, target_language, language_name, async_client,
+                                                                  backups[0], deadline))
+    else:
+        secondary = asyncio.ensure_future(asyncio.to_thread(_translate_cached, text, target_language, language_name,
+                                                            ollama_client, backups[0], deadline))
+    secondary.add_done_callback(_consume_result)
+    pending = {primary, secondary}
+    error = None
+    while pending:
+        done, pending = await asyncio.wait(pending, timeout=deadline.remaining() if deadline else None,
+                                           return_when=asyncio.FIRST_COMPLETED)
+        if not done:
+            raise DeadlineExceeded(f"Deadline exceeded waiting for {provider} and {backups[0]}")
+        for task in done:
+            if task.exception() is None:
+                return task.result()
+            error = task.exception()
+    raise error
+
+def _consume_result(task: asyncio.Future) -> None:
+    """Mark a task's exception as retrieved, so a losing hedged call that fails isn't logged as unhandled."""
+    if not task.cancelled():
+        task.exception()
+
+def translate_batch(texts: List[str], target_languages: List[str], ollama_client,
+                    provider: str = 'ollama') -> List[Dict[str, Dict[str, str]]]:
+    """
+    Translate many texts into one or more target languages.
+    
+    Every text is split into chunks as in `translate_text`. Identical
+    (chunk, language) pairs, whether from duplicate texts or repeated
+    paragraphs, are translated only once. Each resolved provider gets its
+    own bounded pool, so a slow provider does not hold up the others.
+    A failure only affects the (text, language) pairs that needed the
+    failed chunk.
+    
+    Args:
+        texts: The texts to translate
+        target_languages: Language codes or names to translate every text to
+        ollama_client: Instance of OllamaClient (for Ollama/OpenAI)
+        provider: The translation provider to use
+        
+    Returns:
+        One dict per input text, in input order, with `translations` and
+        `errors` mapping each requested language to a result or message
+    """
+    # Resolve each language once: (requested, code, name, provider)
+    languages = []
+    for requested in dict.fromkeys(target_languages):
+        code = _normalize_language_code(requested)
+        name = LANGUAGE_CODES.get(code, code)
+        languages.append((requested, code, name, _resolve_provider(provider, code, name, ollama_client)))
+    
+    unique_texts = list(dict.fromkeys(texts))
+    logger.info(f"Batch translating {len(unique_texts)} unique of {len(texts)} texts to {len(languages)} language(s) using {provider}")
+    
+    # Plan the chunks of every (text, language) pair and deduplicate them
+    plans = {}
+    jobs = {}
+    for text in unique_texts:
+        for requested, code, name, resolved in languages:
+            segments = _split_for_provider(text, resolved, name, ollama_client)
+            plans[(text, requested)] = segments
+            for segment in segments:
+                if segment.text:
+                    jobs.setdefault((segment.text, code), (name, resolved))
+    
+    # Run the chunks with one bounded pool per provider
+    executors = {}
+    futures = {}
+    try:
+        for (chunk, code), (name, resolved) in jobs.items():
+            if resolved not in executors:
+                executors[resolved] = ThreadPoolExecutor(max_workers=_batch_concurrency(resolved))
+            futures[(chunk, code)] = executors[resolved].submit(
+                _translate_with_fallback, chunk, code, name, ollama_client, resolved
+            )
+        
+        # Reassemble every pair from its chunks
+        outcomes = {}
+        for text in unique_texts:
+            for requested, code, _, _ in languages:
+                segments = plans[(text, requested)]
+                try:
+                    translations = [futures[(segment.text, code)].result() if segment.text else ""
+                                    for segment in segments]
+                    outcomes[(text, requested)] = (join_segments(segments, translations).strip(), None)
+                except Exception as e:
+                    logger.error(f"Batch translation to {requested} failed: {e}")
+                    outcomes[(text, requested)] = (None, str(e))
+    finally:
+        for executor in executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    results = []
+    for text in texts:
+        result = {'translations': {}, 'errors': {}}
+        for requested, _, _, _ in languages:
+            translated, error = outcomes[(text, requested)]
+            if error is None:
+                result['translations'][requested] = translated
+            else:
+                result['errors'][requested] = error
+        results.append(result)
+    return results
+
+def _batch_concurrency(provider: str) -> int:
+    """Return how many batch chunks may be sent to a provider at once."""
+    env_var = f"TRANSLATION_BATCH_CONCURRENCY_{provider.upper()}"
+    return max(1, int(os.environ.get(env_var, BATCH_CONCURRENCY.get(provider, 4))))
+
+def translate_text_stream(text: str, target_language: str, ollama_client, provider: str = 'ollama',
+                          deadline: Optional[Deadline] = None) -> Iterator[str]:
+    """
+    Translate text like `translate_text`, yielding the result incrementally.
+    
+    Ollama and OpenAI translations are relayed token by token; other
+    providers yield each chunk once it is translated. Chunks are processed
+    in order so the output can be shown as it arrives. Closing the iterator
+    cancels the upstream generation.
+    
+    Args:
+        text: The text to translate
+        target_language: The language code or name to translate to
+        ollama_client: Instance of OllamaClient (for Ollama/OpenAI)
+        provider: The translation provider to use
+        deadline: Time by which the whole stream must finish
+        
+    Returns:
+        Iterator over fragments of the translated text
+        
+    Raises:
+        DeadlineExceeded: If the deadline passes before the stream ends
+    """
+    target_language = _normalize_language_code(target_language)
+    language_name = LANGUAGE_CODES.get(target_language, target_language)
+    logger.info(f"Streaming translation of text ({len(text)} chars) to {language_name} using {provider}")
+    
+    provider = _resolve_provider(provider, target_language, language_name, ollama_client)
+    segments = _split_for_provider(text, provider, language_name, ollama_client)
+    
+    # Match translate_text, which strips the reassembled result
+    first = next((i for i, segment in enumerate(segments) if segment.text), None)
+    if first is None:
+        return
+    last = max(i for i, segment in enumerate(segments) if segment.text)
+    
+    for index in range(first, last + 1):
+        segment = segments[index]
+        if index > first:
+            yield segment.leading
+        if segment.text:
+            yield from _translate_segment_stream(segment.text, target_language, language_name, ollama_client, provider,
+                                                 deadline)
+        if index < last:
+            yield segment.trailing
+
+def _translate_segment_stream(text: str, target_language: str, language_name: str, ollama_client, provider: str,
+                              deadline: Optional[Deadline] = None) -> Iterator[str]:
+    """
+    Stream the translation of one chunk, using the cache and Google fallback.
+    
+    The fallback is only used if the provider fails before producing output
+    and the deadline has not passed. A translation is only cached once it
+    has been streamed completely.
+    
+    Args:
+        text: The chunk to translate
+        target_language: Normalized target language code
+        language_name: Display name of the target language
+        ollama_client: Instance of OllamaClient (for Ollama/OpenAI)
+        provider: Resolved provider
+        deadline: Time by which the chunk must be translated
+        
+    Returns:
+        Iterator over fragments of the translated chunk
+    """
+    model, options = _model_parameters(provider, ollama_client)
+    cache_key = translation_cache.key(text, target_language, provider, model, options)
+    cached = translation_cache.get(cache_key)
+    if cached is not None:
+        yield cached
+        return
+    
+    if provider not in STREAMING_PROVIDERS:
+        yield _translate_with_fallback(text, target_language, language_name, ollama_client, provider,
+                                       deadline=deadline)
+        return
+    
+    memory = translation_memory.lookup(text, target_language, provider, model, options, ollama_client, deadline)
+    if memory.reuse is not None:
+        yield memory.reuse
+        return
+    examples = [(match.source, match.translation) for match in memory.examples]
+    
+    if provider == 'ollama':
+        tokens = ollama_client.translate_stream(text, language_name, examples, deadline, fallback=False)
+    else:
+        tokens = ollama_client._translate_with_openai_stream(text, language_name, examples, deadline)
+    
+    parts = []
+    start = time.monotonic()
+    try:
+        with closing(_strip_stream(tokens)) as stream:
+            for token in stream:
+                parts.append(token)
+                yield token
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        # Booked against the provider that failed, whichever one falls back
+        if deadline is None or not deadline.expired():
+            provider_router.record(provider, time.monotonic() - start, False)
+        if parts:
+            raise
+        logger.error(f"Streaming translation error with {provider}: {e}")
+        backup = _model_fallback(provider, ollama_client, e, deadline)
+        if backup is not None:
+            yield from _translate_segment_stream(text, target_language, language_name, ollama_client, backup, deadline)
+            return
+        logger.info(f"Falling back to Google Translate after {provider} failed")
+        record_fallback("translation", provider, "google")
+        if deadline is not None and deadline.expired():
+            raise DeadlineExceeded(f"Deadline exceeded after {provider} failed, not falling back") from e
+        yield _translate_cached(text, target_language, language_name, ollama_client, 'google', deadline)
+        return
+    
+    provider_router.record(provider, time.monotonic() - start, True)
+    translation_cache.set(cache_key, "".join(parts))
+    translation_memory.add(text, target_language, provider, model, options, "".join(parts), memory, ollama_client)
+
+def _strip_stream(tokens: Iterator[str]) -> Iterator[str]:
+    """Strip leading and trailing whitespace from a token stream, like str.strip()."""
+    started = False
+    pending = ""
+    try:
+        for token in tokens:
+            if not started:
+                token = token.lstrip()
+                if not token:
+                    continue
+                started = True
+            
+            # Hold back trailing whitespace until more text follows it
+            body = token.rstrip()
+            if body:
+                yield pending + body
+                pending = token[len(body):]
+            else:
+                pending += token
+    finally:
+        if hasattr(tokens, "close"):
+            tokens.close()
+
+def _translate_with_fallback(text: str, target_language: str, language_name: str, ollama_client, provider: str,
+                             hedge: bool = False, deadline: Optional[Deadline] = None) -> str:
+    """
+    Translate one chunk, falling back to Google Translate if the provider fails.
+    
+    Args:
+        text: The chunk to translate
+        target_language: Normalized target language code
+        language_name: Display name of the target language
+        ollama_client: Instance of OllamaClient (for Ollama/OpenAI)
+        provider: Resolved provider
+        hedge: Race a second provider if this one is slow
+        deadline: Time by which the chunk must be translated
+        
+    Returns:
+        The translated chunk
+    """
+    try:
+        if hedge:
+            return _translate_hedged(text, target_language, language_name, ollama_client, provider, deadline)
+        return _translate_cached(text, target_language, language_name, ollama_client, provider, deadline)
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
         # If the selected provider fails, try Google Translate as fallback
-        if provider != 'google':
-            logger.info(f"Falling back to Google Translate after {provider} failed")
-            try:
-                translator = GoogleTranslator(source='auto', target=target_language)
-                return translator.translate(text).strip()
-            except Exception as e2:
-                logger.error(f"Google Translate fallback also failed: {e2}")
-                raise
-        else:
+        if provider == 'google':
+            raise
+        logger.error(f"Translation error with {provider}: {e}")
+        logger.info(f"Falling back to Google Translate after {provider} failed")
+        record_fallback("translation", provider, "google")
+        if deadline is not None and deadline.expired():
+            raise DeadlineExceeded(f"Deadline exceeded after {provider} failed, not falling back") from e
+        try:
+            return _translate_cached(text, target_language, language_name, ollama_client, 'google', deadline)
+        except Exception as e2:
+            logger.error(f"Google Translate fallback also failed: {e2}")
             raise
 
+def _translate_hedged(text: str, target_language: str, language_name: str, ollama_client, provider: str,
+                      deadline: Optional[Deadline] = None) -> str:
+    """
+    Translate one chunk, also asking the next best provider if the first is slow.
+    
+    Whichever provider answers first wins. The slower call is left to
+    finish in the background so its result still lands in the cache.
+    
+    Args:
+        text: The chunk to translate
+        target_language: Normalized target language code
+        language_name: Display name of the target language
+        ollama_client: Instance of OllamaClient (for Ollama/OpenAI)
+        provider: Resolved provider
+        deadline: Time by which the chunk must be translated
+        
+    Returns:
+        The translated chunk
+    """
+    primary = hedge_executor.submit(_translate_cached, text, target_language, language_name, ollama_client, provider, deadline)
+    delay = provider_router.hedge_delay(provider, HEDGE_DEFAULT_DELAY)
+    if deadline is not None:
+        delay = min(delay, deadline.remaining())
+    try:
+        return primary.result(timeout=delay)
+    except FuturesTimeout:
+        pass
+    if deadline is not None and deadline.expired():
+        raise DeadlineExceeded(f"Deadline exceeded waiting for {provider}")
+    
+    backups = provider_router.rank(target_language, exclude=[provider],
+                                   is_available=lambda candidate: _provider_available(candidate, ollama_client))
+    if not backups:
+        return primary.result()
+    
+    logger.info(f"{provider} has not answered within {delay:.2f}s, hedging with {backups[0]}")
+    record_fallback("hedge", provider, backups[0])
+    secondary = hedge_executor.submit(_translate_cached, text, target_language, language_name, ollama_client, backups[0], deadline)
+    pending = {primary, secondary}
+    error = None
+    while pending:
+        done, pending = wait(pending, timeout=deadline.remaining() if deadline else None, return_when=FIRST_COMPLETED)
+        if not done:
+            raise DeadlineExceeded(f"Deadline exceeded waiting for {provider} and {backups[0]}")
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error
+
+def _split_for_provider(text: str, provider: str, language_name: str, ollama_client) -> List[Segment]:
+    """
+    Split text into chunks the provider can translate in one request.
+    
+    Ollama's context window is counted in tokens, and CJK or Indic text
+    takes several times more tokens per character than English, so its
+    chunks are measured with `estimate_tokens`. A chunk gets the share of
+    the context left after the prompt that its translation into
+    `language_name` doesn't need. The model's base context is used even in
+    adaptive mode, so chunks don't make Ollama reload it with a larger one.
+    """
+    if provider == 'ollama' and ollama_client is not None:
+        context = ollama_client.num_ctx or DEFAULT_NUM_CTX
+        budget = (context - OLLAMA_PROMPT_TOKENS) / (1 + length_factor(language_name))
+        return split_text(text, max(MIN_OLLAMA_CHUNK_TOKENS, int(budget)), length_function=estimate_tokens)
+    return split_text(text, PROVIDER_MAX_CHUNK_CHARS.get(provider, DEFAULT_MAX_CHUNK_CHARS))
+
+def _provider_available(provider: str, ollama_client) -> bool:
+    """Return False for providers that are not configured or whose circuit is open."""
+    if provider in ('ollama', 'openai') and ollama_client is None:
+        return False
+    if provider == 'ollama':
+        health = ollama_client.ollama_health
+        return health.breaker.state != CircuitBreaker.OPEN and health.cached_result() is not False
+    if provider == 'openai':
+        return bool(ollama_client.openai_api_key) and ollama_client.openai_breaker.state != CircuitBreaker.OPEN
+    if provider == 'deepl':
+        return bool(os.environ.get('DEEPL_API_KEY'))
+    return True
+
+def _model_fallback(provider: str, ollama_client, error: Exception,
+                    deadline: Optional[Deadline] = None) -> Optional[str]:
+    """
+    Return the model provider to try after `provider` failed, before Google.
+    
+    Ollama falls back to OpenAI when an API key is configured. The
+    translator runs this fallback itself rather than the client, so the
+    result is cached and remembered under the provider that produced it.
+    
+    Args:
+        provider: Provider that failed
+        ollama_client: Instance of OllamaClient
+        error: Why the provider failed
+        deadline: Time by which the translation must finish
+        
+    Returns:
+        The provider to try next, or None
+    """
+    if provider != 'ollama' or isinstance(error, DeadlineExceeded):
+        return None
+    if not ollama_client.use_openai_fallback or not _provider_available('openai', ollama_client):
+        return None
+    if deadline is not None and deadline.expired():
+        return None
+    logger.info(f"Falling back to OpenAI after {provider} failed: {error}")
+    record_fallback("translation", provider, "openai")
+    return 'openai'
+
+def _resolve_provider(provider: str, target_language: str, language_name: str, ollama_client=None) -> str:
+    """
+    Pick the provider that will actually serve a request.
+    
+    Args:
+        provider: The requested provider, or 'auto'
+        target_language: Normalized target language code
+        language_name: Display name of the target language
+        ollama_client: Instance of OllamaClient, used to check backend health for 'auto'
+        
+    Returns:
+        The provider to use
+    """
+    if provider == 'auto':
+        return provider_router.choose(target_language, lambda candidate: _provider_available(candidate, ollama_client))
+    
+    # Check if provider supports this language
+    if provider in PROVIDER_LANGUAGE_SUPPORT:
+        if target_language not in PROVIDER_LANGUAGE_SUPPORT[provider]:
+            logger.warning(f"{provider} doesn't support {language_name}, falling back to Google Translate")
+            return 'google'
+    
+    if provider == 'deepl' and not os.environ.get('DEEPL_API_KEY'):
+        # DeepL requires an API key
+        logger.warning("DeepL API key not found, falling back to Google Translate")
+        return 'google'
+    
+    if provider not in TRANSLATION_PROVIDERS:
+        # Default to Google Translate as fallback
+        return 'google'
+    
+    return provider
+
+def _model_parameters(provider: str, ollama_client) -> Tuple[Optional[str], Dict[str, object]]:
+    """
+    Return the model name and generation options that affect a provider's output.
+    
+    Args:
+        provider: Resolved provider
+        ollama_client: Instance of OllamaClient
+        
+    Returns:
+        Tuple of (model name or None, generation options)
+    """
+    if provider == 'ollama':
+        return ollama_client.translation_model, ollama_client.generation_settings()
+    if provider == 'openai':
+        return 'gpt-3.5-turbo', ollama_client.generation_settings()
+    return None, {}
+
+def _translate_cached(text: str, target_language: str, language_name: str, ollama_client, provider: str,
+                      deadline: Optional[Deadline] = None) -> str:
+    """
+    Translate with a resolved provider, going through the translation cache.
+    
+    Args:
+        text: The text to translate
+        target_language: Normalized target language code
+        language_name: Display name of the target language
+        ollama_client: Instance of OllamaClient (for Ollama/OpenAI)
+        provider: Resolved provider
+        deadline: Time by which the provider must answer
+        
+    Returns:
+        The translated text
+    """
+    model, options = _model_parameters(provider, ollama_client)
+    cache_key = translation_cache.key(text, target_language, provider, model, options)
+    
+    cached = translation_cache.get(cache_key)
+    if cached is not None:
+        logger.debug(f"Translation cache hit for {provider}")
+        return cached
+    
+    # Reuse a stored translation of the same or a near-identical segment, or
+    # show the model translations of similar ones (model providers only)
+    memory = translation_memory.lookup(text, target_language, provider, model, options, ollama_client, deadline)
+    if memory.reuse is not None:
+        logger.debug("Translation memory hit")
+        return memory.reuse
+    examples = [(match.source, match.translation) for match in memory.examples]
+    
+    TRANSLATION_CHARS.labels(provider).observe(len(text))
+    start = time.monotonic()
+    try:
+        translated_text = _translate_with_provider(text, target_language, language_name, ollama_client, provider,
+                                                   deadline, examples)
+    except Exception as e:
+        elapsed = time.monotonic() - start
+        TRANSLATION_SECONDS.labels(provider, "error").observe(elapsed)
+        # Calls cut short by the caller's deadline say nothing about the provider
+        if deadline is None or not deadline.expired():
+            provider_router.record(provider, elapsed, False)
+        backup = _model_fallback(provider, ollama_client, e, deadline)
+        if backup is None:
+            raise
+        # Cached, remembered and timed as the backup's own translation
+        return _translate_cached(text, target_language, language_name, ollama_client, backup, deadline)
+    elapsed = time.monotonic() - start
+    TRANSLATION_SECONDS.labels(provider, "ok").observe(elapsed)
+    provider_router.record(provider, elapsed, True)
+    translation_cache.set(cache_key, translated_text)
+    translation_memory.add(text, target_language, provider, model, options, translated_text, memory, ollama_client)
+    return translated_text
+
+def _translate_with_provider(text: str, target_language: str, language_name: str, ollama_client, provider: str,
+                             deadline: Optional[Deadline] = None, examples: Optional[List[Tuple[str, str]]] = None) -> str:
+    """
+    Translate with a resolved provider, without caching or fallback.
+    
+    Args:
+        text: The text to translate
+        target_language: Normalized target language code
+        language_name: Display name of the target language
+        ollama_client: Instance of OllamaClient (for Ollama/OpenAI)
+        provider: Resolved provider
+        deadline: Time by which the provider must answer
+        examples: Earlier (source, translation) pairs for model providers to follow
+        
+    Returns:
+        The translated text
+    """
+    # Perform translation based on provider
+    handler = PROVIDER_HANDLERS.get(provider, PROVIDER_HANDLERS['google'])
+    translated_text = handler(text, target_language, language_name, ollama_client, deadline, examples)
+    
+    # Make sure we return a string (some translators might return different types)
+    if translated_text is None:
+        return ""
+    if isinstance(translated_text, list):
+        return " ".join(translated_text)
+    
+    return str(translated_text).strip()
+
+def _translate_with_pooled(provider: str) -> Callable[..., Any]:
+    """Return a handler that translates with a pooled deep_translator instance."""
+    def handler(text: str, target_language: str, language_name: str, ollama_client,
+                deadline: Optional[Deadline] = None, examples: Optional[List[Tuple[str, str]]] = None) -> Any:
+        # deep_translator can't take a timeout; the pooled session reads the
+        # current deadline instead
+        with deadline_scope(deadline), translator_pool.lease(provider, 'auto', target_language) as translator:
+            return translator.translate(text)
+    return handler
+
+# Translation handlers by resolved provider, called with (text, target
+# language code, target language name, ollama_client, deadline, examples);
+# only the model providers use the translation memory examples
+PROVIDER_HANDLERS: Dict[str, Callable[..., Any]] = {
+    'ollama': lambda text, target_language, language_name, ollama_client, deadline=None, examples=None:
+        ollama_client.translate(text, language_name, deadline, examples, fallback=False),
+    'openai': lambda text, target_language, language_name, ollama_client, deadline=None, examples=None:
+        ollama_client._translate_with_openai(text, language_name, deadline, examples),
+    **{provider: _translate_with_pooled(provider) for provider in TRANSLATOR_FACTORIES}
+}
+
 def get_supported_languages(provider: str = '') -> Dict[str, str]:
     """
     Get dictionary of supported languages, filtered by provider if specified.
@@ -205,10 +1058,55 @@ def _normalize_language_code(lang_code: str) -> str:
     # If no match, return as is
     return lang_code.lower()
 
+# Local detections below this confidence are confirmed with Google or Ollama
+LANGUAGE_DETECTION_THRESHOLD = float(os.environ.get("LANGUAGE_DETECTION_THRESHOLD", "0.8"))
+
 def detect_language(text: str, ollama_client) -> Tuple[str, float]:
     """
     Detect the language of the provided text.
     
+    The offline detector answers most texts without a network round trip;
+    only results below LANGUAGE_DETECTION_THRESHOLD are sent to the remote
+    detection, and the local guess is kept if that fails.
+    
+    Args:
+        text: The text to analyze
+        ollama_client: Instance of OllamaClient
+        
+    Returns:
+        Tuple containing (language_code, confidence)
+    """
+    return _confirm_detection(text, language_detector.detect(text), ollama_client)
+
+def detect_languages(texts: List[str], ollama_client) -> List[Tuple[str, float]]:
+    """
+    Detect the language of several texts, scoring them locally in one pass.
+    
+    Args:
+        texts: The texts to analyze
+        ollama_client: Instance of OllamaClient
+        
+    Returns:
+        List of (language_code, confidence) tuples in input order
+    """
+    local = language_detector.detect_batch(texts)
+    return [_confirm_detection(text, result, ollama_client) for text, result in zip(texts, local)]
+
+def _confirm_detection(text: str, local: Tuple[str, float], ollama_client) -> Tuple[str, float]:
+    """Return a confident local result, otherwise ask the remote detection."""
+    if local[1] >= LANGUAGE_DETECTION_THRESHOLD or not text.strip():
+        return local
+    
+    record_fallback("language_detection", "local", "remote")
+    remote = _detect_language_remote(text, ollama_client)
+    if remote[0] == "unknown":
+        return local
+    return remote
+
+def _detect_language_remote(text: str, ollama_client) -> Tuple[str, float]:
+    """
+    Detect the language of the provided text with Google Translate, or Ollama if that fails.
+    
     Args:
         text: The text to analyze
         ollama_client: Instance of OllamaClient
@@ -223,11 +1121,11 @@ def detect_language(text: str, ollama_client) -> Tuple[str, float]:
             # Use alternative approach
             
             # Try translating with auto-detect and inspect result
-            translator = GoogleTranslator(source='auto', target='en')
-            # Get detected language by translating a short sample
-            sample = text[:100]  # Use just a short sample for efficiency
-            _ = translator.translate(sample)
-            detected_source = translator.source
+            with translator_pool.lease('google', 'auto', 'en') as translator:
+                # Get detected language by translating a short sample
+                sample = text[:100]  # Use just a short sample for efficiency
+                _ = translator.translate(sample)
+                detected_source = translator.source
             
             # Check if detected code is in our supported languages
             if detected_source in LANGUAGE_CODES:
@@ -0,0 +1,231 @@
+import os
+import shutil
+import hashlib
+import logging
+import tempfile
+from typing import IO, List, Optional
+
+from flask import Request
+from werkzeug.utils import secure_filename
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Per-request workspaces are created under this directory
+UPLOAD_DIR = os.environ.get("UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "rag_translator_uploads"))
+# Request bodies larger than this are refused before they are read
+MAX_CONTENT_LENGTH = int(os.environ.get("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+# Images are decoded in memory, so they have a lower limit than PDFs
+MAX_IMAGE_BYTES = int(os.environ.get("MAX_IMAGE_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+# Images are kept in memory up to this size and spooled to disk above it
+SPOOL_THRESHOLD = int(os.environ.get("UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+# Form fields that are not files are small; anything larger is refused
+MAX_FORM_MEMORY = 1024 * 1024
+
+# File types by extension, and the bytes their contents must start with.
+# PDF readers accept the header anywhere in the first kilobyte.
+EXTENSION_TYPES = {"pdf": "pdf", "png": "png", "jpg": "jpeg", "jpeg": "jpeg"}
+SIGNATURES = {
+    "png": b"\x89PNG\r\n\x1a\n",
+    "jpeg": b"\xff\xd8\xff",
+}
+SNIFF_BYTES = 1024
+
+
+class UploadRejected(Exception):
+    """An upload refused while it was being received."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def file_type(filename: str) -> Optional[str]:
+    """Return the file type an upload claims by its extension, if accepted."""
+    extension = filename.rsplit(".", 1)[1].lower() if "." in filename else ""
+    return EXTENSION_TYPES.get(extension)
+
+
+def sniff(head: bytes) -> Optional[str]:
+    """Return the file type of the given leading bytes, if accepted."""
+    if b"%PDF-" in head[:SNIFF_BYTES]:
+        return "pdf"
+    for kind, signature in SIGNATURES.items():
+        if head.startswith(signature):
+            return kind
+    return None
+
+
+class IngestStream:
+    """
+    Destination of one uploaded file while the request body is parsed.
+
+    Every chunk is hashed, counted against the size limit of the file type
+    and, once the first kilobyte has arrived, the contents are checked
+    against the extension, so oversized or mislabeled files are refused
+    without reading the rest of the body. PDFs are written to a named file
+    in the workspace, since Poppler reads them from a path; images are
+    spooled in memory up to SPOOL_THRESHOLD.
+
+    Reads, seeks and the other file methods go to the underlying file.
+    """
+
+    def __init__(self, workspace: "UploadWorkspace", filename: str):
+        self.filename = secure_filename(filename) or "upload"
+        self.expected_type = file_type(self.filename)
+        if self.expected_type is None:
+            raise UploadRejected("File type not allowed", 415)
+
+        self.kind = "pdf" if self.expected_type == "pdf" else "image"
+        self.limit = MAX_CONTENT_LENGTH if self.kind == "pdf" else MAX_IMAGE_BYTES
+        self.path: Optional[str] = None
+        if self.kind == "pdf":
+            self.path = workspace.file_path(self.filename)
+            self._file: IO[bytes] = open(self.path, "w+b")
+        else:
+            self._file = tempfile.SpooledTemporaryFile(max_size=SPOOL_THRESHOLD, dir=workspace.path)
+
+        self.size = 0
+        self.verified = False
+        self._head = b""
+        self._digest = hashlib.sha256()
+
+    def __getattr__(self, name: str):
+        if name == "_file":
+            raise AttributeError(name)
+        return getattr(self._file, name)
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.size > self.limit:
+            raise UploadRejected(f"File too large, the limit for {self.kind}s is {self.limit // (1024 * 1024)} MB", 413)
+        if not self.verified:
+            self._head += data[:SNIFF_BYTES - len(self._head)]
+            if len(self._head) >= SNIFF_BYTES:
+                self._verify_type()
+        self._digest.update(data)
+        return self._file.write(data)
+
+    def _verify_type(self) -> None:
+        detected = sniff(self._head)
+        if detected is None or (detected == "pdf") != (self.expected_type == "pdf"):
+            raise UploadRejected(f"File contents are not a valid {self.expected_type.upper()} file", 415)
+        self.verified = True
+
+    def finish(self) -> "IngestStream":
+        """Check files shorter than the sniffed prefix and rewind for reading."""
+        if not self.verified:
+            self._verify_type()
+        self._file.flush()
+        self._file.seek(0)
+        metrics.UPLOAD_BYTES.labels(self.kind).observe(self.size)
+        return self
+
+    @property
+    def sha256(self) -> str:
+        return self._digest.hexdigest()
+
+    def read_all(self) -> bytes:
+        self._file.seek(0)
+        return self._file.read()
+
+    def persist(self, destination: str) -> str:
+        """
+        Move the upload out of the workspace so it outlives the request.
+
+        Args:
+            destination: Path the file should end up at
+
+        Returns:
+            The destination path
+        """
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        self._file.flush()
+        if self.path is not None:
+            try:
+                os.replace(self.path, destination)
+                return destination
+            except OSError:
+                # Different filesystem
+                pass
+        self._file.seek(0)
+        with open(destination, "wb") as out:
+            shutil.copyfileobj(self._file, out, 1024 * 1024)
+        return destination
+
+
+class UploadWorkspace:
+    """A directory of its own for the files of one request, removed with `cleanup()`."""
+
+    def __init__(self, base_dir: str = UPLOAD_DIR):
+        os.makedirs(base_dir, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix="upload-", dir=base_dir)
+        self.streams: List[IO[bytes]] = []
+
+    def file_path(self, filename: str) -> str:
+        """Return a path for the file that no other file of this request uses."""
+        path = os.path.join(self.path, filename)
+        stem, extension = os.path.splitext(filename)
+        count = 1
+        while os.path.exists(path):
+            path = os.path.join(self.path, f"{stem}-{count}{extension}")
+            count += 1
+        return path
+
+    def open_stream(self, filename: Optional[str]) -> IO[bytes]:
+        if not filename:
+            # Empty file inputs; the route reports the missing file
+            stream = tempfile.SpooledTemporaryFile(max_size=SPOOL_THRESHOLD, dir=self.path)
+        else:
+            stream = IngestStream(self, filename)
+        self.streams.append(stream)
+        return stream
+
+    def cleanup(self) -> None:
+        for stream in self.streams:
+            try:
+                stream.close()
+            except Exception as e:
+                logger.debug(f"Closing upload stream failed: {e}")
+        self.streams = []
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class UploadRequest(Request):
+    """
+    Request whose file uploads are streamed into a per-request UploadWorkspace.
+
+    Flask closes the request when its context ends, also after errors,
+    which removes the workspace and everything still in it.
+    """
+
+    max_form_memory_size = MAX_FORM_MEMORY
+    workspace: Optional[UploadWorkspace] = None
+
+    def _get_file_stream(self, total_content_length: Optional[int], content_type: Optional[str],
+                         filename: Optional[str] = None, content_length: Optional[int] = None) -> IO[bytes]:
+        if self.workspace is None:
+            self.workspace = UploadWorkspace()
+        return self.workspace.open_stream(filename)
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            if self.workspace is not None:
+                self.workspace.cleanup()
+                self.workspace = None
+
+
+def received_upload(file) -> IngestStream:
+    """
+    Return the checked, fully received upload behind a FileStorage.
+
+    Raises:
+        UploadRejected: If the file is not a valid file of its type
+    """
+    stream = file.stream
+    if not isinstance(stream, IngestStream):
+        raise UploadRejected("File type not allowed", 415)
+    return stream.finish()